@@ -5,7 +5,7 @@ from flask import Flask
 import os
 from flask_cors import CORS
 from app.config import Config
-from app.extensions import mongo, jwt, scheduler
+from app.extensions import mongo, jwt
 from app.routes import auth, trading, challenge, payment, admin, market, alerts, community
 from app.models import User
 
@@ -18,6 +18,64 @@ def create_app(config_class=Config):
     # Initialize extensions
     mongo.init_app(app)
     jwt.init_app(app)
+    
+    # Seeded price simulation for the shared tick tape
+    from app.services.tick_producer import TickProducer
+    TickProducer.configure(
+        seed=app.config.get('SIMULATION_SEED'),
+        model=app.config.get('SIMULATION_MODEL', 'gbm')
+    )
+    
+    from app.services.bar_store import BarStore
+    BarStore.configure(app.config['BAR_STORE_DIR'])
+    
+    from app.services.upstream import UpstreamFetcher
+    UpstreamFetcher.configure(
+        max_workers=app.config.get('UPSTREAM_MAX_WORKERS', 8),
+        timeout=app.config.get('UPSTREAM_TIMEOUT', 5.0),
+        failure_threshold=app.config.get('UPSTREAM_FAILURE_THRESHOLD', 5),
+        reset_timeout=app.config.get('UPSTREAM_RESET_TIMEOUT', 30)
+    )
+    
+    from app.services.bvc_ingester import BVCIngester
+    BVCIngester.configure(
+        url=app.config.get('BVC_BOARD_URL'),
+        interval=app.config.get('BVC_REFRESH_INTERVAL', 60),
+        timeout=app.config.get('UPSTREAM_TIMEOUT', 5.0)
+    )
+    
+    from app.services.news_store import NewsStore
+    NewsStore.configure(
+        sources=app.config.get('NEWS_SOURCES'),
+        ttl=app.config.get('NEWS_TTL', 48 * 3600),
+        refresh_interval=app.config.get('NEWS_REFRESH_INTERVAL', 300)
+    )
+    
+    from app.services.verification_queue import VerificationQueue
+    VerificationQueue.configure(
+        app,
+        workers=app.config.get('VERIFY_WORKERS', 2),
+        max_pending=app.config.get('VERIFY_MAX_PENDING', 1000),
+        delay=app.config.get('VERIFY_DELAY', 0.5)
+    )
+    
+    from app.services.challenge_stats import ChallengeStats
+    ChallengeStats.configure(curve_points=app.config.get('STATS_CURVE_POINTS', 500))
+    
+    from app.services.alert_engine import AlertEngine
+    AlertEngine.configure(
+        app,
+        enabled=app.config.get('ALERTS_ENABLED', True),
+        reload_interval=app.config.get('ALERTS_RELOAD_INTERVAL', 60)
+    )
+    
+    # Snapshot restored lazily on first market data access, saved periodically and at exit
+    from app.services.warm_start import WarmStart
+    WarmStart.configure(
+        target=app.config.get('WARM_START_TARGET', 'file'),
+        path=app.config.get('WARM_START_PATH'),
+        interval=app.config.get('WARM_START_INTERVAL', 60)
+    )
     # Enable CORS for all routes and origins
     # Configure CORS to handle preflight OPTIONS requests properly
     # Configure CORS with safe origins (no invalid regex)
@@ -78,24 +136,15 @@ def create_app(config_class=Config):
                 admin_user.set_password('admin123')
                 mongo.db.users.insert_one(admin_user.to_dict())
                 print("Admin user created: admin@tradesense.ai / admin123")
+            if app.config.get('MONGO_ENSURE_INDEXES'):
+                from app.indexes import ensure_indexes
+                ensure_indexes(mongo.db)
         except Exception as e:
             print(f"WARNING: MongoDB initialization/seeding failed: {e}")
     
-    # Start background scheduler for challenge verification
-    # if not scheduler.running:
-    #     try:
-    #         scheduler.start()
-    #         # Add job to verify challenges every 5 minutes
-    #         from app.services.challenge_engine import verify_all_active_challenges
-    #         scheduler.add_job(
-    #             id='verify_challenges',
-    #             func=verify_all_active_challenges,
-    #             trigger='interval',
-    #             minutes=5,
-    #             replace_existing=True
-    #         )
-    #     except Exception as e:
-    #         print(f"WARNING: Scheduler failed to start: {e}")
+    # Set-based verification of every monitored challenge on the background scheduler
+    from app.services.challenge_sweep import ChallengeSweep
+    ChallengeSweep.configure(app, interval=app.config.get('CHALLENGE_SWEEP_INTERVAL', 60))
     
     @app.route('/api/health')
     def health_check():
@@ -2,6 +2,7 @@
 TradeSense AI - Configuration
 """
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -51,3 +52,60 @@ class Config:
     MAX_DAILY_LOSS_PERCENT = float(os.getenv('MAX_DAILY_ LOSS_PERCENT', 5))
     MAX_TOTAL_LOSS_PERCENT = float(os.getenv('MAX_TOTAL_LOSS_PERCENT', 10))
     PROFIT_TARGET_PERCENT = float(os.getenv('PROFIT_TARGET_PERCENT', 10))
+    
+    # Price Simulation (set SIMULATION_SEED for reproducible tick streams)
+    SIMULATION_SEED = int(os.getenv('SIMULATION_SEED')) if os.getenv('SIMULATION_SEED') else None
+    SIMULATION_MODEL = os.getenv('SIMULATION_MODEL', 'gbm')  # 'gbm' or 'jump'
+    
+    # Price Streaming (SSE): each client holds a worker thread for up to STREAM_MAX_DURATION,
+    # so it needs threaded workers (gunicorn.conf.py) and is off on serverless (Vercel), where
+    # the dashboard polls instead
+    STREAM_ENABLED = os.getenv('STREAM_ENABLED', 'false' if os.getenv('VERCEL') else 'true').lower() == 'true'
+    STREAM_TOKEN_TTL = int(os.getenv('STREAM_TOKEN_TTL', 60))  # seconds a stream token can open a connection
+    STREAM_MAX_RATE = float(os.getenv('STREAM_MAX_RATE', 4))  # frames per second per client
+    STREAM_MAX_SYMBOLS = int(os.getenv('STREAM_MAX_SYMBOLS', 50))
+    STREAM_MAX_DURATION = int(os.getenv('STREAM_MAX_DURATION', 300))  # seconds before the client reconnects
+    
+    # Historical bars (memory-mapped columns in one <pid> subdirectory per worker,
+    # /tmp is the only writable dir on Vercel)
+    BAR_STORE_DIR = os.getenv('BAR_STORE_DIR', os.path.join(tempfile.gettempdir(), 'tradesense_bars'))
+    
+    # Warm-start snapshot of quotes and recent bars ('file', 'mongo' or 'off')
+    # Use 'mongo' on Vercel, where /tmp does not survive cold starts
+    WARM_START_TARGET = os.getenv('WARM_START_TARGET', 'file')
+    WARM_START_PATH = os.getenv('WARM_START_PATH', os.path.join(tempfile.gettempdir(), 'tradesense_snapshot.npz'))
+    WARM_START_INTERVAL = int(os.getenv('WARM_START_INTERVAL', 60))  # seconds between saves
+    
+    # Upstream fetches (yfinance, BVC): worker pool, hard deadline and circuit breaker
+    UPSTREAM_MAX_WORKERS = int(os.getenv('UPSTREAM_MAX_WORKERS', 8))
+    UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT', 5))  # seconds
+    UPSTREAM_FAILURE_THRESHOLD = int(os.getenv('UPSTREAM_FAILURE_THRESHOLD', 5))  # failures before opening
+    UPSTREAM_RESET_TIMEOUT = int(os.getenv('UPSTREAM_RESET_TIMEOUT', 30))  # seconds before a trial call
+    
+    # Casablanca Stock Exchange quote board (empty = mock Moroccan prices)
+    BVC_BOARD_URL = os.getenv('BVC_BOARD_URL', '')
+    BVC_REFRESH_INTERVAL = int(os.getenv('BVC_REFRESH_INTERVAL', 60))  # seconds, during the BVC session
+    
+    # Market news sources: comma-separated RSS/JSON files or RSS URLs (empty = built-in headlines)
+    NEWS_SOURCES = [s.strip() for s in os.getenv('NEWS_SOURCES', '').split(',') if s.strip()]
+    NEWS_TTL = int(os.getenv('NEWS_TTL', 48 * 3600))  # seconds an item stays listed
+    NEWS_REFRESH_INTERVAL = int(os.getenv('NEWS_REFRESH_INTERVAL', 300))  # seconds between source polls
+    
+    # Challenge rule verification queue (one pending job per challenge)
+    VERIFY_WORKERS = int(os.getenv('VERIFY_WORKERS', 2))
+    VERIFY_MAX_PENDING = int(os.getenv('VERIFY_MAX_PENDING', 1000))  # jobs before submits are rejected
+    VERIFY_DELAY = float(os.getenv('VERIFY_DELAY', 0.5))  # seconds a job waits to absorb a burst
+    
+    # Materialized trading stats: equity curve point budget (LTTB downsampled)
+    STATS_CURVE_POINTS = int(os.getenv('STATS_CURVE_POINTS', 500))
+    
+    # Create missing MongoDB indexes at startup (idempotent: one index listing per
+    # collection when they exist; `python manage_indexes.py apply` does the same)
+    MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() == 'true'
+    
+    # Price alerts matched on every tick (notifications expire after 30 days, see app/indexes.py)
+    ALERTS_ENABLED = os.getenv('ALERTS_ENABLED', 'true').lower() == 'true'
+    ALERTS_RELOAD_INTERVAL = int(os.getenv('ALERTS_RELOAD_INTERVAL', 60))  # seconds between resyncs with MongoDB
+    
+    # Challenge rules swept for all accounts at once on the scheduler (seconds, 0 = off)
+    CHALLENGE_SWEEP_INTERVAL = int(os.getenv('CHALLENGE_SWEEP_INTERVAL', 60))
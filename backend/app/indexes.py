@@ -0,0 +1,212 @@
+"""
+TradeSense AI - MongoDB Indexes
+Declared indexes per collection, applied idempotently, and the hot queries they serve
+"""
+from contextlib import contextmanager
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+
+class Index:
+    """One named index: key pattern plus create_index options (unique, partial, TTL...)"""
+
+    __slots__ = ('name', 'keys', 'options')
+
+    def __init__(self, name, keys, **options):
+        self.name = name
+        self.keys = keys
+        self.options = options
+
+    def matches(self, info):
+        """True when an existing index (index_information entry) has the same key and options"""
+        if [tuple(k) for k in info.get('key', [])] != [tuple(k) for k in self.keys]:
+            return False
+        return all(info.get(option) == value for option, value in self.options.items())
+
+
+NOTIFICATION_TTL = 30 * 24 * 3600  # seconds
+
+# collection -> indexes it must have
+INDEXES = {
+    'users': [
+        Index('email_unique', [('email', ASCENDING)], unique=True),
+        Index('verification_token', [('verification_token', ASCENDING)],
+              partialFilterExpression={'verification_token': {'$exists': True}}),
+        Index('reset_token', [('reset_token', ASCENDING)],
+              partialFilterExpression={'reset_token': {'$exists': True}}),
+        Index('created_at', [('created_at', DESCENDING)]),
+    ],
+    'challenges': [
+        Index('user_latest', [('user_id', ASCENDING), ('created_at', DESCENDING)]),
+        Index('status', [('status', ASCENDING)]),
+        Index('sweep_batch', [('sweep_batch', ASCENDING)],
+              partialFilterExpression={'sweep_batch': {'$exists': True}}),
+    ],
+    'trades': [
+        # Open positions only: stays small however long the history grows
+        Index('open_positions', [('challenge_id', ASCENDING), ('timestamp', DESCENDING)],
+              partialFilterExpression={'is_open': True}),
+        # History pages, recent trades and realized P/L up to a date
+        Index('challenge_timeline', [('challenge_id', ASCENDING), ('timestamp', DESCENDING), ('_id', DESCENDING)]),
+        Index('close_batch', [('close_batch', ASCENDING)],
+              partialFilterExpression={'close_batch': {'$exists': True}}),
+        # Realized P/L up to a close date (daily loss baseline)
+        Index('closed_timeline', [('challenge_id', ASCENDING), ('closed_at', DESCENDING)],
+              partialFilterExpression={'is_open': False}),
+    ],
+    'price_alerts': [
+        Index('user_active', [('user_id', ASCENDING), ('is_active', ASCENDING)]),
+        # Alert engine reloads
+        Index('active_symbol', [('is_active', ASCENDING), ('symbol', ASCENDING)]),
+        Index('trigger_batch', [('trigger_batch', ASCENDING)],
+              partialFilterExpression={'trigger_batch': {'$exists': True}}),
+    ],
+    'notifications': [
+        Index('user_latest', [('user_id', ASCENDING), ('created_at', DESCENDING)]),
+        Index('expire', [('created_at', ASCENDING)], expireAfterSeconds=NOTIFICATION_TTL),
+    ],
+}
+
+
+# (name, collection, filter, sort) of the queries that must never scan a collection
+_OID = '000000000000000000000000'
+HOT_QUERIES = [
+    ('open positions', 'trades', {'challenge_id': _OID, 'is_open': True}, [('timestamp', DESCENDING)]),
+    ('trade history', 'trades', {'challenge_id': _OID}, [('timestamp', DESCENDING), ('_id', DESCENDING)]),
+    ('realized P/L until', 'trades', {'challenge_id': _OID, 'is_open': False, '$or': [
+        {'closed_at': {'$lte': datetime(2000, 1, 1)}}, {'closed_at': None, 'timestamp': {'$lte': datetime(2000, 1, 1)}}
+    ]}, None),
+    ('latest challenge', 'challenges', {'user_id': _OID}, [('created_at', DESCENDING)]),
+    ('open positions of the sweep', 'trades', {'challenge_id': {'$in': [_OID]}, 'is_open': True}, None),
+    ('challenges to verify', 'challenges', {'status': {'$in': ['active', 'passed']}}, None),
+    ('login', 'users', {'email': 'trader@example.com'}, None),
+    ('email verification', 'users', {'verification_token': 'token'}, None),
+    ('password reset', 'users', {'reset_token': 'token'}, None),
+    ('active alerts', 'price_alerts', {'user_id': _OID, 'is_active': True}, None),
+    ('alerts to watch', 'price_alerts', {'is_active': True}, None),
+    ('notifications', 'notifications', {'user_id': _OID}, [('created_at', DESCENDING)]),
+]
+
+
+def hot_pipelines(user_id):
+    """(name, collection, pipeline) of the hot aggregations, as the routes build them"""
+    from app.routes.trading import trading_context_pipeline
+
+    return [
+        ('trading context', 'challenges', trading_context_pipeline(user_id)),
+    ]
+
+
+@contextmanager
+def _sample_user(db):
+    """
+    user_id owning a challenge, so the $lookup sub-pipelines actually run
+    under explain (a temporary challenge is inserted on an empty database)
+    """
+    challenge = db.challenges.find_one({}, {'user_id': 1}, sort=[('created_at', DESCENDING)])
+    if challenge is not None:
+        yield challenge['user_id']
+        return
+    temporary = db.challenges.insert_one({'user_id': 'manage_indexes', 'created_at': datetime.utcnow()}).inserted_id
+    try:
+        yield 'manage_indexes'
+    finally:
+        db.challenges.delete_one({'_id': temporary})
+
+
+def ensure_indexes(db, drop_conflicting=True):
+    """
+    Create every declared index that is missing.
+    An index with the same name but another definition is dropped and rebuilt
+    (or reported when drop_conflicting is False).
+    Returns: dict collection -> {'created': [...], 'unchanged': [...], 'failed': {name: error}}
+    """
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        result = report[collection_name] = {'created': [], 'unchanged': [], 'failed': {}}
+
+        for index in indexes:
+            # Same definition under any name (e.g. an older 'email_1') is enough
+            if any(index.matches(info) for info in existing.values()):
+                result['unchanged'].append(index.name)
+                continue
+            info = existing.get(index.name)
+            try:
+                if info is not None:
+                    if not drop_conflicting:
+                        raise OperationFailure(f'index {index.name} exists with another definition')
+                    collection.drop_index(index.name)
+                collection.create_index(index.keys, name=index.name, **index.options)
+                result['created'].append(index.name)
+            except OperationFailure as e:
+                # e.g. duplicate emails blocking a unique index: report, keep going
+                result['failed'][index.name] = str(e)
+                print(f"WARNING: index {collection_name}.{index.name} not applied: {e}")
+    return report
+
+
+def _stages(plan):
+    """Every stage name of an explain() plan tree"""
+    yield plan.get('stage')
+    for child in plan.get('inputStages', []) + [plan[key] for key in ('inputStage', 'queryPlan') if key in plan]:
+        yield from _stages(child)
+
+
+def _winning_plans(explain):
+    """Every winningPlan of an explain() output (aggregations nest them per stage)"""
+    if isinstance(explain, dict):
+        if 'winningPlan' in explain:
+            yield explain['winningPlan']
+        for value in explain.values():
+            yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _winning_plans(value)
+
+
+def _lookups(explain):
+    """Every $lookup stage of an aggregation explain() (executionStats reports its sub-pipeline scans)"""
+    if isinstance(explain, dict):
+        if '$lookup' in explain:
+            yield explain
+        for value in explain.values():
+            yield from _lookups(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _lookups(value)
+
+
+def check_query_plans(db):
+    """
+    explain() every hot query and aggregation. Aggregations run against a
+    real challenge with executionStats: the plans of $lookup sub-pipelines
+    are only reported (indexesUsed, collectionScans) once they have run.
+    Returns: list of (name, winning stages, ok) where ok is False on a COLLSCAN
+    """
+    results = []
+    for name, collection_name, query, sort in HOT_QUERIES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.explain()['queryPlanner']['winningPlan']
+        stages = [stage for stage in _stages(plan) if stage]
+        results.append((name, stages, 'COLLSCAN' not in stages))
+
+    with _sample_user(db) as user_id:
+        for name, collection_name, pipeline in hot_pipelines(user_id):
+            explain = db.command('explain', {'aggregate': collection_name, 'pipeline': pipeline, 'cursor': {}},
+                                 verbosity='executionStats')
+            stages = [stage for plan in _winning_plans(explain) for stage in _stages(plan) if stage]
+            results.append((name, stages, bool(stages) and 'COLLSCAN' not in stages))
+
+            for lookup in _lookups(explain):
+                indexes = lookup.get('indexesUsed', [])
+                scans = lookup.get('collectionScans', 0)
+                stages = [f'IXSCAN {index}' for index in indexes] + ['COLLSCAN'] * bool(scans)
+                results.append((f"{name}: {lookup['$lookup'].get('as')} ($lookup)", stages,
+                                bool(indexes) and not scans))
+    return results
@@ -84,6 +84,7 @@ class Challenge:
         self.max_daily_loss_percent = kwargs.get('max_daily_loss_percent', 5.0)
         self.max_total_loss_percent = kwargs.get('max_total_loss_percent', 10.0)
         self.profit_target_percent = kwargs.get('profit_target_percent', 10.0)
+        self.reserved_margin = kwargs.get('reserved_margin', 0.0)  # margin held by open orders
         self.created_at = kwargs.get('created_at', datetime.utcnow())
         self.completed_at = kwargs.get('completed_at')
         self.failure_reason = kwargs.get('failure_reason')
@@ -109,6 +110,7 @@ class Challenge:
             'max_daily_loss_percent': self.max_daily_loss_percent,
             'max_total_loss_percent': self.max_total_loss_percent,
             'profit_target_percent': self.profit_target_percent,
+            'reserved_margin': round(self.reserved_margin, 2),
             'failure_reason': self.failure_reason,
             'created_at': self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at,
             'completed_at': self.completed_at.isoformat() if isinstance(self.completed_at, datetime) else self.completed_at
@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.models import User, Challenge, PaymentConfig
 from app.extensions import mongo
+from app.services.stats_queries import StatsQueries
 from app.utils.decorators import admin_required
 from bson import ObjectId
 from datetime import datetime
@@ -119,14 +120,15 @@ def update_payment_config():
 def get_admin_stats():
     """Get platform statistics (admin only)"""
     total_users = mongo.db.users.count_documents({})
-    total_challenges = mongo.db.challenges.count_documents({})
-    active_challenges = mongo.db.challenges.count_documents({'status': 'active'})
-    passed_challenges = mongo.db.challenges.count_documents({'status': 'passed'})
-    failed_challenges = mongo.db.challenges.count_documents({'status': 'failed'})
+    counts = StatsQueries.challenge_counts()
+    total_challenges = counts['total']
+    active_challenges = counts['status'].get('active', 0)
+    passed_challenges = counts['status'].get('passed', 0)
+    failed_challenges = counts['status'].get('failed', 0)
     
-    starter_count = mongo.db.challenges.count_documents({'plan_type': 'starter'})
-    pro_count = mongo.db.challenges.count_documents({'plan_type': 'pro'})
-    elite_count = mongo.db.challenges.count_documents({'plan_type': 'elite'})
+    starter_count = counts['plans'].get('starter', 0)
+    pro_count = counts['plans'].get('pro', 0)
+    elite_count = counts['plans'].get('elite', 0)
     
     return jsonify({
         'users': {'total': total_users},
@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import PriceAlert
 from app.extensions import mongo
+from app.services.alert_engine import AlertEngine
 from bson import ObjectId
 from datetime import datetime
 
@@ -26,11 +27,15 @@ def create_alert():
     if not data.get('symbol') or not data.get('target_price') or not data.get('condition'):
         return jsonify({'error': 'Missing required fields'}), 400
         
+    condition = str(data['condition']).upper()
+    if condition not in ('ABOVE', 'BELOW'):
+        return jsonify({'error': 'Invalid condition'}), 400
+        
     alert = PriceAlert(
         user_id=user_id,
         symbol=data['symbol'],
         target_price=float(data['target_price']),
-        condition=data['condition']
+        condition=condition
     )
     
     alert_data = alert.to_dict()
@@ -39,6 +44,7 @@ def create_alert():
     
     result = mongo.db.price_alerts.insert_one(alert_data)
     alert.id = str(result.inserted_id)
+    AlertEngine.add(alert_data)
     
     return jsonify(alert.to_dict()), 201
 
@@ -51,5 +57,30 @@ def delete_alert(alert_id):
     
     if result.deleted_count == 0:
         return jsonify({'error': 'Alert not found'}), 404
+    AlertEngine.remove(ObjectId(alert_id))
         
     return jsonify({'message': 'Alert deleted'}), 200
+
+@bp.route('/notifications', methods=['GET'])
+@jwt_required()
+def get_notifications():
+    """Get the user's latest alert notifications (unread only with ?unread=1)"""
+    user_id = get_jwt_identity()
+    query = {'user_id': user_id}
+    if request.args.get('unread') in ('1', 'true'):
+        query['is_read'] = False
+    cursor = mongo.db.notifications.find(query).sort('created_at', -1).limit(50)
+    notifications = []
+    for n in cursor:
+        n['id'] = str(n.pop('_id'))
+        n['created_at'] = n['created_at'].isoformat() if isinstance(n.get('created_at'), datetime) else n.get('created_at')
+        notifications.append(n)
+    return jsonify(notifications), 200
+
+@bp.route('/notifications/read', methods=['POST'])
+@jwt_required()
+def mark_notifications_read():
+    """Mark all the user's notifications as read"""
+    user_id = get_jwt_identity()
+    result = mongo.db.notifications.update_many({'user_id': user_id, 'is_read': False}, {'$set': {'is_read': True}})
+    return jsonify({'updated': result.modified_count}), 200
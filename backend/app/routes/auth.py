@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from app.models import User, Challenge
 from app.extensions import mongo
+from app.services.stats_queries import StatsQueries
 from bson import ObjectId
 from datetime import datetime, timedelta
 
@@ -205,10 +206,11 @@ def get_user_stats():
     """Get user statistics"""
     user_id = get_jwt_identity()
     
-    total_challenges = mongo.db.challenges.count_documents({'user_id': user_id})
-    passed_challenges = mongo.db.challenges.count_documents({'user_id': user_id, 'status': 'passed'})
-    failed_challenges = mongo.db.challenges.count_documents({'user_id': user_id, 'status': 'failed'})
-    active_challenges = mongo.db.challenges.count_documents({'user_id': user_id, 'status': 'active'})
+    counts = StatsQueries.challenge_counts(user_id)
+    total_challenges = counts['total']
+    passed_challenges = counts['status'].get('passed', 0)
+    failed_challenges = counts['status'].get('failed', 0)
+    active_challenges = counts['status'].get('active', 0)
     
     success_rate = (passed_challenges / total_challenges * 100) if total_challenges > 0 else 0
     
@@ -1,14 +1,32 @@
 """
 TradeSense AI - Market Data Routes
 """
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import zlib
 from app.services.market_data import MarketDataService
 from app.services.ai_service import AIService
+from app.services.alert_engine import AlertEngine
+from app.services.bvc_ingester import BVCIngester
+from app.services.challenge_sweep import ChallengeSweep
+from app.services.instruments import InstrumentRegistry
+from app.services.news_store import NewsStore
+from app.services.price_stream import PriceStream
+from app.services.verification_queue import VerificationQueue
+from app.services.warm_start import WarmStart
+from app.utils.decorators import admin_required
 
 bp = Blueprint('market', __name__)
 
 
+def _invalid_symbols(symbols):
+    """Error response for malformed symbols from request input, or None"""
+    invalid = [symbol for symbol in symbols if not InstrumentRegistry.is_valid(symbol)]
+    if invalid:
+        return jsonify({'error': 'Invalid symbol', 'symbols': [str(symbol)[:32] for symbol in invalid[:10]]}), 400
+    return None
+
+
 @bp.route('/symbols', methods=['GET'])
 def get_available_symbols():
     """Get list of available trading symbols"""
@@ -25,6 +43,9 @@ def get_available_symbols():
 @jwt_required()
 def get_price(symbol):
     """Get real-time price for a symbol"""
+    invalid = _invalid_symbols([symbol])
+    if invalid:
+        return invalid
     try:
         data = MarketDataService.get_realtime_price(symbol)
         status = MarketDataService.get_market_status(symbol)
@@ -42,6 +63,9 @@ def get_batch_prices():
     symbols = data.get('symbols', [])
     if not symbols:
         return jsonify({'error': 'No symbols provided'}), 400
+    invalid = _invalid_symbols(symbols)
+    if invalid:
+        return invalid
     
     try:
         prices = MarketDataService.get_batch_prices(symbols)
@@ -50,12 +74,71 @@ def get_batch_prices():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/stream-token', methods=['POST'])
+@jwt_required()
+def get_stream_token():
+    """Short-lived token to open a price stream (keeps the access token out of URLs)"""
+    if not current_app.config.get('STREAM_ENABLED', True):
+        return jsonify({'error': 'Streaming disabled, use polling', 'polling': True}), 503
+    
+    token = PriceStream.issue_token(current_app.config['SECRET_KEY'], get_jwt_identity())
+    return jsonify({'token': token, 'expires_in': current_app.config.get('STREAM_TOKEN_TTL', 60)}), 200
+
+
+@bp.route('/stream', methods=['GET'])
+def stream_prices():
+    """Stream price updates for a symbol set (Server-Sent Events)"""
+    if not current_app.config.get('STREAM_ENABLED', True):
+        return jsonify({'error': 'Streaming disabled, use polling', 'polling': True}), 503
+    
+    user_id = PriceStream.verify_token(
+        current_app.config['SECRET_KEY'],
+        request.args.get('token', ''),
+        max_age=current_app.config.get('STREAM_TOKEN_TTL', 60)
+    )
+    if user_id is None:
+        return jsonify({'error': 'Invalid or expired stream token'}), 401
+    
+    symbols = [s.strip() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    if not symbols:
+        return jsonify({'error': 'No symbols provided'}), 400
+    
+    max_symbols = current_app.config.get('STREAM_MAX_SYMBOLS', 50)
+    if len(symbols) > max_symbols:
+        return jsonify({'error': f'Too many symbols (max {max_symbols})'}), 400
+    invalid = _invalid_symbols(symbols)
+    if invalid:
+        return invalid
+    
+    max_rate = current_app.config.get('STREAM_MAX_RATE', 4.0)
+    try:
+        max_rate = min(float(request.args.get('max_rate', max_rate)), max_rate)
+    except ValueError:
+        return jsonify({'error': 'Invalid max_rate'}), 400
+    if max_rate <= 0:
+        return jsonify({'error': 'Invalid max_rate'}), 400
+    
+    events = PriceStream.events(
+        symbols,
+        max_rate=max_rate,
+        max_duration=current_app.config.get('STREAM_MAX_DURATION', 300)
+    )
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @bp.route('/historical/<symbol>', methods=['GET'])
 @jwt_required()
 def get_historical(symbol):
     """Get historical data for charting"""
     period = request.args.get('period', '1mo')
     interval = request.args.get('interval', '1d')
+    invalid = _invalid_symbols([symbol])
+    if invalid:
+        return invalid
     
     try:
         data = MarketDataService.get_historical_data(symbol, period, interval)
@@ -68,6 +151,9 @@ def get_historical(symbol):
 @jwt_required()
 def get_ai_signal(symbol):
     """Get AI trading signal for a symbol"""
+    invalid = _invalid_symbols([symbol])
+    if invalid:
+        return invalid
     try:
         # Get current price
         price_data = MarketDataService.get_realtime_price(symbol)
@@ -83,6 +169,25 @@ def get_ai_signal(symbol):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/technicals/batch', methods=['POST'])
+@jwt_required()
+def get_batch_technicals():
+    """Get technical indicators for a watchlist"""
+    data = request.get_json()
+    symbols = data.get('symbols', [])
+    if not symbols:
+        return jsonify({'error': 'No symbols provided'}), 400
+    invalid = _invalid_symbols(symbols)
+    if invalid:
+        return invalid
+
+    try:
+        technicals = MarketDataService.get_batch_technicals(symbols)
+        return jsonify(technicals), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/market-summary', methods=['GET'])
 @jwt_required()
 def get_market_summary():
@@ -97,9 +202,41 @@ def get_market_summary():
 @bp.route('/news', methods=['GET'])
 @jwt_required()
 def get_news():
-    """Get market news"""
+    """Get market news (filters: symbol, category, sentiment; paginated with cursor)"""
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
     try:
-        news = MarketDataService.get_market_news()
-        return jsonify({'news': news}), 200
+        news, next_cursor = MarketDataService.get_news_page(
+            symbol=request.args.get('symbol'),
+            category=request.args.get('category'),
+            sentiment=request.args.get('sentiment'),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+        response = jsonify({'news': news, 'next_cursor': next_cursor})
+        # Same store version + same query = same page
+        response.set_etag(f"news-{NewsStore.version()}-{zlib.crc32(request.query_string)}")
+        response.headers['Cache-Control'] = 'private, max-age=60'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_market_metrics():
+    """Get market data cache metrics (admin only)"""
+    return jsonify({
+        'price_cache': MarketDataService.get_cache_stats(),
+        'stream': PriceStream.stats(),
+        'warm_start': WarmStart.stats(),
+        'bvc': BVCIngester.stats(),
+        'news': NewsStore.stats(),
+        'verification': VerificationQueue.stats(),
+        'alerts': AlertEngine.stats(),
+        'sweep': ChallengeSweep.stats()
+    }), 200
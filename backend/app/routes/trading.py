@@ -1,41 +1,84 @@
 """
 TradeSense AI - Trading Routes (MongoDB Version)
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models import User, Challenge, Trade
 from app.extensions import mongo
 from app.services.market_data import MarketDataService
-from app.services.challenge_engine import ChallengeEngine
 from app.services.ai_service import AIService
+from app.services.challenge_stats import ChallengeStats
+from app.services.instruments import InstrumentRegistry
+from app.services.trade_history import TradeHistory
+from app.services.valuation import PositionBook, ValuationEngine
+from app.services.verification_queue import VerificationQueue
 from datetime import datetime
-from bson import ObjectId
-import threading
 
 bp = Blueprint('trading', __name__)
 
-def get_portfolio_internal(challenge_id):
+POSITION_PROJECTION = {'symbol': 1, 'action': 1, 'quantity': 1, 'price': 1, 'margin': 1, 'timestamp': 1}
+RECENT_TRADES_LIMIT = 10
+ANALYSIS_FIELDS = ('symbol', 'action', 'quantity', 'price', 'profit_loss', 'is_open', 'close_price', 'timestamp')
+
+def _position_dict(t_doc):
+    """Open order as shown in the MT4-style position table"""
+    t = Trade(**t_doc)
+    return {
+        'id': t.id,
+        'symbol': t.symbol,
+        'action': t.action,
+        'quantity': round(t.quantity, 6),
+        'price': round(t.price, 4),
+        'timestamp': t.timestamp.isoformat() if isinstance(t.timestamp, datetime) else t.timestamp
+    }
+
+def open_trades_pipeline(challenge_id='$$cid'):
+    """$lookup sub-pipeline of a challenge's open orders"""
+    return [
+        {'$match': {'$expr': {'$eq': ['$challenge_id', challenge_id]}, 'is_open': True}},
+        {'$sort': {'timestamp': -1}},
+        {'$project': POSITION_PROJECTION}
+    ]
+
+def recent_trades_pipeline(challenge_id='$$cid', limit=RECENT_TRADES_LIMIT):
+    """$lookup sub-pipeline of a challenge's latest trades"""
+    return [
+        {'$match': {'$expr': {'$eq': ['$challenge_id', challenge_id]}}},
+        {'$sort': {'timestamp': -1}},
+        {'$limit': limit}
+    ]
+
+def trading_context_pipeline(user_id, recent_limit=RECENT_TRADES_LIMIT):
+    """Aggregation of load_trading_context (also explained by manage_indexes.py)"""
+    return [
+        {'$match': {'user_id': user_id}},
+        {'$sort': {'created_at': -1}},
+        {'$limit': 1},
+        {'$lookup': {
+            'from': 'trades',
+            'let': {'cid': {'$toString': '$_id'}},
+            'pipeline': open_trades_pipeline(),
+            'as': 'open_trades'
+        }},
+        {'$lookup': {
+            'from': 'trades',
+            'let': {'cid': {'$toString': '$_id'}},
+            'pipeline': recent_trades_pipeline(limit=recent_limit),
+            'as': 'recent_trades'
+        }}
+    ]
+
+def load_trading_context(user_id, recent_limit=RECENT_TRADES_LIMIT):
     """
-    Get all independent open orders for MT4-style management.
+    Latest challenge of a user with its open orders and recent trades,
+    fetched in a single aggregation round trip.
+    Returns: (challenge_doc, open_trade_docs, recent_trade_docs) or None
     """
-    open_trades_cursor = mongo.db.trades.find({
-        'challenge_id': challenge_id, 
-        'is_open': True
-    }).sort('timestamp', -1)
-    
-    positions = []
-    for t_doc in open_trades_cursor:
-        t = Trade(**t_doc)
-        positions.append({
-            'id': t.id,
-            'symbol': t.symbol,
-            'action': t.action,
-            'quantity': round(t.quantity, 6),
-            'price': round(t.price, 4),
-            'timestamp': t.timestamp.isoformat() if isinstance(t.timestamp, datetime) else t.timestamp
-        })
-            
-    return {'positions': positions}
+    docs = list(mongo.db.challenges.aggregate(trading_context_pipeline(user_id, recent_limit)))
+    if not docs:
+        return None
+    challenge_doc = docs[0]
+    return challenge_doc, challenge_doc.pop('open_trades', []), challenge_doc.pop('recent_trades', [])
 
 @bp.route('/portfolio', methods=['GET'])
 @jwt_required()
@@ -43,31 +86,16 @@ def get_portfolio():
     """Get user's active challenge and portfolio"""
     user_id = get_jwt_identity()
     
-    # Get latest challenge
-    challenge_doc = mongo.db.challenges.find_one(
-        {'user_id': user_id},
-        sort=[('created_at', -1)]
-    )
-    
-    if not challenge_doc:
+    # Latest challenge, open orders and recent trades in one round trip
+    context = load_trading_context(user_id)
+    if not context:
         return jsonify({'error': 'No active challenge found'}), 404
-    
-    challenge = Challenge(**challenge_doc)
-    
-    # Get recent trades
-    recent_trades_cursor = mongo.db.trades.find(
-        {'challenge_id': challenge.id}
-    ).sort('timestamp', -1).limit(10)
-    
-    recent_trades = [Trade(**t).to_dict() for t in recent_trades_cursor]
-    
-    # Calculate positions
-    portfolio_data = get_portfolio_internal(challenge.id)
+    challenge_doc, open_docs, recent_docs = context
     
     return jsonify({
-        'challenge': challenge.to_dict(),
-        'positions': portfolio_data['positions'],
-        'recent_trades': recent_trades
+        'challenge': Challenge(**challenge_doc).to_dict(),
+        'positions': [_position_dict(t_doc) for t_doc in open_docs],
+        'recent_trades': [Trade(**t).to_dict() for t in recent_docs]
     }), 200
 
 @bp.route('/execute', methods=['POST'])
@@ -81,16 +109,15 @@ def execute_trade():
     action = data.get('action', '').lower() 
     quantity = float(data.get('quantity', 0))
     
-    if not symbol or not action or quantity <= 0:
+    if not InstrumentRegistry.is_valid(symbol) or not action or quantity <= 0:
         return jsonify({'error': 'Données de trade invalides'}), 400
     
-    challenge_doc = mongo.db.challenges.find_one(
-        {'user_id': user_id},
-        sort=[('created_at', -1)]
-    )
-    if not challenge_doc:
+    # Round trip 1: challenge, open orders and recent trades together
+    # (round trip 2 is the transaction reserving the margin and inserting the order)
+    context = load_trading_context(user_id)
+    if not context:
         return jsonify({'error': 'Aucun challenge trouvé. Veuillez en choisir un.'}), 404
-    
+    challenge_doc, open_docs, recent_docs = context
     challenge = Challenge(**challenge_doc)
         
     # Allow trading if active or passed (to keep trading after winning)
@@ -105,44 +132,24 @@ def execute_trade():
     if not is_open:
         return jsonify({'error': f'Marché fermé pour {symbol}. {market_msg}.'}), 400
 
-    price_data = MarketDataService.get_realtime_price(symbol)
+    # One batch quote for the traded symbol and every open position
+    book = PositionBook(open_docs)
+    quotes = MarketDataService.get_batch_prices(book.symbols.tolist() + [symbol])
+    price_data = quotes.get(symbol)
     if not price_data or price_data.get('price') == 0:
         return jsonify({'error': 'Impossible de récupérer le prix actuel'}), 400
     
     current_price = price_data['price']
     
-    # LOT LOGIC
-    lot_multiplier = 1.0
-    if '=X' in symbol: lot_multiplier = 100000.0
-    elif '.CS' in symbol or symbol in ['AAPL', 'TSLA', 'GOOGL', 'MSFT']: lot_multiplier = 10.0
-    
-    quantity_units = quantity * lot_multiplier
+    # LOT & LEVERAGE LOGIC (per instrument)
+    instrument = InstrumentRegistry.get(symbol)
+    quantity_units = quantity * instrument.lot_multiplier
     trade_value = current_price * quantity_units
-    
-    # LEVERAGE LOGIC: 1:100
-    leverage = 100.0
-    required_margin = trade_value / leverage
-
-    # BUYING POWER
-    portfolio_pre = get_portfolio_internal(challenge.id)
-    open_pl = 0
-    for pos in portfolio_pre['positions']:
-        p_data = MarketDataService.get_realtime_price(pos['symbol'])
-        if p_data:
-            curl_p = p_data['price']
-            if pos['action'] == 'buy':
-                open_pl += (curl_p - pos['price']) * pos['quantity']
-            else:
-                open_pl += (pos['price'] - curl_p) * pos['quantity']
-            
-    buying_power = challenge.current_equity + open_pl
+    required_margin = trade_value / instrument.leverage
 
-    if required_margin > buying_power:
-        return jsonify({
-            'error': f'Marge insuffisante ($ {required_margin:.2f} requis, équité $ {buying_power:.2f})',
-            'required_margin': required_margin,
-            'buying_power': buying_power
-        }), 400
+    # BUYING POWER (marked with the quotes fetched above): the margin of every
+    # open order plus this one must fit in the equity
+    valuation = ValuationEngine.value(book, challenge.current_equity, quotes=quotes)
     
     # Create Trade
     trade = Trade(
@@ -157,27 +164,33 @@ def execute_trade():
     try:
         trade_dict = trade.to_dict()
         if 'id' in trade_dict: del trade_dict['id']
-        trade_dict['timestamp'] = datetime.utcnow()
-        result = mongo.db.trades.insert_one(trade_dict)
-        trade.id = str(result.inserted_id)
+        trade_dict['timestamp'] = trade.timestamp = datetime.utcnow()
+        trade_dict['margin'] = required_margin  # released when the order closes
+        # Round trip 2: margin reservation and order, committed together
+        reserved_doc = ValuationEngine.place_order(challenge.id, trade_dict, valuation['floating_pl'])
+        if reserved_doc is None:
+            # Refused (or the challenge stopped trading meanwhile): reported from the loaded state
+            buying_power = challenge.current_equity + valuation['floating_pl'] - challenge.reserved_margin
+            return jsonify({
+                'error': f'Marge insuffisante ($ {required_margin:.2f} requis, disponible $ {buying_power:.2f})',
+                'required_margin': required_margin,
+                'buying_power': buying_power
+            }), 400
+        challenge = Challenge(**reserved_doc)
+        trade.id = str(trade_dict['_id'])
         
-        # Background verification
-        app_obj = current_app._get_current_object()
-        def bg_tasks(cid):
-            with app_obj.app_context():
-                ChallengeEngine.verify_challenge_rules(cid)
-        threading.Thread(target=bg_tasks, args=(challenge.id,)).start()
+        # Background verification (coalesced per challenge)
+        VerificationQueue.submit(challenge.id)
         
-        # Return state
-        updated_portfolio = get_portfolio_internal(challenge.id)
-        recent_trades_cursor = mongo.db.trades.find({'challenge_id': challenge.id}).sort('timestamp', -1).limit(10)
-        recent_trades = [Trade(**t).to_dict() for t in recent_trades_cursor]
+        # Return state from what is already in memory (newest first)
+        positions = [_position_dict(trade_dict)] + [_position_dict(t_doc) for t_doc in open_docs]
+        recent_trades = [trade.to_dict()] + [Trade(**t).to_dict() for t in recent_docs[:RECENT_TRADES_LIMIT - 1]]
 
         return jsonify({
             'message': 'Trade exécuté',
             'trade': trade.to_dict(),
             'challenge': challenge.to_dict(),
-            'positions': updated_portfolio['positions'],
+            'positions': positions,
             'recent_trades': recent_trades,
             'status': 'success'
         }), 201
@@ -186,6 +199,26 @@ def execute_trade():
         return jsonify({'error': f'Erreur lors du trade: {str(e)}'}), 500
 
 
+def _state_after_liquidation(context, book, liquidation):
+    """Challenge, positions and recent trades after a liquidation, patched in memory"""
+    challenge_doc, open_docs, recent_docs = context
+    fills = {oid: (float(mark), float(pl)) for oid, mark, pl in zip(book.ids, liquidation['marks'], liquidation['pl'])}
+    closed = set(liquidation['closed'])
+    flattened = set(book.ids)
+
+    recent_trades = []
+    for t_doc in recent_docs:
+        if t_doc['_id'] in closed:
+            close_price, pl = fills[t_doc['_id']]
+            t_doc = dict(t_doc, is_open=False, close_price=close_price, profit_loss=pl)
+        recent_trades.append(Trade(**t_doc).to_dict())
+
+    return {
+        'challenge': Challenge(**(liquidation['challenge'] or challenge_doc)).to_dict(),
+        'positions': [_position_dict(t_doc) for t_doc in open_docs if t_doc['_id'] not in flattened],
+        'recent_trades': recent_trades
+    }
+
 @bp.route('/close', methods=['POST'])
 @jwt_required()
 def close_position():
@@ -197,56 +230,58 @@ def close_position():
     if not trade_id:
         return jsonify({'error': 'ID de transaction requis'}), 400
         
-    challenge_doc = mongo.db.challenges.find_one({'user_id': user_id}, sort=[('created_at', -1)])
-    if not challenge_doc:
+    context = load_trading_context(user_id)
+    if not context:
         return jsonify({'error': 'Aucun challenge trouvé'}), 404
-    challenge = Challenge(**challenge_doc)
+    challenge = Challenge(**context[0])
 
-    trade_doc = mongo.db.trades.find_one({'_id': ObjectId(trade_id), 'challenge_id': challenge.id, 'is_open': True})
-    if not trade_doc:
+    target = [t_doc for t_doc in context[1] if str(t_doc['_id']) == trade_id]
+    if not target:
         return jsonify({'error': 'Position non trouvée'}), 404
-    trade = Trade(**trade_doc)
+    symbol = target[0]['symbol']
         
-    price_data = MarketDataService.get_realtime_price(trade.symbol)
-    if not price_data:
+    quotes = MarketDataService.get_batch_prices([symbol])
+    if not quotes.get(symbol):
         return jsonify({'error': 'Impossible de récupérer le prix actuel'}), 400
-    current_price = price_data['price']
     
-    # Calculate P/L
-    if trade.action.lower() == 'buy':
-        pl = (current_price - trade.price) * trade.quantity
-    else:
-        pl = (trade.price - current_price) * trade.quantity
+    # Close with the P/L applied as an atomic $inc
+    book = PositionBook(target)
+    liquidation = ValuationEngine.liquidate(challenge.id, book, ValuationEngine.marks(book, quotes))
+    if not liquidation['closed']:
+        return jsonify({'error': 'Position non trouvée'}), 404
     
-    # Update balance and close trade
-    new_equity = challenge.current_equity + pl
-    mongo.db.challenges.update_one({'_id': ObjectId(challenge.id)}, {'$set': {'current_equity': new_equity}})
+    VerificationQueue.submit(challenge.id)
+
+    return jsonify({
+        'message': f'Position {symbol} fermée',
+        **_state_after_liquidation(context, book, liquidation),
+        'status': 'success'
+    }), 200
+
+def _close_matching(user_id, symbol=None, side=None):
+    """
+    Flatten the open orders matching symbol/side (all when both are None):
+    one batch quote, one bulk_write and one equity $inc whatever their number
+    """
+    context = load_trading_context(user_id)
+    if not context:
+        return jsonify({'error': 'No active challenge found'}), 404
+    challenge = Challenge(**context[0])
     
-    mongo.db.trades.update_one(
-        {'_id': ObjectId(trade.id)},
-        {'$set': {
-            'is_open': False,
-            'close_price': current_price,
-            'profit_loss': pl
-        }}
-    )
+    book = PositionBook([
+        t_doc for t_doc in context[1]
+        if (symbol is None or t_doc['symbol'] == symbol)
+        and (side is None or t_doc['action'].lower() == side)
+    ])
+    liquidation = ValuationEngine.liquidate(challenge.id, book)
     
-    # Background verification
-    app_obj = current_app._get_current_object()
-    def verify_bg(cid):
-        with app_obj.app_context():
-            ChallengeEngine.verify_challenge_rules(cid)
-    threading.Thread(target=verify_bg, args=(challenge.id,)).start()
+    if liquidation['closed']:
+        VerificationQueue.submit(challenge.id)
     
-    updated_portfolio = get_portfolio_internal(challenge.id)
-    recent_cursor = mongo.db.trades.find({'challenge_id': challenge.id}).sort('timestamp', -1).limit(10)
-    recent_trades = [Trade(**t).to_dict() for t in recent_cursor]
-
     return jsonify({
-        'message': f'Position {trade.symbol} fermée',
-        'challenge': Challenge(**mongo.db.challenges.find_one({'_id': ObjectId(challenge.id)})).to_dict(),
-        'positions': updated_portfolio['positions'],
-        'recent_trades': recent_trades,
+        'message': f"{len(liquidation['closed'])} positions fermées",
+        'total_pl': round(liquidation['realized_pl'], 2),
+        **_state_after_liquidation(context, book, liquidation),
         'status': 'success'
     }), 200
 
@@ -254,77 +289,48 @@ def close_position():
 @jwt_required()
 def close_all_positions():
     """Close all open positions"""
-    user_id = get_jwt_identity()
-    challenge_doc = mongo.db.challenges.find_one({'user_id': user_id}, sort=[('created_at', -1)])
-    if not challenge_doc:
-        return jsonify({'error': 'No active challenge found'}), 404
-    challenge = Challenge(**challenge_doc)
-    
-    open_trades_cursor = mongo.db.trades.find({'challenge_id': challenge.id, 'is_open': True})
-    total_pl = 0
-    closed_count = 0
-    
-    for t_doc in open_trades_cursor:
-        trade = Trade(**t_doc)
-        price_data = MarketDataService.get_realtime_price(trade.symbol)
-        curr_p = price_data['price'] if price_data else trade.price
-        
-        if trade.action.lower() == 'buy':
-            pl = (curr_p - trade.price) * trade.quantity
-        else:
-            pl = (trade.price - curr_p) * trade.quantity
-            
-        mongo.db.trades.update_one(
-            {'_id': ObjectId(trade.id)},
-            {'$set': {'is_open': False, 'close_price': curr_p, 'profit_loss': pl}}
-        )
-        total_pl += pl
-        closed_count += 1
-        
-    new_equity = challenge.current_equity + total_pl
-    mongo.db.challenges.update_one({'_id': ObjectId(challenge.id)}, {'$set': {'current_equity': new_equity}})
-    
-    # Background verify
-    app_obj = current_app._get_current_object()
-    def verify_bg(cid):
-        with app_obj.app_context():
-            ChallengeEngine.verify_challenge_rules(cid)
-    threading.Thread(target=verify_bg, args=(challenge.id,)).start()
+    return _close_matching(get_jwt_identity())
+
+@bp.route('/close-symbol', methods=['POST'])
+@jwt_required()
+def close_symbol_positions():
+    """Close every open position on a symbol, optionally only one side (buy/sell)"""
+    data = request.get_json() or {}
+    symbol = data.get('symbol')
+    side = (data.get('side') or '').lower() or None
     
-    updated_portfolio = get_portfolio_internal(challenge.id)
-    recent_cursor = mongo.db.trades.find({'challenge_id': challenge.id}).sort('timestamp', -1).limit(10)
+    if not InstrumentRegistry.is_valid(symbol) or side not in (None, 'buy', 'sell'):
+        return jsonify({'error': 'Symbole ou sens invalide'}), 400
     
-    return jsonify({
-        'message': f'{closed_count} positions fermées',
-        'total_pl': round(total_pl, 2),
-        'challenge': Challenge(**mongo.db.challenges.find_one({'_id': ObjectId(challenge.id)})).to_dict(),
-        'positions': updated_portfolio['positions'],
-        'recent_trades': [Trade(**t).to_dict() for t in recent_cursor],
-        'status': 'success'
-    }), 200
+    return _close_matching(get_jwt_identity(), symbol, side)
 
 @bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_history():
-    """Get user's trading history"""
+    """
+    Get user's trading history, newest first, one keyset page at a time
+    Query: limit, cursor (next_cursor of the previous page), fields (comma-separated), tag
+    Response: {challenge_id, trades, count, next_cursor}; breaking change from the
+    former unpaged {challenge_id, total_trades, trades} (see README)
+    """
     user_id = get_jwt_identity()
-    challenge_doc = mongo.db.challenges.find_one({'user_id': user_id}, sort=[('created_at', -1)])
+    challenge_doc = mongo.db.challenges.find_one({'user_id': user_id}, sort=[('created_at', -1)], projection={'_id': 1})
     if not challenge_doc:
         return jsonify({'error': 'No active challenge found'}), 404
+    challenge_id = str(challenge_doc['_id'])
     
-    query = {'challenge_id': str(challenge_doc['_id'])}
-    tag_filter = request.args.get('tag')
-    if tag_filter:
-        query['tags'] = tag_filter # MongoDB handles arrays automatically if we use tags as a list
-        
-    trades_cursor = mongo.db.trades.find(query).sort('timestamp', -1)
-    trades = [Trade(**t).to_dict() for t in trades_cursor]
+    try:
+        limit = max(1, min(int(request.args.get('limit', TradeHistory.DEFAULT_LIMIT)), TradeHistory.MAX_LIMIT))
+        fields = TradeHistory.parse_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        if cursor:
+            TradeHistory.decode_cursor(cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'challenge_id': str(challenge_doc['_id']),
-        'total_trades': len(trades),
-        'trades': trades
-    }), 200
+    tag_filter = request.args.get('tag')
+    rows = TradeHistory.stream(challenge_id, fields, cursor=cursor, limit=limit, tag=tag_filter)
+    return Response(stream_with_context(rows), mimetype='application/json')
 
 @bp.route('/performance-analysis', methods=['POST'])
 @jwt_required()
@@ -335,8 +341,8 @@ def get_performance_analysis():
     if not challenge_doc:
         return jsonify({'error': 'No active challenge found'}), 404
     
-    trades_cursor = mongo.db.trades.find({'challenge_id': str(challenge_doc['_id'])})
-    trades = [Trade(**t).to_dict() for t in trades_cursor]
+    # Only the columns the analysis reads
+    trades = TradeHistory.rows(str(challenge_doc['_id']), ANALYSIS_FIELDS)
     
     try:
         analysis = AIService.generate_trade_analysis(
@@ -351,47 +357,18 @@ def get_performance_analysis():
 @bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_trading_stats():
-    """Get detailed trading statistics"""
+    """Get detailed trading statistics (materialized on each close)"""
     user_id = get_jwt_identity()
-    challenge_doc = mongo.db.challenges.find_one({'user_id': user_id}, sort=[('created_at', -1)])
-    if not challenge_doc:
+    docs = list(mongo.db.challenges.aggregate([
+        {'$match': {'user_id': user_id}},
+        {'$sort': {'created_at': -1}},
+        {'$limit': 1},
+        {'$project': {'created_at': 1, 'initial_balance': 1}},
+        {'$lookup': {'from': 'challenge_stats', 'localField': '_id', 'foreignField': '_id', 'as': 'stats'}}
+    ]))
+    if not docs:
         return jsonify({'error': 'No active challenge found'}), 404
     
-    challenge = Challenge(**challenge_doc)
-    trades_cursor = mongo.db.trades.find({'challenge_id': challenge.id}).sort('timestamp', 1)
-    trades = [Trade(**t) for t in trades_cursor]
-    
-    if not trades:
-        return jsonify({'total_trades': 0}), 200
-            
-    # Calculate stats
-    wins = [t for t in trades if t.profit_loss > 0]
-    losses = [t for t in trades if t.profit_loss <= 0]
-    
-    total_trades = len(trades)
-    win_rate = (len(wins) / total_trades * 100) if total_trades > 0 else 0
-    gross_profit = sum(t.profit_loss for t in wins)
-    gross_loss = abs(sum(t.profit_loss for t in losses))
-    profit_factor = round(gross_profit / gross_loss, 2) if gross_loss > 0 else gross_profit
-    
-    equity_curve = [{'time': int(challenge.created_at.timestamp()), 'value': challenge.initial_balance}]
-    running_balance = challenge.initial_balance
-    daily_pl = {}
-    
-    for t in trades:
-        running_balance += t.profit_loss
-        equity_curve.append({'time': int(t.timestamp.timestamp()), 'value': running_balance})
-        day_str = t.timestamp.strftime('%Y-%m-%d')
-        daily_pl[day_str] = daily_pl.get(day_str, 0) + t.profit_loss
-            
-    daily_pl_list = sorted([{'time': k, 'value': v} for k, v in daily_pl.items()], key=lambda x: x['time'])
-    
-    return jsonify({
-        'total_trades': total_trades,
-        'win_rate': round(win_rate, 2),
-        'profit_factor': profit_factor,
-        'avg_win': round(gross_profit / len(wins), 2) if wins else 0,
-        'avg_loss': round(gross_loss / len(losses), 2) if losses else 0,
-        'equity_curve': equity_curve,
-        'daily_pl': daily_pl_list
-    }), 200
+    challenge_doc = docs[0]
+    challenge_doc['stats'] = challenge_doc['stats'][0] if challenge_doc['stats'] else None
+    return jsonify(ChallengeStats.get(challenge_doc)), 200
@@ -60,16 +60,13 @@ class AIService:
             # Fetch technical analysis (now cached in market_data.py)
             technicals = MarketDataService.get_technical_analysis(symbol)
             
-            # Fetch and filter relevant market news
-            news_items = MarketDataService.get_market_news()
-            relevant_news = []
-            asset_type = "Crypto" if "-USD" in symbol or symbol in ['BTC', 'ETH'] else "Stocks"
-            for n in news_items:
-                # Basic relevance check
-                if symbol.lower() in n['title'].lower() or n['category'] == asset_type or n['category'] == "Economy":
-                    relevant_news.append(f"- {n['title']} ({n['sentiment']})")
+            # Relevant market news (indexed by symbol and category)
+            relevant_news = [
+                f"- {n['title']} ({n['sentiment']})"
+                for n in MarketDataService.get_relevant_news(symbol, limit=3)
+            ]
             
-            news_context = "\nRecent News Influence:\n" + ("\n".join(relevant_news[:3]) if relevant_news else "No specific recent news for this asset.")
+            news_context = "\nRecent News Influence:\n" + ("\n".join(relevant_news) if relevant_news else "No specific recent news for this asset.")
 
             tech_context = ""
             if technicals:
@@ -0,0 +1,296 @@
+"""
+TradeSense AI - Price Alert Engine
+Active alerts in per-symbol sorted threshold arrays, matched on every tick
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import threading
+import time
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.services.instruments import InstrumentRegistry
+
+
+class _SymbolAlerts:
+    """Sorted thresholds of one symbol with their alert ids (parallel lists)"""
+
+    __slots__ = ('above', 'above_ids', 'below', 'below_ids')
+
+    def __init__(self):
+        self.above, self.above_ids = [], []
+        self.below, self.below_ids = [], []
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+    def insert(self, condition, target, alert_id):
+        prices, ids = (self.above, self.above_ids) if condition == 'ABOVE' else (self.below, self.below_ids)
+        index = bisect_right(prices, target)
+        prices.insert(index, target)
+        ids.insert(index, alert_id)
+
+    def remove(self, condition, target, alert_id):
+        prices, ids = (self.above, self.above_ids) if condition == 'ABOVE' else (self.below, self.below_ids)
+        for index in range(bisect_left(prices, target), bisect_right(prices, target)):
+            if ids[index] == alert_id:
+                del prices[index], ids[index]
+                return True
+        return False
+
+    def match(self, price):
+        """
+        Pop the alerts reached by `price`: ABOVE thresholds <= price (a prefix)
+        and BELOW thresholds >= price (a suffix), in O(log n + k)
+        """
+        k = bisect_right(self.above, price)
+        fired = self.above_ids[:k]
+        del self.above[:k], self.above_ids[:k]
+
+        k = bisect_left(self.below, price)
+        fired += self.below_ids[k:]
+        del self.below[k:], self.below_ids[k:]
+        return fired
+
+
+class AlertEngine:
+    """
+    Evaluates every active price alert against the shared tick tape.
+
+    Fired alerts leave the arrays, so after each tick the ABOVE array only
+    holds thresholds above the last price and the BELOW array thresholds
+    below it: a tick fires exactly the alerts crossed between the previous
+    and the new price (plus alerts created already beyond it). Fired alerts
+    are deactivated with one unordered bulk_write and their notifications
+    inserted in one insert_many. Alerts created or deleted through another
+    process are picked up by the periodic reload; changes made in this
+    process while a reload reads the collection are journaled and replayed
+    on top of the new snapshot.
+
+    Watched symbols are read with touch so they keep ticking without a
+    client; symbols missing from the tape are quoted once, which registers
+    them.
+    """
+
+    RELOAD_INTERVAL = 60
+    NOTIFICATION_TYPE = 'price_alert'
+
+    _app = None
+    _thread = None
+    _lock = threading.Lock()
+    _books = {}       # symbol -> _SymbolAlerts
+    _alerts = {}      # alert id -> (user_id, symbol, condition, target_price)
+    _journal = None   # (alert id, alert or None) changes made while a reload reads
+    _loaded_at = 0.0
+    _stats = {'loads': 0, 'ticks': 0, 'fired': 0, 'notifications': 0, 'errors': 0, 'last_match_ms': None}
+
+    @classmethod
+    def configure(cls, app, enabled=True, reload_interval=60):
+        cls._app = app
+        cls.RELOAD_INTERVAL = reload_interval
+        if enabled and cls._thread is None:
+            cls._thread = threading.Thread(target=cls._run, name='alert-engine', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def load(cls, documents):
+        """Rebuild every book from active alert documents (sorted once per side)"""
+        grouped = {}
+        alerts = {}
+        for doc in documents:
+            condition = str(doc.get('condition', '')).upper()
+            if condition not in ('ABOVE', 'BELOW') or doc.get('target_price') is None:
+                continue
+            alert_id = doc['_id']
+            target = float(doc['target_price'])
+            alerts[alert_id] = (str(doc.get('user_id')), doc['symbol'], condition, target)
+            grouped.setdefault(doc['symbol'], []).append((condition, target, alert_id))
+
+        books = {}
+        for symbol, entries in grouped.items():
+            book = books[symbol] = _SymbolAlerts()
+            for condition, prices, ids in (('ABOVE', book.above, book.above_ids), ('BELOW', book.below, book.below_ids)):
+                for _, target, alert_id in sorted(e for e in entries if e[0] == condition):
+                    prices.append(target)
+                    ids.append(alert_id)
+
+        with cls._lock:
+            cls._books, cls._alerts = books, alerts
+            for alert_id, alert in cls._journal or ():
+                if alert:
+                    cls._watch(alert_id, alert)
+                else:
+                    cls._unwatch(alert_id)
+            cls._journal = None
+            cls._loaded_at = time.monotonic()
+        cls._stats['loads'] += 1
+
+    @classmethod
+    def add(cls, alert_doc):
+        """Start watching a newly created alert"""
+        condition = str(alert_doc.get('condition', '')).upper()
+        if condition not in ('ABOVE', 'BELOW'):
+            return
+        alert_id = alert_doc['_id']
+        alert = (str(alert_doc.get('user_id')), alert_doc['symbol'], condition, float(alert_doc['target_price']))
+        with cls._lock:
+            cls._watch(alert_id, alert)
+            if cls._journal is not None:
+                cls._journal.append((alert_id, alert))
+
+    @classmethod
+    def remove(cls, alert_id):
+        """Stop watching an alert (deleted by its owner)"""
+        with cls._lock:
+            cls._unwatch(alert_id)
+            if cls._journal is not None:
+                cls._journal.append((alert_id, None))
+
+    @classmethod
+    def match(cls, prices):
+        """
+        Pop the alerts fired by a price update
+        prices: dict symbol -> price
+        Returns: list of (alert_id, user_id, symbol, condition, target_price, price)
+        """
+        fired = []
+        with cls._lock:
+            for symbol, price in prices.items():
+                book = cls._books.get(symbol)
+                if not book:
+                    continue
+                for alert_id in book.match(price):
+                    alert = cls._alerts.pop(alert_id, None)
+                    if alert:
+                        fired.append((alert_id,) + alert + (price,))
+                        if cls._journal is not None:
+                            cls._journal.append((alert_id, None))
+        return fired
+
+    @classmethod
+    def evaluate(cls, prices):
+        """Match a price update, then deactivate and notify the fired alerts"""
+        started = time.perf_counter()
+        fired = cls.match(prices)
+        cls._stats['last_match_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        cls._stats['ticks'] += 1
+        if fired:
+            cls._persist(fired)
+        return fired
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            watched = len(cls._alerts)
+            symbols = sum(1 for book in cls._books.values() if len(book))
+        return dict(cls._stats, watched=watched, symbols=symbols, running=bool(cls._thread and cls._thread.is_alive()))
+
+    @classmethod
+    def _watch(cls, alert_id, alert):
+        """Insert an alert in its book unless already watched (lock held)"""
+        if alert_id in cls._alerts:
+            return
+        cls._alerts[alert_id] = alert
+        cls._books.setdefault(alert[1], _SymbolAlerts()).insert(alert[2], alert[3], alert_id)
+
+    @classmethod
+    def _unwatch(cls, alert_id):
+        """Drop an alert from its book (lock held)"""
+        alert = cls._alerts.pop(alert_id, None)
+        if alert:
+            cls._books[alert[1]].remove(alert[2], alert[3], alert_id)
+
+    @classmethod
+    def _persist(cls, fired):
+        """Deactivate fired alerts and notify their owners (two round trips)"""
+        from app.extensions import mongo
+
+        now = datetime.utcnow()
+        batch = ObjectId()
+        fired = [
+            alert[:5] + (InstrumentRegistry.get(alert[2]).round_price(alert[5]),)
+            for alert in fired
+        ]
+        writes = [
+            UpdateOne(
+                {'_id': alert_id, 'is_active': True},
+                {'$set': {'is_active': False, 'triggered_at': now, 'triggered_price': price, 'trigger_batch': batch}}
+            )
+            for alert_id, _, _, _, _, price in fired
+        ]
+        if mongo.db.price_alerts.bulk_write(writes, ordered=False).modified_count < len(fired):
+            # Deleted meanwhile or fired by another process: notify only what this batch fired
+            mine = {doc['_id'] for doc in mongo.db.price_alerts.find({'trigger_batch': batch}, {'_id': 1})}
+            fired = [alert for alert in fired if alert[0] in mine]
+
+        if fired:
+            mongo.db.notifications.insert_many([
+                {
+                    'user_id': user_id,
+                    'type': cls.NOTIFICATION_TYPE,
+                    'alert_id': str(alert_id),
+                    'symbol': symbol,
+                    'condition': condition,
+                    'target_price': target,
+                    'price': price,
+                    'message': f"{symbol} {'au-dessus de' if condition == 'ABOVE' else 'en dessous de'} {target} (cours {price})",
+                    'is_read': False,
+                    'created_at': now
+                }
+                for alert_id, user_id, symbol, condition, target, price in fired
+            ], ordered=False)
+        cls._stats['fired'] += len(fired)
+        cls._stats['notifications'] += len(fired)
+
+    @classmethod
+    def _reload(cls):
+        from app.extensions import mongo
+
+        # Journal local changes from before the read until the swap
+        with cls._lock:
+            cls._journal = []
+        try:
+            cursor = mongo.db.price_alerts.find(
+                {'is_active': True}, {'user_id': 1, 'symbol': 1, 'condition': 1, 'target_price': 1}
+            )
+            cls.load(cursor)
+        finally:
+            with cls._lock:
+                cls._journal = None
+
+    @classmethod
+    def _prices(cls, symbols):
+        """Latest price of every watched symbol, quoting those not on the tape yet"""
+        from app.services.market_data import MarketDataService
+        from app.services.tick_producer import TickProducer
+
+        prices = TickProducer.last_prices(symbols, touch=True)
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            quotes = MarketDataService.get_batch_prices(missing)
+            prices.update(
+                (symbol, float(quote['price'])) for symbol, quote in quotes.items() if quote and quote.get('price')
+            )
+        return prices
+
+    @classmethod
+    def _run(cls):
+        from app.services.tick_producer import TickProducer
+
+        tick = 0
+        while True:
+            tick = TickProducer.wait_for_tick(tick, timeout=cls.RELOAD_INTERVAL)
+            try:
+                with cls._app.app_context():
+                    if time.monotonic() - cls._loaded_at >= cls.RELOAD_INTERVAL or not cls._stats['loads']:
+                        cls._reload()
+                    with cls._lock:
+                        symbols = [symbol for symbol, book in cls._books.items() if len(book)]
+                    prices = cls._prices(symbols)
+                    if prices:
+                        cls.evaluate(prices)
+            except Exception as e:
+                cls._stats['errors'] += 1
+                print(f"Alert engine error: {str(e)}")
+                time.sleep(1)
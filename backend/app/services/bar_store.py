@@ -0,0 +1,276 @@
+"""
+TradeSense AI - Columnar OHLCV Bar Store
+Memory-mapped NumPy columns per symbol and interval
+"""
+import numpy as np
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+
+FIELDS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64
+}
+
+
+class BarSeries:
+    """
+    One (symbol, interval) series stored as one .npy memmap per field.
+
+    Bars are kept sorted by time. Appends only write bars newer than the last
+    stored one (the last bar is rewritten while it is still forming) and
+    reads return views into the memmaps, so slicing a period copies nothing.
+    Files left by an earlier process are mapped read-only; the first write
+    copies them into a new generation.
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.length = 0
+        self.capacity = 0
+        self.generation = 0
+        self.fetched_at = 0.0
+        self.coverage_start = None
+        self.columns = {}
+        self._published = ({}, 0)  # (columns, length) read together by view()
+        self._load()
+
+    @property
+    def last_time(self):
+        return int(self.columns['time'][self.length - 1]) if self.length else None
+
+    def view(self, start=None, end=None):
+        """Zero-copy column views for bars with start <= time < end"""
+        columns, length = self._published
+        if not length:
+            return {field: np.empty(0, dtype=dtype) for field, dtype in FIELDS.items()}
+        times = columns['time'][:length]
+        lo = int(np.searchsorted(times, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(times, end, side='left')) if end is not None else length
+        return {field: columns[field][lo:hi] for field in FIELDS}
+
+    def append(self, bars, coverage_start=None, fetched_at=None):
+        """Append bars (dict of arrays sorted by time), skipping those already stored"""
+        with self.lock:
+            times = np.asarray(bars['time'], dtype=np.int64)
+            start = 0
+            length = self.length
+            if length and len(times):
+                last = self.columns['time'][length - 1]
+                start = int(np.searchsorted(times, last, side='left'))
+                if start < len(times) and times[start] == last:
+                    length -= 1  # rewrite the still-forming last bar
+            count = len(times) - start
+            if count > 0:
+                self._reserve(length + count)
+                for field, dtype in FIELDS.items():
+                    self.columns[field][length:length + count] = np.asarray(bars[field], dtype=dtype)[start:]
+                self._publish(self.columns, length + count)
+            if coverage_start is not None and (self.coverage_start is None or coverage_start < self.coverage_start):
+                self.coverage_start = coverage_start
+            self.fetched_at = time.time() if fetched_at is None else fetched_at
+            self._flush()
+
+    def replace(self, bars, coverage_start=None, fetched_at=None):
+        """
+        Replace the whole series (used when a wider period is backfilled)
+        The bars are written to a new generation of files, so views handed
+        out earlier keep reading the bars they were given.
+        """
+        with self.lock:
+            times = np.asarray(bars['time'], dtype=np.int64)
+            columns = self._new_generation(max(len(times), 1))
+            for field, dtype in FIELDS.items():
+                columns[field][:len(times)] = np.asarray(bars[field], dtype=dtype)
+            self.coverage_start = coverage_start
+            self.fetched_at = time.time() if fetched_at is None else fetched_at
+            self._swap(columns, len(times))
+
+    def _reserve(self, size):
+        if size <= self.capacity and self.columns['time'].flags.writeable:
+            return
+        columns = self._new_generation(size)
+        if self.length:
+            for field in FIELDS:
+                columns[field][:self.length] = self.columns[field][:self.length]
+        self._swap(columns, self.length)
+
+    def _new_generation(self, size):
+        """Empty columns in the next generation of files (not published yet)"""
+        capacity = max(self.INITIAL_CAPACITY, self.capacity)
+        while capacity < size:
+            capacity *= 2
+        os.makedirs(self.path, exist_ok=True)
+        return {
+            field: np.lib.format.open_memmap(
+                self._file(field, self.generation + 1), mode='w+', dtype=dtype, shape=(capacity,)
+            )
+            for field, dtype in FIELDS.items()
+        }
+
+    def _swap(self, columns, length):
+        """Publish a new generation; old maps stay valid for concurrent readers"""
+        old_generation = self.generation
+        self.capacity = len(columns['time'])
+        self.generation = old_generation + 1
+        self._publish(columns, length)
+        self._flush()
+        for field in FIELDS:
+            try:
+                os.remove(self._file(field, old_generation))
+            except OSError:
+                pass
+
+    def _publish(self, columns, length):
+        self.columns = columns
+        self.length = length
+        self._published = (columns, length)
+
+    def _flush(self):
+        os.makedirs(self.path, exist_ok=True)
+        for column in self.columns.values():
+            if column.flags.writeable:
+                column.flush()
+        meta = {
+            'length': self.length,
+            'capacity': self.capacity,
+            'generation': self.generation,
+            'fetched_at': self.fetched_at,
+            'coverage_start': self.coverage_start
+        }
+        tmp_path = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, 'meta.json'))
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f:
+                meta = json.load(f)
+            columns = {
+                field: np.load(self._file(field, meta['generation']), mmap_mode='r')
+                for field in FIELDS
+            }
+        except (OSError, ValueError, KeyError):
+            return
+        self._publish(columns, meta['length'])
+        self.capacity = meta['capacity']
+        self.generation = meta['generation']
+        self.fetched_at = meta.get('fetched_at', 0.0)
+        self.coverage_start = meta.get('coverage_start')
+
+    def _file(self, field, generation):
+        return os.path.join(self.path, f'{field}.{generation}.npy')
+
+
+class BarStore:
+    """
+    Registry of memory-mapped bar series
+
+    Every process (gunicorn worker) writes under its own <root>/<pid>
+    directory, so generation swaps and meta.json rewrites never race
+    across processes; directories of dead processes are removed.
+    """
+
+    _root = os.path.join(tempfile.gettempdir(), 'tradesense_bars')
+    _pid = None
+    _series = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, root):
+        with cls._lock:
+            cls._root = root
+            cls._pid = None
+            cls._series = {}
+
+    @classmethod
+    def get(cls, symbol, interval):
+        key = (symbol, interval)
+        if cls._pid != os.getpid():
+            cls._open_process_dir()
+        series = cls._series.get(key)
+        if series is None:
+            with cls._lock:
+                series = cls._series.get(key)
+                if series is None:
+                    safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+                    series = BarSeries(os.path.join(cls._root, str(cls._pid), safe_symbol, interval))
+                    cls._series[key] = series
+        return series
+
+    @classmethod
+    def _open_process_dir(cls):
+        """Start this process's directory (first use or after a fork) and drop dead ones"""
+        with cls._lock:
+            if cls._pid == os.getpid():
+                return
+            cls._pid = os.getpid()
+            cls._series = {}
+            try:
+                entries = os.listdir(cls._root)
+            except OSError:
+                return
+            for entry in entries:
+                if entry.isdigit() and int(entry) != cls._pid and not cls._alive(int(entry)):
+                    shutil.rmtree(os.path.join(cls._root, entry), ignore_errors=True)
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True  # exists, owned by another user
+        return True
+
+    @classmethod
+    def items(cls):
+        """Snapshot of ((symbol, interval), series) for every opened series"""
+        with cls._lock:
+            return list(cls._series.items())
+
+    @staticmethod
+    def from_frame(frame):
+        """Columns from a yfinance history DataFrame, without iterating rows"""
+        frame = frame[frame['Close'].notna()]
+        index = frame.index
+        if getattr(index, 'tz', None) is not None:
+            index = index.tz_convert(None)
+        volume = frame['Volume'].fillna(0).to_numpy() if 'Volume' in frame else np.zeros(len(frame))
+        return {
+            'time': index.to_numpy().astype('datetime64[s]').astype(np.int64),
+            'open': frame['Open'].to_numpy(dtype=np.float64),
+            'high': frame['High'].to_numpy(dtype=np.float64),
+            'low': frame['Low'].to_numpy(dtype=np.float64),
+            'close': frame['Close'].to_numpy(dtype=np.float64),
+            'volume': volume.astype(np.int64)
+        }
+
+    @staticmethod
+    def to_records(columns):
+        """Chart payload (list of dicts) from column views"""
+        return [
+            {'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in zip(
+                columns['time'].tolist(),
+                np.round(columns['open'], 2).tolist(),
+                np.round(columns['high'], 2).tolist(),
+                np.round(columns['low'], 2).tolist(),
+                np.round(columns['close'], 2).tolist(),
+                columns['volume'].tolist()
+            )
+        ]
@@ -0,0 +1,252 @@
+"""
+TradeSense AI - Casablanca Bourse Ingester
+Whole quote board in one conditional request, parsed in a single pass
+"""
+from datetime import datetime
+from lxml import html as lxml_html
+import re
+import requests
+from requests.adapters import HTTPAdapter
+import threading
+import time
+
+
+# Header keywords used to locate columns on the board (lowercase, accents kept).
+# A header matches when its words (units in parentheses and filler words aside)
+# are exactly the keyword's: 'Code' is the ticker column, 'Code ISIN' is not.
+TICKER_HEADERS = ('ticker', 'code', 'symbole')
+NAME_HEADERS = ('instrument', 'valeur', 'libellé', 'libelle', 'nom')
+PRICE_HEADERS = ('dernier cours', 'cours', 'dernier', 'last', 'price')
+CHANGE_HEADERS = ('variation', 'var.', 'var', 'change')
+
+_NUMBER = re.compile(r'[-+]?\d[\d\s  .,]*')
+_WORD = re.compile(r'[^\W\d_]+')
+_UNIT = re.compile(r'\([^)]*\)')
+_FILLER = {'en', 'de', 'du', 'des', 'la', 'le', 'in', 'of'}
+# '1.820' or '12.345.678': dots grouping thousands when there is no decimal comma
+_DOT_THOUSANDS = re.compile(r'[-+]?[1-9]\d{0,2}(\.\d{3})+')
+
+
+def parse_number(text):
+    """French-formatted number ('1 820,50', '+0,45 %') to float, or None"""
+    if not text:
+        return None
+    match = _NUMBER.search(text)
+    if not match:
+        return None
+    value = re.sub(r'[\s  ]', '', match.group())
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    elif _DOT_THOUSANDS.fullmatch(value):
+        value = value.replace('.', '')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _words(text):
+    return tuple(word for word in _WORD.findall(_UNIT.sub(' ', text.lower())) if word not in _FILLER)
+
+
+def _column(headers, keywords):
+    words = [_words(header) for header in headers]
+    for keyword in keywords:
+        wanted = _words(keyword)
+        for index, header in enumerate(words):
+            if header == wanted:
+                return index
+    return None
+
+
+def parse_quote_board(content, names=None):
+    """
+    Parse a BVC quote board page into {'XXX.CS': {...}} in one pass over its rows.
+
+    Columns are found from the header row of each table, so the layout can
+    shift without code changes. Rows without a ticker column are matched on
+    the instrument name through `names` (name -> symbol).
+    """
+    names = {name.lower(): symbol for name, symbol in (names or {}).items()}
+    document = lxml_html.fromstring(content)
+    quotes = {}
+
+    for table in document.iter('table'):
+        columns = None
+        for row in table.iter('tr'):
+            cells = [' '.join(cell.text_content().split()) for cell in row if cell.tag in ('td', 'th')]
+            if not cells:
+                continue
+            if columns is None:
+                headers = [cell.lower() for cell in cells]
+                price = _column(headers, PRICE_HEADERS)
+                if price is None:
+                    break  # not a quote table
+                columns = {
+                    'ticker': _column(headers, TICKER_HEADERS),
+                    'name': _column(headers, NAME_HEADERS),
+                    'price': price,
+                    'change': _column(headers, CHANGE_HEADERS)
+                }
+                continue
+
+            def cell(key):
+                index = columns[key]
+                return cells[index] if index is not None and index < len(cells) else None
+
+            name = cell('name')
+            ticker = cell('ticker')
+            if ticker:
+                symbol = f"{ticker.upper()}.CS"
+            elif name and name.lower() in names:
+                symbol = names[name.lower()]
+            else:
+                continue
+
+            price = parse_number(cell('price'))
+            if not price:
+                continue
+            quotes[symbol] = {
+                'symbol': symbol,
+                'name': name or symbol,
+                'price': round(price, 2),
+                'change_percent': round(parse_number(cell('change')) or 0, 2)
+            }
+    return quotes
+
+
+class BVCIngester:
+    """
+    Pulls the full Casablanca quote board on a schedule and stores every
+    .CS quote in the price cache at once.
+
+    One pooled session is reused, and conditional GET (ETag /
+    If-Modified-Since) turns unchanged boards into 304s with no parsing.
+    Disabled until a board URL is configured; the mock anchors are used then.
+    """
+
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+    _url = None
+    _interval = 60
+    _timeout = 10
+    _session = None
+    _thread = None
+    _lock = threading.Lock()
+    _etag = None
+    _last_modified = None
+    _quotes = {}
+    _stats = {'requests': 0, 'not_modified': 0, 'parsed': 0, 'errors': 0, 'symbols': 0, 'last_update': None}
+
+    @classmethod
+    def configure(cls, url=None, interval=60, timeout=10):
+        cls._url = url or None
+        cls._interval = interval
+        cls._timeout = timeout
+        if cls._url and cls._thread is None:
+            cls._thread = threading.Thread(target=cls._run, name='bvc-ingester', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def enabled(cls):
+        return cls._url is not None
+
+    @classmethod
+    def quote(cls, symbol):
+        """Last ingested board quote for a symbol, or None"""
+        return cls._quotes.get(symbol)
+
+    @classmethod
+    def refresh(cls):
+        """Fetch and ingest the board once; returns the number of symbols updated"""
+        from app.services.upstream import UpstreamFetcher
+
+        if not cls._url:
+            return 0
+        return UpstreamFetcher.call('bvc', cls._fetch_exclusive, timeout=cls._timeout, fallback=0)
+
+    @classmethod
+    def stats(cls):
+        return dict(cls._stats, enabled=cls.enabled())
+
+    @classmethod
+    def _run(cls):
+        from app.services.market_calendar import MarketCalendar
+
+        while True:
+            # Outside the session the board does not move: one pull is enough
+            if not cls._quotes or MarketCalendar.is_exchange_open('BVC', time.time()):
+                cls.refresh()
+            time.sleep(cls._interval)
+
+    @classmethod
+    def _get_session(cls):
+        if cls._session is None:
+            session = requests.Session()
+            session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            session.headers.update({'User-Agent': cls.USER_AGENT, 'Accept-Language': 'fr'})
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def _fetch_exclusive(cls):
+        """
+        Only one board request at a time, whatever triggered it. The lock is
+        taken on the upstream pool, so it spans the real request even when the
+        caller gave up at its deadline.
+        """
+        if not cls._lock.acquire(blocking=False):
+            return 0  # the previous request is still running
+        try:
+            return cls._fetch_and_ingest()
+        finally:
+            cls._lock.release()
+
+    @classmethod
+    def _fetch_and_ingest(cls):
+        headers = {}
+        if cls._etag:
+            headers['If-None-Match'] = cls._etag
+        if cls._last_modified:
+            headers['If-Modified-Since'] = cls._last_modified
+
+        cls._stats['requests'] += 1
+        response = cls._get_session().get(cls._url, headers=headers, timeout=cls._timeout)
+        if response.status_code == 304:
+            cls._stats['not_modified'] += 1
+            return cls._publish(cls._quotes)
+        response.raise_for_status()
+
+        from app.services.market_data import MarketDataService
+        names = {name: symbol for symbol, name in MarketDataService.MOROCCO_SYMBOLS.items()}
+        quotes = parse_quote_board(response.content, names)
+        if not quotes:
+            cls._stats['errors'] += 1
+            raise ValueError('BVC board has no recognizable quote rows')
+
+        cls._etag = response.headers.get('ETag')
+        cls._last_modified = response.headers.get('Last-Modified')
+        cls._stats['parsed'] += 1
+        cls._quotes = quotes
+        return cls._publish(quotes)
+
+    @classmethod
+    def _publish(cls, quotes):
+        """Store every board quote in the price cache and re-anchor ticking symbols"""
+        from app.services.market_data import MarketDataService
+        from app.services.tick_producer import TickProducer
+
+        timestamp = datetime.utcnow().isoformat()
+        seeds = {
+            symbol: dict(quote, timestamp=timestamp, market='Morocco BVC')
+            for symbol, quote in quotes.items()
+        }
+        MarketDataService._price_cache.set_many(seeds)
+        ticking = TickProducer.latest_many(list(seeds), touch=False)
+        if ticking:
+            TickProducer.activate({symbol: seeds[symbol] for symbol in ticking}, touch=False)
+
+        cls._stats['symbols'] = len(seeds)
+        cls._stats['last_update'] = timestamp
+        return len(seeds)
@@ -5,8 +5,10 @@ Core logic for verifying challenge rules and managing trader progress
 from datetime import datetime, timedelta
 from app.extensions import mongo
 from app.models import Challenge, Trade
+from app.services.stats_queries import StatsQueries
 from bson import ObjectId
 from flask import current_app
+import numpy as np
 
 class ChallengeEngine:
     """Engine to verify and enforce challenge rules"""
@@ -15,7 +17,14 @@ class ChallengeEngine:
     def verify_challenge_rules(cls, challenge_id):
         """
         Verify all rules for a specific challenge
+        A failed challenge is claimed first (status-guarded write), then
+        stopped out: its open positions are flattened. Only the caller whose
+        claim matched liquidates, so this check, the sweep and a second
+        request never close the same positions twice, and no order can open
+        once the status has flipped.
         """
+        from app.services.valuation import PositionBook, ValuationEngine
+
         challenge_doc = mongo.db.challenges.find_one({'_id': ObjectId(challenge_id)})
         
         if not challenge_doc:
@@ -30,18 +39,26 @@ class ChallengeEngine:
         max_total_loss = challenge.max_total_loss_percent
         profit_target = challenge.profit_target_percent
         
+        # Positions are marked to market once for every rule (and the stop-out)
+        book = PositionBook.load(challenge.id)
+        valuation = ValuationEngine.value(book, challenge.current_equity)
+        current_nlv = valuation['nlv']
+        
         # Rule 1: Check Daily Loss (Funded only)
         if challenge.plan_type == 'funded':
-             daily_check = cls._check_daily_loss(challenge, max_daily_loss)
+             daily_check = cls._check_daily_loss(challenge, max_daily_loss, current_nlv)
              if daily_check['violated']:
-                 cls._mark_failed(challenge.id, f'Daily loss limit exceeded ({daily_check["loss_percent"]:.2f}%)')
+                 reason = f'Daily loss limit exceeded ({daily_check["loss_percent"]:.2f}%)'
+                 if not cls._mark_failed(challenge.id, reason):
+                     return {'status': 'skipped', 'reason': 'Challenge updated concurrently'}
+                 cls._stop_out(challenge.id, book, valuation['marks'])
                  return {
                      'status': 'failed',
                      'reason': f'Daily loss limit exceeded ({daily_check["loss_percent"]:.2f}%)'
                  }
         
         # Rule 2: Check Total Loss
-        total_loss_check = cls._check_total_loss(challenge, max_total_loss)
+        total_loss_check = cls._check_total_loss(challenge, max_total_loss, current_nlv)
         is_blown = challenge.current_equity <= 1.0
         limit_violated = total_loss_check['violated']
         
@@ -49,7 +66,9 @@ class ChallengeEngine:
         
         if should_fail_total:
             reason = f'Account blown' if is_blown else f'Total loss limit exceeded ({total_loss_check["loss_percent"]:.2f}%)'
-            cls._mark_failed(challenge.id, reason)
+            if not cls._mark_failed(challenge.id, reason):
+                return {'status': 'skipped', 'reason': 'Challenge updated concurrently'}
+            cls._stop_out(challenge.id, book, valuation['marks'])
             return {'status': 'failed', 'reason': reason}
         
         # Rule 3: Check Profit Target
@@ -63,21 +82,42 @@ class ChallengeEngine:
             'current_equity': challenge.current_equity
         }
 
+    @classmethod
+    def _stop_out(cls, challenge_id, book, marks):
+        """
+        Flatten every open position of a claimed challenge at the marks the
+        rules were checked with (orders opened before the claim landed are
+        reloaded and marked at their current quote)
+        """
+        from app.services.valuation import PositionBook, ValuationEngine
+
+        held = PositionBook.load(challenge_id)
+        if held.ids != book.ids:
+            checked = dict(zip(book.ids, marks))
+            fresh = ValuationEngine.marks(held)
+            marks = np.array([checked.get(oid, mark) for oid, mark in zip(held.ids, fresh)], dtype=np.float64)
+            book = held
+        if len(book):
+            liquidation = ValuationEngine.liquidate(challenge_id, book, marks)
+            print(f"Stop-out {challenge_id}: {len(liquidation['closed'])} positions, P/L {liquidation['realized_pl']:.2f}")
+
     @classmethod
     def _mark_failed(cls, challenge_id, reason):
-        mongo.db.challenges.update_one(
-            {'_id': ObjectId(challenge_id)},
+        """Claim the failure; False when another caller changed the status first"""
+        result = mongo.db.challenges.update_one(
+            {'_id': ObjectId(challenge_id), 'status': {'$in': ['active', 'passed']}},
             {'$set': {
                 'status': 'failed',
                 'failure_reason': reason,
                 'completed_at': datetime.utcnow()
             }}
         )
+        return result.modified_count == 1
 
     @classmethod
     def _mark_passed(cls, challenge_id, reason):
         mongo.db.challenges.update_one(
-            {'_id': ObjectId(challenge_id)},
+            {'_id': ObjectId(challenge_id), 'status': 'active'},
             {'$set': {
                 'status': 'passed',
                 'completed_at': datetime.utcnow()
@@ -85,21 +125,15 @@ class ChallengeEngine:
         )
 
     @classmethod
-    def _check_daily_loss(cls, challenge, max_daily_loss_percent):
+    def _check_daily_loss(cls, challenge, max_daily_loss_percent, current_nlv=None):
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         yesterday_end = today_start - timedelta(seconds=1)
         
-        last_trade_yesterday = mongo.db.trades.find_one(
-            {'challenge_id': challenge.id, 'timestamp': {'$lte': yesterday_end}},
-            sort=[('timestamp', -1)]
-        )
-        
-        if last_trade_yesterday:
-            start_of_day_equity = cls._calculate_equity_at_trade(challenge, last_trade_yesterday['_id'])
-        else:
-            start_of_day_equity = challenge.initial_balance
+        # Equity at the last trade before today = initial balance + P/L realized until then
+        start_of_day_equity = challenge.initial_balance + StatsQueries.realized_pl(challenge.id, until=yesterday_end)
         
-        current_nlv = cls._calculate_current_nlv(challenge)
+        if current_nlv is None:
+            current_nlv = cls._calculate_current_nlv(challenge)
         
         if start_of_day_equity <= 0:
             return {'violated': False, 'loss_percent': 0}
@@ -111,9 +145,10 @@ class ChallengeEngine:
         }
 
     @classmethod
-    def _check_total_loss(cls, challenge, max_total_loss_percent):
+    def _check_total_loss(cls, challenge, max_total_loss_percent, current_nlv=None):
         initial = challenge.initial_balance
-        current_nlv = cls._calculate_current_nlv(challenge)
+        if current_nlv is None:
+            current_nlv = cls._calculate_current_nlv(challenge)
         if initial <= 0: return {'violated': False, 'loss_percent': 0}
         total_loss_percent = ((initial - current_nlv) / initial) * 100
         return {
@@ -129,51 +164,16 @@ class ChallengeEngine:
             'profit_percent': profit_percent
         }
 
-    @classmethod
-    def _calculate_equity_at_trade(cls, challenge, trade_oid):
-        # In Mongo, we can compare ObjectIds for temporal order if they are created sequentially,
-        # but better to use timestamp or a sequence if available.
-        # Here we'll use timestamp of the target trade.
-        target_trade = mongo.db.trades.find_one({'_id': ObjectId(trade_oid)})
-        if not target_trade: return challenge.initial_balance
-        
-        trades_cursor = mongo.db.trades.find({
-            'challenge_id': challenge.id,
-            'timestamp': {'$lte': target_trade['timestamp']}
-        })
-        
-        equity = challenge.initial_balance
-        for t in trades_cursor:
-            equity += t.get('profit_loss', 0)
-        return equity
-
     @classmethod
     def _calculate_current_nlv(cls, challenge):
-        cash = challenge.current_equity
-        open_trades_cursor = mongo.db.trades.find({'challenge_id': challenge.id, 'is_open': True})
-        
-        floating_pl = 0
-        from app.services.market_data import MarketDataService
-        for t_doc in open_trades_cursor:
-            price_data = MarketDataService.get_realtime_price(t_doc['symbol'])
-            if price_data:
-                curr_p = price_data['price']
-                if t_doc['action'] == 'buy':
-                    floating_pl += (curr_p - t_doc['price']) * t_doc['quantity']
-                else:
-                    floating_pl += (t_doc['price'] - curr_p) * t_doc['quantity']
-        return cash + floating_pl
+        from app.services.valuation import ValuationEngine
+        return ValuationEngine.challenge_nlv(challenge)
 
 
 def verify_all_active_challenges():
-    """Background task for all active challenges"""
-    from app import create_app
-    app = create_app()
-    with app.app_context():
-        # Monitor both active and passed challenges (to catch drawdowns after passing)
-        active_cursor = mongo.db.challenges.find({'status': {'$in': ['active', 'passed']}})
-        for challenge_doc in active_cursor:
-            try:
-                ChallengeEngine.verify_challenge_rules(str(challenge_doc['_id']))
-            except Exception as e:
-                print(f"Error verifying {challenge_doc['_id']}: {e}")
+    """
+    Verify every active and passed challenge in one set-based sweep
+    (needs an app context; the scheduled job is ChallengeSweep's)
+    """
+    from app.services.challenge_sweep import ChallengeSweep
+    return ChallengeSweep.run()
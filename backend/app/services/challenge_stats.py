@@ -0,0 +1,237 @@
+"""
+TradeSense AI - Challenge Statistics
+Materialized per-challenge trading stats, updated on every close
+"""
+from datetime import datetime, timezone
+
+from bson import ObjectId
+import numpy as np
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.extensions import mongo
+
+
+def lttb(points, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of [(time, value), ...].
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with its neighbours, so peaks and drawdowns survive.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return [list(p) for p in points]
+
+    data = np.asarray(points, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        following = data[end:edges[i + 2]] if i + 2 < len(edges) else data[n - 1:]
+        avg_t, avg_v = following.mean(axis=0)
+        bucket = data[start:end]
+        areas = np.abs(
+            (data[a, 0] - avg_t) * (bucket[:, 1] - data[a, 1])
+            - (data[a, 0] - bucket[:, 0]) * (avg_v - data[a, 1])
+        )
+        a = start + int(areas.argmax())
+        selected.append(a)
+    selected.append(n - 1)
+    return [[int(points[i][0]), points[i][1]] for i in selected]
+
+
+def _epoch(dt):
+    return int(dt.replace(tzinfo=timezone.utc).timestamp()) if isinstance(dt, datetime) else int(dt)
+
+
+class ChallengeStats:
+    """
+    One `challenge_stats` document per challenge (same _id), maintained with
+    $inc/$push when positions close:
+
+        trade_count, wins, losses, gross_profit, gross_loss,
+        daily_pl: {'YYYY-MM-DD' of the close: realized P/L},
+        equity_curve: [[epoch seconds, equity after the close], ...] (one point per liquidation)
+
+    The equity curve is kept under 2 x CURVE_POINTS by LTTB-compacting it
+    back to CURVE_POINTS, so reading the stats is one bounded document
+    whatever the trade count.
+
+    Every close is counted by its own upsert $inc, so concurrent first
+    closes add up instead of overwriting each other. Liquidations mark
+    the orders they close `stats_tracked`; orders closed before that are
+    folded in once, by a single $inc guarded on `backfilled: False`.
+    """
+
+    CURVE_POINTS = 500
+
+    @classmethod
+    def configure(cls, curve_points=500):
+        cls.CURVE_POINTS = max(3, curve_points)
+
+    @classmethod
+    def record_closes(cls, challenge_id, pl, equity, closed_at=None):
+        """Fold realized P/L values closed together (one liquidation) into the stats"""
+        if not len(pl):
+            return
+        closed_at = closed_at or datetime.utcnow()
+        pl = np.asarray(pl, dtype=np.float64)
+        wins = pl > 0
+        update = {
+            '$inc': {
+                'trade_count': int(pl.size),
+                'wins': int(wins.sum()),
+                'losses': int((~wins).sum()),
+                'gross_profit': float(pl[wins].sum()),
+                'gross_loss': float(-pl[~wins].sum()),
+                f"daily_pl.{closed_at.strftime('%Y-%m-%d')}": float(pl.sum()),
+                'curve_size': 1
+            },
+            '$push': {'equity_curve': [_epoch(closed_at), round(float(equity), 2)]},
+            '$set': {'updated_at': closed_at}
+        }
+        update['$inc']['version'] = 1
+        update['$setOnInsert'] = {'backfilled': False}
+        doc = cls._upsert(challenge_id, update, {'curve_size': 1, 'backfilled': 1})
+        if doc.get('backfilled') is False:
+            # First close tracked for this challenge: fold in its older closes
+            doc = cls._backfill(challenge_id) or doc
+        if doc['curve_size'] > 2 * cls.CURVE_POINTS:
+            cls._compact(challenge_id, doc['curve_size'])
+
+    @classmethod
+    def get(cls, challenge_doc):
+        """API payload for a challenge document carrying its stats (or None)"""
+        stats = challenge_doc.get('stats')
+        if stats is None or stats.get('backfilled') is False:
+            stats = cls.ensure(str(challenge_doc['_id']))
+        if not stats.get('trade_count'):
+            return {'total_trades': 0}
+
+        total = stats['trade_count']
+        wins, losses = stats['wins'], stats['losses']
+        gross_profit, gross_loss = stats['gross_profit'], stats['gross_loss']
+
+        # Start at the initial balance; one point per second (last one wins)
+        curve = {_epoch(challenge_doc['created_at']): challenge_doc['initial_balance']}
+        for t, value in stats.get('equity_curve', []):
+            curve[int(t)] = value
+
+        return {
+            'total_trades': total,
+            'win_rate': round(wins / total * 100, 2),
+            'profit_factor': round(gross_profit / gross_loss, 2) if gross_loss > 0 else round(gross_profit, 2),
+            'avg_win': round(gross_profit / wins, 2) if wins else 0,
+            'avg_loss': round(gross_loss / losses, 2) if losses else 0,
+            'net_profit': round(gross_profit - gross_loss, 2),
+            'equity_curve': [{'time': t, 'value': v} for t, v in sorted(curve.items())],
+            'daily_pl': [{'time': day, 'value': round(v, 2)} for day, v in sorted(stats.get('daily_pl', {}).items())]
+        }
+
+    @classmethod
+    def ensure(cls, challenge_id):
+        """Stats document of a challenge, created from its closed trades if missing"""
+        doc = cls._upsert(challenge_id, {'$setOnInsert': {'backfilled': False}})
+        if doc.get('backfilled') is False:
+            doc = cls._backfill(challenge_id) or mongo.db.challenge_stats.find_one({'_id': ObjectId(challenge_id)})
+        return doc
+
+    @classmethod
+    def rebuild(cls, challenge_id, attempts=3):
+        """
+        Recompute the stats document from all the challenge's closed trades
+        (repair tool). Counters, daily P/L and one curve point per liquidation
+        come from one aggregation, dated by close time like record_closes, so
+        a rebuilt document matches the incrementally maintained one. The
+        replace is guarded by `version` (bumped by every close) and retried
+        when a close lands meanwhile.
+        Returns: the stats document, or None if closes kept racing it
+        """
+        for _ in range(attempts):
+            current = mongo.db.challenge_stats.find_one({'_id': ObjectId(challenge_id)}, {'version': 1})
+            version = (current or {}).get('version', 0)
+            stats = cls._summarize(challenge_id)
+            stats.update(version=version + 1, backfilled=True, updated_at=datetime.utcnow())
+            try:
+                if current is None:
+                    mongo.db.challenge_stats.insert_one(dict(stats, _id=ObjectId(challenge_id)))
+                    return stats
+                guard = {'_id': ObjectId(challenge_id), 'version': current.get('version')}
+                if mongo.db.challenge_stats.replace_one(guard, stats).matched_count:
+                    return stats
+            except DuplicateKeyError:
+                pass
+        return None
+
+    @classmethod
+    def _summarize(cls, challenge_id, untracked_only=False):
+        """Stats fields computed from closed trades (one aggregation)"""
+        from app.services.stats_queries import StatsQueries
+
+        challenge = mongo.db.challenges.find_one({'_id': ObjectId(challenge_id)}, {'initial_balance': 1})
+        summary = StatsQueries.trade_summary(challenge_id, untracked_only=untracked_only)
+
+        balance = (challenge or {}).get('initial_balance', 0.0)
+        curve = []
+        for closed_at, pl in summary['closes']:
+            balance += pl
+            curve.append([_epoch(closed_at), round(balance, 2)])
+        curve = lttb(curve, cls.CURVE_POINTS)
+        return {
+            'trade_count': summary['trade_count'],
+            'wins': summary['wins'],
+            'losses': summary['losses'],
+            'gross_profit': summary['gross_profit'],
+            'gross_loss': summary['gross_loss'],
+            'daily_pl': dict(summary['daily']),
+            'equity_curve': curve,
+            'curve_size': len(curve)
+        }
+
+    @classmethod
+    def _backfill(cls, challenge_id):
+        """
+        Fold closes that predate stats tracking into the document, once:
+        they no longer change, and the guard lets a single caller apply them
+        Returns: the updated document, or None if another caller did it
+        """
+        older = cls._summarize(challenge_id, untracked_only=True)
+        increments = {
+            field: older[field] for field in ('trade_count', 'wins', 'losses', 'gross_profit', 'gross_loss', 'curve_size')
+        }
+        increments.update({f'daily_pl.{day}': pl for day, pl in older['daily_pl'].items()})
+        increments['version'] = 1
+        update = {'$set': {'backfilled': True}, '$inc': increments}
+        if older['equity_curve']:
+            # Older closes come first on the curve
+            update['$push'] = {'equity_curve': {'$each': older['equity_curve'], '$position': 0}}
+        return mongo.db.challenge_stats.find_one_and_update(
+            {'_id': ObjectId(challenge_id), 'backfilled': False}, update, return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    def _upsert(cls, challenge_id, update, projection=None):
+        """find_one_and_update with upsert, retried once when a concurrent upsert wins the insert"""
+        for attempt in range(2):
+            try:
+                return mongo.db.challenge_stats.find_one_and_update(
+                    {'_id': ObjectId(challenge_id)}, update, projection=projection,
+                    upsert=True, return_document=ReturnDocument.AFTER
+                )
+            except DuplicateKeyError:
+                if attempt:
+                    raise
+
+    @classmethod
+    def _compact(cls, challenge_id, size):
+        """Downsample the stored curve back to CURVE_POINTS"""
+        doc = mongo.db.challenge_stats.find_one({'_id': ObjectId(challenge_id)}, {'equity_curve': 1, 'curve_size': 1})
+        if not doc or doc.get('curve_size') != size:
+            return  # Another close got in first; the next one compacts
+        curve = lttb(doc['equity_curve'], cls.CURVE_POINTS)
+        mongo.db.challenge_stats.update_one(
+            {'_id': doc['_id'], 'curve_size': size},
+            {'$set': {'equity_curve': curve, 'curve_size': len(curve)}}
+        )
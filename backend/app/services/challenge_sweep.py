@@ -0,0 +1,300 @@
+"""
+TradeSense AI - Challenge Sweep
+Set-based verification of every monitored challenge in constant round trips
+"""
+from datetime import datetime, timedelta
+import os
+import socket
+import time
+
+from bson import ObjectId
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.extensions import mongo
+from app.services.stats_queries import StatsQueries
+from app.services.valuation import PositionBook, ValuationEngine
+
+
+class ChallengeSweep:
+    """
+    Verifies the rules of all active and passed challenges at once:
+
+        1. one projected query for the challenges,
+        2. one query for all their open positions,
+        3. one aggregation for the start-of-day equity of funded challenges,
+        4. one batch quote for every distinct symbol,
+
+    then daily loss, total loss and profit target are evaluated as array
+    expressions over all accounts (same rules as ChallengeEngine) and the
+    status changes are written with one unordered bulk_write, each guarded
+    by the status the sweep read. Only the challenges whose failure this
+    sweep wrote are then stopped out, one liquidation each.
+
+    Every process schedules the job, but a run starts only after taking
+    the lease document in `locks`, so one instance sweeps at a time.
+
+    The sweep also reconciles reserved_margin with the margin of the open
+    orders it loaded. A drift is only corrected once two consecutive sweeps
+    saw it unchanged (an order being placed is never mistaken for a leak),
+    with the write guarded by the value that was read.
+    """
+
+    INTERVAL = 60  # seconds between scheduled sweeps
+    MONITORED = ['active', 'passed']
+    LEASE_ID = 'challenge_sweep'
+
+    PROJECTION = {
+        'status': 1, 'plan_type': 1, 'initial_balance': 1, 'current_equity': 1, 'reserved_margin': 1,
+        'max_daily_loss_percent': 1, 'max_total_loss_percent': 1, 'profit_target_percent': 1
+    }
+    # Same defaults as the Challenge model
+    DEFAULTS = {
+        'plan_type': 'starter', 'initial_balance': 5000.0, 'current_equity': 5000.0,
+        'max_daily_loss_percent': 5.0, 'max_total_loss_percent': 10.0, 'profit_target_percent': 10.0
+    }
+
+    _app = None
+    _owner = f'{socket.gethostname()}:{os.getpid()}'
+    _margin_drift = {}  # challenge id -> (reserved_margin read, margin of its open orders)
+    _stats = {'runs': 0, 'skipped': 0, 'errors': 0, 'last_run': None, 'last': None, 'max_duration_ms': 0.0}
+
+    @classmethod
+    def configure(cls, app, interval=60):
+        """Schedule the sweep every `interval` seconds (0 disables it)"""
+        from app.extensions import scheduler
+
+        cls._app = app
+        cls.INTERVAL = interval
+        if interval <= 0:
+            return
+        try:
+            scheduler.add_job(
+                id='verify_challenges',
+                func=cls._job,
+                trigger='interval',
+                seconds=interval,
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+            if not scheduler.running:
+                scheduler.start()
+        except Exception as e:
+            print(f"WARNING: Scheduler failed to start: {e}")
+
+    @classmethod
+    def run(cls, now=None):
+        """
+        One sweep (needs an app context)
+        Returns: dict with counts, the failed/passed challenge ids and per-phase timings
+        """
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        timings = {}
+
+        challenges = list(mongo.db.challenges.find({'status': {'$in': cls.MONITORED}}, cls.PROJECTION))
+        ids = [str(doc['_id']) for doc in challenges]
+        row = {cid: i for i, cid in enumerate(ids)}
+        positions = list(mongo.db.trades.find(
+            {'challenge_id': {'$in': ids}, 'is_open': True}, dict(PositionBook.PROJECTION, challenge_id=1)
+        )) if ids else []
+        positions = [doc for doc in positions if doc['challenge_id'] in row]
+        owner = np.array([row[doc['challenge_id']] for doc in positions], dtype=np.intp)
+
+        accounts = cls._columns(challenges)
+        funded_ids = [cid for cid, funded in zip(ids, accounts['funded']) if funded]
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        realized = StatsQueries.realized_pl_by_challenge(funded_ids, until=today_start - timedelta(seconds=1))
+        start_of_day = np.where(
+            accounts['funded'],
+            accounts['initial'] + np.array([realized.get(cid, 0.0) for cid in ids], dtype=np.float64),
+            0.0
+        )
+        timings['load_ms'] = cls._elapsed(started)
+
+        book = PositionBook(positions)
+        marks = ValuationEngine.marks(book)
+        timings['price_ms'] = cls._elapsed(started) - timings['load_ms']
+
+        pl = ValuationEngine.value(book, 0.0, marks)['pl']
+        nlv = accounts['cash'] + np.bincount(owner, weights=pl, minlength=len(ids))
+        verdict = cls.evaluate(accounts, nlv, start_of_day)
+        timings['evaluate_ms'] = cls._elapsed(started) - timings['load_ms'] - timings['price_ms']
+
+        failed = np.flatnonzero(verdict['failed'])
+        passed = np.flatnonzero(verdict['passed'] & (accounts['status'] == 'active'))
+
+        # Claim the transitions first: a challenge closed or re-evaluated
+        # meanwhile no longer matches its guard and is left alone
+        batch = ObjectId()
+        writes = [
+            UpdateOne(
+                {'_id': ObjectId(ids[i]), 'status': accounts['status'][i]},
+                {'$set': {'status': 'failed', 'failure_reason': verdict['reasons'][i],
+                          'completed_at': now, 'sweep_batch': batch}}
+            )
+            for i in failed
+        ] + [
+            UpdateOne(
+                {'_id': ObjectId(ids[i]), 'status': 'active'},
+                {'$set': {'status': 'passed', 'completed_at': now}}
+            )
+            for i in passed
+        ]
+        if writes:
+            result = mongo.db.challenges.bulk_write(writes, ordered=False)
+            if result.modified_count < len(writes) and failed.size:
+                claimed = {str(doc['_id']) for doc in mongo.db.challenges.find({'sweep_batch': batch}, {'_id': 1})}
+                failed = np.array([i for i in failed if ids[i] in claimed], dtype=np.intp)
+
+        for i in failed:
+            held = np.flatnonzero(owner == i)
+            if held.size:
+                cls._stop_out(ids[i], PositionBook([positions[j] for j in held]), marks[held], now)
+
+        # Failing challenges are being liquidated: their margin is released there
+        reconciled = cls._reconcile_margin(
+            challenges, ids, np.bincount(owner, weights=book.margin, minlength=len(ids)), verdict['failed']
+        )
+        timings['write_ms'] = cls._elapsed(started) - sum(timings.values())
+
+        duration = cls._elapsed(started)
+        report = {
+            'challenges': len(ids),
+            'positions': len(book),
+            'symbols': len(book.symbols),
+            'failed': [ids[i] for i in failed],
+            'passed': [ids[i] for i in passed],
+            'margin_reconciled': reconciled,
+            'duration_ms': duration,
+            **{phase: round(ms, 3) for phase, ms in timings.items()}
+        }
+        cls._stats['runs'] += 1
+        cls._stats['last_run'] = now.isoformat()
+        cls._stats['last'] = dict(report, failed=len(failed), passed=len(passed))
+        cls._stats['max_duration_ms'] = max(cls._stats['max_duration_ms'], duration)
+        return report
+
+    @classmethod
+    def evaluate(cls, accounts, nlv, start_of_day):
+        """
+        Rules of every account in array form, in ChallengeEngine order:
+        daily loss (funded only), total loss (account blown for the free plan),
+        then profit target on realized equity.
+        Returns: dict with failed/passed boolean arrays and a failure reason per account
+        """
+        cash, initial = accounts['cash'], accounts['initial']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_loss = np.where(start_of_day > 0, (start_of_day - nlv) / start_of_day * 100, 0.0)
+            total_loss = np.where(initial > 0, (initial - nlv) / initial * 100, 0.0)
+            profit = np.where(initial != 0, (cash - initial) / initial * 100, 0.0)
+
+        daily_failed = accounts['funded'] & (start_of_day > 0) & (daily_loss > accounts['max_daily'])
+        blown = cash <= 1.0
+        total_failed = ~daily_failed & np.where(
+            accounts['free'], blown, (initial > 0) & (total_loss > accounts['max_total'])
+        )
+        failed = daily_failed | total_failed
+
+        reasons = [None] * len(cash)
+        for i in np.flatnonzero(failed):
+            if daily_failed[i]:
+                reasons[i] = f'Daily loss limit exceeded ({daily_loss[i]:.2f}%)'
+            else:
+                reasons[i] = 'Account blown' if blown[i] else f'Total loss limit exceeded ({total_loss[i]:.2f}%)'
+        return {'failed': failed, 'passed': ~failed & (profit >= accounts['target']), 'reasons': reasons}
+
+    @classmethod
+    def stats(cls):
+        return dict(cls._stats, interval=cls.INTERVAL)
+
+    @classmethod
+    def _columns(cls, challenges):
+        """Challenge documents as parallel arrays (model defaults for missing fields)"""
+        def column(field):
+            default = cls.DEFAULTS[field]
+            return np.array([doc.get(field, default) for doc in challenges], dtype=np.float64)
+
+        plans = np.array([doc.get('plan_type', cls.DEFAULTS['plan_type']) for doc in challenges], dtype=object)
+        return {
+            'status': np.array([doc.get('status', 'active') for doc in challenges], dtype=object),
+            'funded': plans == 'funded',
+            'free': plans == 'free',
+            'cash': column('current_equity'),
+            'initial': column('initial_balance'),
+            'max_daily': column('max_daily_loss_percent'),
+            'max_total': column('max_total_loss_percent'),
+            'target': column('profit_target_percent')
+        }
+
+    @classmethod
+    def _reconcile_margin(cls, challenges, ids, open_margin, skip):
+        """
+        Rebuild reserved_margin from the open orders where it drifted
+        (e.g. a process died between a reservation and its order without
+        transactions) and the same drift was seen by the previous sweep
+        Returns: number of challenges corrected
+        """
+        drift = {}
+        for i, doc in enumerate(challenges):
+            reserved = doc.get('reserved_margin')
+            if not skip[i] and abs((reserved or 0.0) - open_margin[i]) > 1e-6:
+                drift[ids[i]] = (reserved, round(float(open_margin[i]), 6))
+        confirmed = [cid for cid, seen in drift.items() if cls._margin_drift.get(cid) == seen]
+        cls._margin_drift = drift
+        if not confirmed:
+            return 0
+        result = mongo.db.challenges.bulk_write([
+            UpdateOne({'_id': ObjectId(cid), 'reserved_margin': drift[cid][0]},
+                      {'$set': {'reserved_margin': drift[cid][1]}})
+            for cid in confirmed
+        ], ordered=False)
+        for cid in confirmed:
+            del cls._margin_drift[cid]
+        print(f"Margin reconciliation: {result.modified_count} challenges corrected")
+        return result.modified_count
+
+    @classmethod
+    def _stop_out(cls, challenge_id, book, marks, closed_at):
+        """Flatten a failed challenge at the marks its rules were checked with"""
+        liquidation = ValuationEngine.liquidate(challenge_id, book, marks, closed_at=closed_at)
+        print(f"Stop-out {challenge_id}: {len(liquidation['closed'])} positions, P/L {liquidation['realized_pl']:.2f}")
+
+    @staticmethod
+    def _elapsed(started):
+        return round((time.perf_counter() - started) * 1000, 3)
+
+    @classmethod
+    def _acquire_lease(cls, now):
+        """
+        Take or renew the sweep lease (lasts two intervals, so the holder
+        keeps it while alive and another instance takes over otherwise)
+        Returns: True when this process holds the lease
+        """
+        try:
+            mongo.db.locks.find_one_and_update(
+                {'_id': cls.LEASE_ID, '$or': [{'expires_at': {'$lte': now}}, {'owner': cls._owner}]},
+                {'$set': {'owner': cls._owner, 'expires_at': now + timedelta(seconds=2 * cls.INTERVAL)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # Held by another live instance
+            return False
+
+    @classmethod
+    def _job(cls):
+        try:
+            with cls._app.app_context():
+                if not cls._acquire_lease(datetime.utcnow()):
+                    cls._stats['skipped'] += 1
+                    return
+                report = cls.run()
+            if report['failed'] or report['passed']:
+                print(f"Challenge sweep: {report['challenges']} challenges in {report['duration_ms']:.0f} ms, "
+                      f"{len(report['failed'])} failed, {len(report['passed'])} passed")
+        except Exception as e:
+            cls._stats['errors'] += 1
+            print(f"Challenge sweep error: {str(e)}")
@@ -0,0 +1,245 @@
+"""
+TradeSense AI - Incremental Technical Indicators
+O(1) rolling indicator state per symbol, fed bar by bar
+"""
+from collections import deque
+import numpy as np
+import threading
+
+
+class RollingWindow:
+    """Fixed-size window with running sum and sum of squares"""
+
+    __slots__ = ('size', 'values', 'total', 'total_sq')
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+    def checkpoint(self):
+        """O(1) state to undo the next push: the sums and the value it will evict"""
+        return self.total, self.total_sq, self.values[0] if self.full else None
+
+    def restore(self, checkpoint):
+        self.total, self.total_sq, evicted = checkpoint
+        self.values.pop()
+        if evicted is not None:
+            self.values.appendleft(evicted)
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else None
+
+    @property
+    def std(self):
+        if not self.values:
+            return None
+        mean = self.mean
+        return max(self.total_sq / len(self.values) - mean * mean, 0.0) ** 0.5
+
+
+class WilderAverage:
+    """Wilder smoothing seeded with a simple average of the first `period` values"""
+
+    __slots__ = ('period', 'count', 'value')
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.value = 0.0
+
+    def push(self, x):
+        self.count += 1
+        if self.count <= self.period:
+            self.value += (x - self.value) / self.count
+        else:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+
+    def checkpoint(self):
+        return self.count, self.value
+
+    def restore(self, checkpoint):
+        self.count, self.value = checkpoint
+
+    @property
+    def ready(self):
+        return self.count >= self.period
+
+
+class ExponentialAverage:
+    """EMA seeded with the first value"""
+
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, period):
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+
+    def push(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+
+    def checkpoint(self):
+        return self.value
+
+    def restore(self, checkpoint):
+        self.value = checkpoint
+
+
+class IndicatorState:
+    """SMA 20/50, EMA 12/26, MACD, Wilder RSI 14, Bollinger 20/2 and ATR 14 for one series"""
+
+    def __init__(self):
+        self.bars = 0
+        self.last_time = None
+        self.last_close = None
+        self.version = None
+        self.sma_20 = RollingWindow(20)
+        self.sma_50 = RollingWindow(50)
+        self.ema_12 = ExponentialAverage(12)
+        self.ema_26 = ExponentialAverage(26)
+        self.macd_signal = ExponentialAverage(9)
+        self.avg_gain = WilderAverage(14)
+        self.avg_loss = WilderAverage(14)
+        self.atr = WilderAverage(14)
+        # Scalars (plus evicted window values) before the last bar, to rewrite a bar still forming
+        self._checkpoint = None
+
+    def push(self, t, high, low, close):
+        if self.last_time is not None and t == self.last_time and self._checkpoint is not None:
+            self._restore(self._checkpoint)
+        elif self.last_time is not None and t < self.last_time:
+            return
+        self._checkpoint = self._snapshot()
+
+        prev_close = self.last_close
+        if prev_close is not None:
+            change = close - prev_close
+            self.avg_gain.push(max(change, 0.0))
+            self.avg_loss.push(max(-change, 0.0))
+            self.atr.push(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+        else:
+            self.atr.push(high - low)
+
+        self.sma_20.push(close)
+        self.sma_50.push(close)
+        self.ema_12.push(close)
+        self.ema_26.push(close)
+        self.macd_signal.push(self.ema_12.value - self.ema_26.value)
+
+        self.bars += 1
+        self.last_time = t
+        self.last_close = close
+
+    def values(self):
+        """Indicator snapshot (None until enough bars for SMA 50)"""
+        if not self.sma_50.full:
+            return None
+
+        sma_20 = self.sma_20.mean
+        sma_50 = self.sma_50.mean
+        if self.avg_loss.value == 0:
+            rsi_14 = 100.0 if self.avg_gain.value > 0 else 50.0
+        else:
+            rsi_14 = 100 - 100 / (1 + self.avg_gain.value / self.avg_loss.value)
+        macd = self.ema_12.value - self.ema_26.value
+        band = 2 * self.sma_20.std
+
+        return {
+            'current_price': round(self.last_close, 2),
+            'sma_20': round(sma_20, 2),
+            'sma_50': round(sma_50, 2),
+            'ema_12': round(self.ema_12.value, 2),
+            'ema_26': round(self.ema_26.value, 2),
+            'rsi_14': round(rsi_14, 2),
+            'macd': round(macd, 4),
+            'macd_signal': round(self.macd_signal.value, 4),
+            'macd_hist': round(macd - self.macd_signal.value, 4),
+            'bb_upper': round(sma_20 + band, 2),
+            'bb_middle': round(sma_20, 2),
+            'bb_lower': round(sma_20 - band, 2),
+            'atr_14': round(self.atr.value, 4),
+            'trend': 'Bullish' if sma_20 > sma_50 else 'Bearish',
+            'bars': self.bars,
+            'as_of': self.last_time
+        }
+
+    def _components(self):
+        return (self.sma_20, self.sma_50, self.ema_12, self.ema_26, self.macd_signal,
+                self.avg_gain, self.avg_loss, self.atr)
+
+    def _snapshot(self):
+        """O(1) undo record of the next bar (no copy of the windows)"""
+        return (self.bars, self.last_time, self.last_close,
+                tuple(component.checkpoint() for component in self._components()))
+
+    def _restore(self, checkpoint):
+        self.bars, self.last_time, self.last_close, states = checkpoint
+        for component, state in zip(self._components(), states):
+            component.restore(state)
+
+
+class IndicatorEngine:
+    """Indicator states shared across symbols, keyed by (symbol, interval)"""
+
+    _states = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def ingest(cls, symbol, interval, columns, version=None, reset=False):
+        """
+        Feed bars (column views from the bar store) into the symbol's state.
+        Only bars at or after the last ingested one are processed, and nothing
+        is done when `version` (e.g. the series fetch time) was already seen.
+        """
+        key = (symbol, interval)
+        with cls._lock:
+            state = cls._states.get(key)
+            if state is not None and version is not None and state.version == version:
+                return state.values()
+            if state is None or reset:
+                state = IndicatorState()
+                cls._states[key] = state
+            state.version = version
+
+            times = columns['time']
+            start = 0
+            if state.last_time is not None and len(times):
+                start = int(np.searchsorted(times, state.last_time, side='left'))
+            for t, high, low, close in zip(
+                times[start:].tolist(),
+                columns['high'][start:].tolist(),
+                columns['low'][start:].tolist(),
+                columns['close'][start:].tolist()
+            ):
+                state.push(t, high, low, close)
+            return state.values()
+
+    @classmethod
+    def get(cls, symbol, interval='1d'):
+        state = cls._states.get((symbol, interval))
+        return state.values() if state else None
+
+    @classmethod
+    def evaluate(cls, symbols, interval='1d'):
+        """Latest indicators for a whole watchlist (symbols without state are skipped)"""
+        results = {}
+        for symbol in symbols:
+            values = cls.get(symbol, interval)
+            if values:
+                results[symbol] = values
+        return results
@@ -0,0 +1,176 @@
+"""
+TradeSense AI - Instrument Registry
+One interned record per tradable symbol: asset class, sizing and reference price
+"""
+from collections import OrderedDict
+import math
+import re
+import sys
+import threading
+
+
+class Instrument:
+    """Static trading attributes of a symbol (shared, never mutated)"""
+
+    __slots__ = (
+        'id', 'symbol', 'name', 'asset_class', 'exchange',
+        'lot_multiplier', 'leverage', 'tick_size', 'decimals', 'reference_price'
+    )
+
+    def __init__(self, iid, symbol, name, asset_class, exchange, lot_multiplier, leverage, tick_size, reference_price):
+        self.id = iid
+        self.symbol = symbol
+        self.name = name
+        self.asset_class = asset_class
+        self.exchange = exchange
+        self.lot_multiplier = lot_multiplier
+        self.leverage = leverage
+        self.tick_size = tick_size
+        self.decimals = max(2, -int(math.floor(math.log10(tick_size))))
+        self.reference_price = reference_price
+
+    def round_price(self, price):
+        return round(price, self.decimals)
+
+    def __repr__(self):
+        return f"<Instrument {self.symbol} {self.asset_class}/{self.exchange}>"
+
+
+class InstrumentRegistry:
+    """
+    Symbol -> Instrument lookups in O(1).
+
+    The catalog below is loaded once; symbols outside it are classified from
+    their Yahoo suffix, so callers never parse symbol strings themselves.
+    Those arrive from request input, so they are kept in a bounded LRU
+    (MAX_DYNAMIC) and malformed ones are classified without being stored.
+    """
+
+    # Session calendar by asset class (see MarketCalendar)
+    EXCHANGE_BY_ASSET_CLASS = {
+        'us': 'NYSE',
+        'morocco': 'BVC',
+        'fx': 'FX',
+        'crypto': 'CRYPTO'
+    }
+    DEFAULT_LEVERAGE = 100.0
+    DEFAULT_REFERENCE_PRICE = 100.0
+    MAX_DYNAMIC = 1024
+    # Yahoo tickers: 'AAPL', 'BRK-B', '^GSPC', 'EURUSD=X', 'IAM.CS'
+    SYMBOL_PATTERN = re.compile(r'[A-Z0-9^][A-Z0-9.=^-]{0,19}')
+
+    # symbol: (name, asset class, lot multiplier, tick size, reference price)
+    CATALOG = {
+        # US Stocks (Projected 2026 reference prices)
+        'AAPL': ('Apple', 'us', 10.0, 0.01, 350.50),
+        'TSLA': ('Tesla', 'us', 10.0, 0.01, 510.20),
+        'GOOGL': ('Alphabet', 'us', 10.0, 0.01, 285.00),
+        'MSFT': ('Microsoft', 'us', 10.0, 0.01, 600.00),
+        # Commodities
+        'GC=F': ('Gold Futures', 'fx', 1.0, 0.1, 4618.88),
+        'SI=F': ('Silver Futures', 'fx', 1.0, 0.005, 85.40),
+        'XAUUSD=X': ('Gold Spot', 'fx', 100000.0, 0.01, 4618.88),
+        # Forex
+        'EURUSD=X': ('EUR/USD', 'fx', 100000.0, 0.0001, 1.2250),
+        'GBPUSD=X': ('GBP/USD', 'fx', 100000.0, 0.0001, 1.5250),
+        'USDJPY=X': ('USD/JPY', 'fx', 100000.0, 0.01, 120.50),
+        'USDCHF=X': ('USD/CHF', 'fx', 100000.0, 0.0001, 0.8250),
+        'AUDUSD=X': ('AUD/USD', 'fx', 100000.0, 0.0001, 0.7850),
+        # Crypto
+        'BTC-USD': ('Bitcoin', 'crypto', 1.0, 0.01, 125000.00),
+        'ETH-USD': ('Ethereum', 'crypto', 1.0, 0.01, 8500.00),
+        # Morocco (BVC simulation anchors)
+        'IAM.CS': ('Maroc Telecom', 'morocco', 10.0, 0.01, 102.50),
+        'ATW.CS': ('Attijariwafa Bank', 'morocco', 10.0, 0.01, 445.80),
+        'BCP.CS': ('Banque Centrale Populaire', 'morocco', 10.0, 0.01, 285.00),
+        'CIH.CS': ('CIH Bank', 'morocco', 10.0, 0.01, 310.00),
+        'LHM.CS': ('LafargeHolcim Maroc', 'morocco', 10.0, 0.01, 1820.00)
+    }
+
+    _lock = threading.Lock()
+    _by_symbol = {}       # catalog, never evicted
+    _instruments = []
+    _dynamic = OrderedDict()  # symbols outside the catalog, least recently used first
+
+    @classmethod
+    def get(cls, symbol):
+        """Instrument for a symbol (classified from its suffix if outside the catalog)"""
+        instrument = cls._by_symbol.get(symbol)
+        if instrument is not None:
+            return instrument
+        if not cls.is_valid(symbol):
+            # Transient: malformed input never grows the registry
+            return cls._build(None, str(symbol), *cls._classify(str(symbol)))
+        with cls._lock:
+            instrument = cls._dynamic.get(symbol)
+            if instrument is None:
+                symbol = sys.intern(str(symbol))
+                instrument = cls._dynamic[symbol] = cls._build(None, symbol, *cls._classify(symbol))
+                if len(cls._dynamic) > cls.MAX_DYNAMIC:
+                    cls._dynamic.popitem(last=False)
+            else:
+                cls._dynamic.move_to_end(symbol)
+        return instrument
+
+    @classmethod
+    def is_valid(cls, symbol):
+        """Basic format check of a symbol taken from request input"""
+        return isinstance(symbol, str) and cls.SYMBOL_PATTERN.fullmatch(symbol) is not None
+
+    @classmethod
+    def by_id(cls, iid):
+        """Catalog instrument by id (symbols outside the catalog have id None)"""
+        return cls._instruments[iid]
+
+    @classmethod
+    def symbols(cls, asset_class=None):
+        """Catalog symbols, optionally filtered by asset class"""
+        return [
+            symbol for symbol, entry in cls.CATALOG.items()
+            if asset_class is None or entry[1] == asset_class
+        ]
+
+    @classmethod
+    def reference_price(cls, symbol):
+        return cls.get(symbol).reference_price
+
+    @classmethod
+    def _classify(cls, symbol):
+        """Attributes of a symbol outside the catalog, from its Yahoo suffix"""
+        if symbol.endswith('-USD'):
+            return symbol, 'crypto', 1.0, 0.01, cls.DEFAULT_REFERENCE_PRICE
+        if symbol.endswith('=X'):
+            return symbol, 'fx', 100000.0, 0.0001, cls.DEFAULT_REFERENCE_PRICE
+        if symbol.endswith('=F'):
+            return symbol, 'fx', 1.0, 0.01, cls.DEFAULT_REFERENCE_PRICE
+        if symbol.endswith('.CS'):
+            return symbol, 'morocco', 10.0, 0.01, cls.DEFAULT_REFERENCE_PRICE
+        return symbol, 'us', 1.0, 0.01, cls.DEFAULT_REFERENCE_PRICE
+
+    @classmethod
+    def _register(cls, symbol, name, asset_class, lot_multiplier, tick_size, reference_price):
+        """Create and index a catalog instrument (lock held)"""
+        symbol = sys.intern(symbol)
+        instrument = cls._build(
+            len(cls._instruments), symbol, name, asset_class, lot_multiplier, tick_size, reference_price
+        )
+        cls._instruments.append(instrument)
+        cls._by_symbol[symbol] = instrument
+        return instrument
+
+    @classmethod
+    def _build(cls, iid, symbol, name, asset_class, lot_multiplier, tick_size, reference_price):
+        return Instrument(
+            iid, symbol, name, asset_class, cls.EXCHANGE_BY_ASSET_CLASS[asset_class],
+            lot_multiplier, cls.DEFAULT_LEVERAGE, tick_size, reference_price
+        )
+
+    @classmethod
+    def _load(cls):
+        with cls._lock:
+            for symbol, entry in cls.CATALOG.items():
+                if symbol not in cls._by_symbol:
+                    cls._register(symbol, *entry)
+
+
+InstrumentRegistry._load()
@@ -0,0 +1,258 @@
+"""
+TradeSense AI - Exchange Session Calendar
+Precomputed open/close transitions per exchange with bisect lookups
+"""
+from bisect import bisect_right
+from datetime import date, datetime, time as dtime, timedelta
+from dateutil.easter import easter
+import numpy as np
+import pytz
+import threading
+import time
+
+from app.services.instruments import InstrumentRegistry
+
+
+class ExchangeSessions:
+    """Sorted session edges of one exchange over a rolling window"""
+
+    def __init__(self, code, edges, day_starts, day_reasons, horizon):
+        self.code = code
+        # edges[2k] = session open, edges[2k + 1] = session close (UTC epoch seconds)
+        self.edges = edges
+        # Local day boundaries with their closure reason ('weekend', 'holiday' or None)
+        self.day_starts = day_starts
+        self.day_reasons = day_reasons
+        self.horizon = horizon
+
+    def is_open(self, ts):
+        return bisect_right(self.edges, ts) % 2 == 1
+
+    def next_open(self, ts):
+        i = bisect_right(self.edges, ts)
+        if i % 2 == 1:
+            i += 1
+        return self.edges[i] if i < len(self.edges) else None
+
+    def next_close(self, ts):
+        i = bisect_right(self.edges, ts)
+        if i % 2 == 0:
+            i += 1
+        return self.edges[i] if i < len(self.edges) else None
+
+    def closed_reason(self, ts):
+        i = bisect_right(self.day_starts, ts) - 1
+        return self.day_reasons[i] if i >= 0 else None
+
+
+class MarketCalendar:
+    """Session calendar for NYSE/NASDAQ, Casablanca BVC, FX/commodities and crypto"""
+
+    HORIZON_DAYS = 366
+    LOOKBACK_DAYS = 7
+    # Rebuild the window this long before the precomputed horizon runs out
+    REFRESH_MARGIN = 86400 * 7
+
+    OPEN_MESSAGES = {
+        'NYSE': "Ouvert (NYSE/NASDAQ)",
+        'BVC': "Ouvert (Bourse Casablanca)",
+        'FX': "Ouvert (Forex/Commodités)",
+        'CRYPTO': "Ouvert 24/7"
+    }
+    CLOSED_MESSAGES = {
+        'weekend': "Fermé (Week-end)",
+        'holiday': "Fermé (Jour férié)",
+        None: "Fermé (Hors session)"
+    }
+
+    # Local session hours of the exchanges that trade in daily sessions
+    SESSION_TIMEZONES = {'NYSE': 'America/New_York', 'BVC': 'Africa/Casablanca'}
+    SESSION_HOURS = {'NYSE': (dtime(9, 30), dtime(16, 0)), 'BVC': (dtime(9, 0), dtime(15, 30))}
+
+    # Fixed-date BVC holidays (month, day). Hijri holidays are not included.
+    BVC_FIXED_HOLIDAYS = [
+        (1, 1), (1, 11), (1, 14), (5, 1), (7, 30),
+        (8, 14), (8, 20), (8, 21), (11, 6), (11, 18)
+    ]
+
+    _lock = threading.Lock()
+    _sessions = {}
+
+    @classmethod
+    def exchange_of(cls, symbol):
+        """Session calendar of a symbol (from the instrument registry)"""
+        return InstrumentRegistry.get(symbol).exchange
+
+    @classmethod
+    def is_open(cls, symbol, at=None):
+        """
+        Check whether the symbol's exchange is in session
+        Returns: (is_open, human readable message)
+        """
+        ts = cls._to_epoch(at)
+        sessions = cls._get_sessions(cls.exchange_of(symbol), ts)
+        if sessions.is_open(ts):
+            return True, cls.OPEN_MESSAGES[sessions.code]
+        return False, cls.CLOSED_MESSAGES[sessions.closed_reason(ts)]
+
+    @classmethod
+    def is_exchange_open(cls, code, at=None):
+        """Check whether an exchange ('NYSE', 'BVC', 'FX', 'CRYPTO') is in session"""
+        ts = cls._to_epoch(at)
+        return cls._get_sessions(code, ts).is_open(ts)
+
+    @classmethod
+    def next_open(cls, symbol, at=None):
+        """UTC datetime of the next session open (None for 24/7 markets)"""
+        ts = cls._to_epoch(at)
+        return cls._to_datetime(cls._get_sessions(cls.exchange_of(symbol), ts).next_open(ts))
+
+    @classmethod
+    def next_close(cls, symbol, at=None):
+        """UTC datetime of the next session close (None for 24/7 markets)"""
+        ts = cls._to_epoch(at)
+        return cls._to_datetime(cls._get_sessions(cls.exchange_of(symbol), ts).next_close(ts))
+
+    @classmethod
+    def session_opens(cls, code, times):
+        """
+        UTC epoch of the session open on the day of each time (int64 array),
+        or None for exchanges without daily sessions (FX, crypto)
+        """
+        if code not in cls.SESSION_HOURS:
+            return None
+        tz = pytz.timezone(cls.SESSION_TIMEZONES[code])
+        opens_at = cls.SESSION_HOURS[code][0]
+        # Sessions run within their UTC day on both exchanges: one open per UTC day
+        days, index = np.unique(np.asarray(times, dtype=np.int64) // 86400, return_inverse=True)
+        opens = np.array([
+            cls._epoch(tz, date(1970, 1, 1) + timedelta(days=int(day)), opens_at) for day in days
+        ], dtype=np.int64)
+        return opens[index]
+
+    @classmethod
+    def _to_epoch(cls, at):
+        if at is None:
+            return time.time()
+        if isinstance(at, datetime):
+            if at.tzinfo is None:
+                at = pytz.UTC.localize(at)
+            return at.timestamp()
+        return float(at)
+
+    @staticmethod
+    def _to_datetime(ts):
+        if ts is None or ts == float('inf'):
+            return None
+        return datetime.fromtimestamp(ts, pytz.UTC)
+
+    @classmethod
+    def _get_sessions(cls, code, ts):
+        sessions = cls._sessions.get(code)
+        if sessions is None or ts > sessions.horizon - cls.REFRESH_MARGIN or ts < sessions.day_starts[0]:
+            with cls._lock:
+                sessions = cls._sessions.get(code)
+                if sessions is None or ts > sessions.horizon - cls.REFRESH_MARGIN or ts < sessions.day_starts[0]:
+                    sessions = cls._build(code, datetime.fromtimestamp(ts, pytz.UTC).date())
+                    cls._sessions[code] = sessions
+        return sessions
+
+    @classmethod
+    def _build(cls, code, today):
+        """Precompute session edges for one exchange over the rolling window"""
+        start = today - timedelta(days=cls.LOOKBACK_DAYS)
+        end = today + timedelta(days=cls.HORIZON_DAYS)
+        days = [start + timedelta(days=n) for n in range((end - start).days)]
+
+        if code == 'CRYPTO':
+            first = cls._epoch(pytz.UTC, start, dtime(0, 0))
+            last = cls._epoch(pytz.UTC, end, dtime(0, 0))
+            return ExchangeSessions(code, [first, float('inf')], [first], [None], last)
+
+        if code == 'NYSE':
+            tz = pytz.timezone(cls.SESSION_TIMEZONES[code])
+            holidays = cls._nyse_holidays(start.year, end.year)
+            hours = cls.SESSION_HOURS[code]
+        elif code == 'BVC':
+            tz = pytz.timezone(cls.SESSION_TIMEZONES[code])
+            holidays = {date(y, m, d) for y in range(start.year, end.year + 1) for m, d in cls.BVC_FIXED_HOLIDAYS}
+            hours = cls.SESSION_HOURS[code]
+        else:
+            tz = pytz.timezone('America/New_York')
+            holidays = set()
+            hours = None
+
+        edges = []
+        day_starts = []
+        day_reasons = []
+        for day in days:
+            weekday = day.weekday()
+            day_starts.append(cls._epoch(tz, day, dtime(0, 0)))
+
+            if code == 'FX':
+                # 24/5: Sunday 17:00 New York to Friday 17:00 New York
+                day_reasons.append('weekend' if weekday in (4, 5, 6) else None)
+                if weekday == 6:
+                    edges.append(cls._epoch(tz, day, dtime(17, 0)))
+                elif weekday == 4:
+                    if not edges:
+                        edges.append(day_starts[0])
+                    edges.append(cls._epoch(tz, day, dtime(17, 0)))
+                elif not edges and weekday < 4:
+                    edges.append(day_starts[-1])
+                continue
+
+            if weekday >= 5:
+                day_reasons.append('weekend')
+            elif day in holidays:
+                day_reasons.append('holiday')
+            else:
+                day_reasons.append(None)
+                edges.append(cls._epoch(tz, day, hours[0]))
+                edges.append(cls._epoch(tz, day, hours[1]))
+
+        if len(edges) % 2 == 1:
+            edges.append(float('inf'))
+        horizon = cls._epoch(tz, end, dtime(0, 0))
+        return ExchangeSessions(code, edges, day_starts, day_reasons, horizon)
+
+    @staticmethod
+    def _epoch(tz, day, at):
+        return tz.localize(datetime.combine(day, at)).timestamp()
+
+    @classmethod
+    def _nyse_holidays(cls, first_year, last_year):
+        holidays = set()
+        for year in range(first_year, last_year + 1):
+            holidays.add(cls._observed(date(year, 1, 1), allow_friday=False))
+            holidays.add(cls._nth_weekday(year, 1, 0, 3))   # Martin Luther King Jr. Day
+            holidays.add(cls._nth_weekday(year, 2, 0, 3))   # Washington's Birthday
+            holidays.add(easter(year) - timedelta(days=2))  # Good Friday
+            holidays.add(cls._last_weekday(year, 5, 0))     # Memorial Day
+            if year >= 2022:
+                holidays.add(cls._observed(date(year, 6, 19)))  # Juneteenth
+            holidays.add(cls._observed(date(year, 7, 4)))
+            holidays.add(cls._nth_weekday(year, 9, 0, 1))   # Labor Day
+            holidays.add(cls._nth_weekday(year, 11, 3, 4))  # Thanksgiving
+            holidays.add(cls._observed(date(year, 12, 25)))
+        return holidays
+
+    @staticmethod
+    def _observed(day, allow_friday=True):
+        if day.weekday() == 5:
+            return day - timedelta(days=1) if allow_friday else day
+        if day.weekday() == 6:
+            return day + timedelta(days=1)
+        return day
+
+    @staticmethod
+    def _nth_weekday(year, month, weekday, n):
+        first = date(year, month, 1)
+        offset = (weekday - first.weekday()) % 7
+        return first + timedelta(days=offset + 7 * (n - 1))
+
+    @staticmethod
+    def _last_weekday(year, month, weekday):
+        following = date(year + (month == 12), month % 12 + 1, 1)
+        last = following - timedelta(days=1)
+        return last - timedelta(days=(last.weekday() - weekday) % 7)
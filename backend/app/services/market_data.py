@@ -2,21 +2,55 @@
 TradeSense AI - Market Data Service
 Fetches real-time prices from US stocks, Crypto, and Morocco BVC
 """
+import numpy as np
 import yfinance as yf
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+import threading
 import time
+import zlib
+
+from app.services.bar_store import BarStore
+from app.services.bvc_ingester import BVCIngester
+from app.services.instruments import InstrumentRegistry
+from app.services.indicators import IndicatorEngine
+from app.services.market_calendar import MarketCalendar
+from app.services.news_store import CATEGORY_BY_ASSET_CLASS, NewsStore
+from app.services.price_cache import PriceCache, _Flight
+from app.services.price_simulator import PriceSimulator, SECONDS_PER_YEAR
+from app.services.resampler import Resampler
+from app.services.tick_producer import TickProducer
+from app.services.upstream import UpstreamFetcher
+from app.services.warm_start import WarmStart
 
 
 class MarketDataService:
     """Service to fetch market data from multiple sources"""
     
     # Caching
-    _price_cache = {}
-    _historical_cache = {} # Cache for historical data (period, interval)
-    _cache_duration = 0.1 # Reduced to 100ms for high-frequency updates
-    _historical_duration = 300 # 5 minutes for historical data
+    _cache_duration = 30 # Upstream anchors seeding the tick producer
+    _price_cache = PriceCache(ttl=_cache_duration, max_entries=2048)
+    _historical_cache = {} # Mock history only, real bars live in the BarStore
+    _series_lock = threading.Lock()
+    _series_inflight = {}  # (symbol, interval) -> _Flight of the running series refresh
+    _historical_duration = 300 # 5 minutes between incremental history refreshes
+
+    # yfinance periods in seconds
+    PERIOD_SECONDS = {
+        '1d': 86400, '5d': 5 * 86400, '1mo': 30 * 86400, '3mo': 91 * 86400,
+        '6mo': 182 * 86400, '1y': 365 * 86400, '2y': 730 * 86400,
+        '5y': 5 * 365 * 86400, '10y': 10 * 365 * 86400
+    }
+    # yfinance intervals in seconds
+    INTERVAL_SECONDS = {
+        '1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800,
+        '60m': 3600, '90m': 5400, '1h': 3600, '1d': 86400,
+        '5d': 5 * 86400, '1wk': 7 * 86400, '1mo': 30 * 86400, '3mo': 91 * 86400
+    }
+    # Base series kept per symbol, finest first, with the lookback yfinance serves
+    BASE_INTERVALS = [('1m', 7 * 86400), ('5m', 60 * 86400), ('1h', 730 * 86400)]
+    DAILY_INTERVALS = ['1d', '5d', '1wk', '1mo', '3mo']
+    MAX_MOCK_BARS = 600000 # a little over a year of 1m bars
+    _EMPTY_BARS = {'time': [], 'open': [], 'high': [], 'low': [], 'close': [], 'volume': []}
     
     # Symbol mappings by asset class
     US_STOCKS = ['AAPL', 'TSLA', 'GOOGL', 'MSFT']
@@ -24,11 +58,7 @@ class MarketDataService:
     FOREX = ['EURUSD=X', 'GBPUSD=X', 'USDJPY=X', 'USDCHF=X', 'AUDUSD=X', 'XAUUSD=X']
     CRYPTO = ['BTC-USD', 'ETH-USD']
     MOROCCO_SYMBOLS = {
-        'IAM.CS': 'Maroc Telecom',
-        'ATW.CS': 'Attijariwafa Bank',
-        'BCP.CS': 'Banque Centrale Populaire',
-        'CIH.CS': 'CIH Bank',
-        'LHM.CS': 'LafargeHolcim Maroc'
+        symbol: InstrumentRegistry.get(symbol).name for symbol in InstrumentRegistry.symbols('morocco')
     }
     
     # Legacy compatibility
@@ -37,234 +67,134 @@ class MarketDataService:
     @classmethod
     def get_batch_prices(cls, symbols):
         """Get prices for multiple symbols in one go with market status"""
-        results = {}
-        for symbol in symbols:
-            price_data = cls.get_realtime_price(symbol)
-            status_data = cls.get_market_status(symbol)
-            if price_data:
-                price_data.update(status_data)
-                results[symbol] = price_data
-        return results
+        from app.services.quote_engine import BatchQuoteEngine
+        return BatchQuoteEngine.resolve(symbols)
+
+    @classmethod
+    def get_asset_class(cls, symbol):
+        """Classify a symbol as 'crypto', 'fx', 'morocco' or 'us'"""
+        return InstrumentRegistry.get(symbol).asset_class
     
     @classmethod
-    def is_market_open(cls, symbol):
+    def is_market_open(cls, symbol, now_utc=None):
         """Check if the market for a given symbol is currently open"""
-        from datetime import datetime, time
-        import pytz
-        
-        now_utc = datetime.now(pytz.UTC)
-        utc_day = now_utc.weekday()  # 0=Monday, 6=Sunday
-        utc_hour = now_utc.hour
-        
-        # Crypto: Always open 24/7/365
-        if symbol in cls.CRYPTO or symbol.endswith('-USD'):
-            return True, "Ouvert 24/7"
-        
-        # Forex & Commodities: 24/5 (Sunday 22:00 UTC - Friday 22:00 UTC)
-        if symbol in cls.FOREX or symbol in cls.COMMODITIES or '=X' in symbol or '=F' in symbol:
-            # Saturday: Closed
-            if utc_day == 5:  # Saturday
-                return False, "Fermé (Week-end)"
-            # Sunday before 22:00 UTC: Closed
-            if utc_day == 6 and utc_hour < 22:
-                return False, "Fermé (Week-end)"
-            # Friday after 22:00 UTC: Closed
-            if utc_day == 4 and utc_hour >= 22:
-                return False, "Fermé (Week-end)"
-            return True, "Ouvert (Forex/Commodités)"
-        
-        # Moroccan Stocks (.CS): Monday-Friday 8:00-14:30 UTC (9:00-15:30 Morocco time)
-        if symbol in cls.MOROCCO_SYMBOLS or '.CS' in symbol:
-            if utc_day >= 5:  # Weekend
-                return False, "Fermé (Week-end)"
-            if utc_hour < 8 or utc_hour >= 15:
-                return False, "Fermé (Hors session)"
-            return True, "Ouvert (Bourse Casablanca)"
-        
-        # US Stocks: Monday-Friday 14:30-21:00 UTC (9:30-16:00 ET)
-        if utc_day >= 5:  # Weekend
-            return False, "Fermé (Week-end)"
-        if utc_hour < 14 or utc_hour >= 21:
-            return False, "Fermé (Hors session)"
-        return True, "Ouvert (NYSE/NASDAQ)"
+        return MarketCalendar.is_open(symbol, now_utc)
 
     @classmethod
-    def get_market_status(cls, symbol):
+    def get_market_status(cls, symbol, now_utc=None):
         """Get human readable market status"""
-        is_open, message = cls.is_market_open(symbol)
+        is_open, message = MarketCalendar.is_open(symbol, now_utc)
+        next_change = MarketCalendar.next_close(symbol, now_utc) if is_open else MarketCalendar.next_open(symbol, now_utc)
         return {
             'is_open': is_open,
-            'status': message
+            'status': message,
+            'next_close' if is_open else 'next_open': next_change.isoformat() if next_change else None
         }
 
     @classmethod
     def get_realtime_price(cls, symbol):
         """
-        Get real-time price with short-term caching
+        Get real-time price from the shared tick tape
+        The first read of a symbol anchors it on upstream data (single-flight)
         """
-        now = time.time()
-        
-        # Check cache
-        if symbol in cls._price_cache:
-            cached_data, timestamp = cls._price_cache[symbol]
-            if now - timestamp < cls._cache_duration:
-                return cached_data
-        
-        # Fetch fresh data
-        result = None
-        if symbol in cls.MOROCCO_SYMBOLS:
-            result = cls._fetch_morocco_price(symbol)
+        quote = TickProducer.latest(symbol)
+        if quote:
+            return quote
+
+        WarmStart.ensure_restored()
+        if cls.get_asset_class(symbol) == 'morocco':
+            seed = cls._price_cache.get_or_fetch(symbol, lambda: cls._fetch_morocco_price(symbol))
         else:
-            result = cls._fetch_yfinance_price(symbol)
-            
-        if result:
-            cls._price_cache[symbol] = (result, now)
-            
-        return result
+            seed = cls._price_cache.get_or_fetch(symbol, lambda: cls._fetch_yfinance_price(symbol))
+        if not seed or not seed.get('price'):
+            return dict(seed) if seed else seed
+
+        TickProducer.activate({symbol: seed})
+        return TickProducer.latest(symbol)
+
+    @classmethod
+    def get_cache_stats(cls):
+        """Hit/miss/stampede counters of the anchor cache, tick producer, resampler and upstream state"""
+        return dict(
+            cls._price_cache.stats(),
+            ticks=TickProducer.stats(),
+            resampler=Resampler.stats(),
+            upstream=UpstreamFetcher.stats()
+        )
 
     @classmethod
     def _fetch_yfinance_price(cls, symbol):
-        """Fetch price and anchor simulation on official data for sync"""
-        import random
-        
-        # Core symbols to anchor
-        official_symbols = ['AAPL', 'TSLA', 'GOOGL', 'MSFT', 'BTC-USD', 'ETH-USD']
-        
-        # Check if we have a previous price to walk from
+        """Fetch the anchor price the tick simulation walks from"""
+        # Re-anchor on the last known price to keep the tape continuous
         last_price = None
         last_change = 0
-        if symbol in cls._price_cache:
-            cached_data, _ = cls._price_cache[symbol]
+        cached_data = cls._price_cache.peek(symbol)
+        if cached_data:
             last_price = cached_data.get('price')
             last_change = cached_data.get('change_percent', 0)
 
         # TO SYNC CHART & MARKET:
-        # We periodically (every 30s) or on first fetch, get the REAL price from yfinance
-        # to ensure the simulation hasn't drifted from the chart's historical data.
+        # On first fetch, get the REAL price from yfinance so the simulation
+        # starts from the chart's historical data.
         current_base = last_price
         
         if not last_price:
-            try:
-                ticker = yf.Ticker(symbol)
-                # Get the absolute latest point
-                fast_info = ticker.history(period='1d', interval='1m')
-                if not fast_info.empty:
-                    current_base = fast_info['Close'].iloc[-1]
-            except:
-                pass
-
-        # If we still don't have a base, use default
+            # Get the absolute latest point (None on timeout/error/open breaker)
+            fast_info = UpstreamFetcher.call('yahoo', cls._download_history, symbol, period='1d', interval='1m')
+            if fast_info is not None and not fast_info.empty:
+                current_base = fast_info['Close'].iloc[-1]
+
+        # If we still don't have a base, use the instrument's reference price
+        instrument = InstrumentRegistry.get(symbol)
         if not current_base:
-            base_prices = {
-                # US Stocks (Projected 2026)
-                'AAPL': 350.50, 'TSLA': 510.20, 'GOOGL': 285.00, 'MSFT': 600.00,
-                # Commodities (Projected 2026)
-                'GC=F': 4618.88, 'SI=F': 85.40, 'XAUUSD=X': 4618.88,
-                # Forex (Projected 2026)
-                'EURUSD=X': 1.2250, 'GBPUSD=X': 1.5250, 'USDJPY=X': 120.50,
-                'USDCHF=X': 0.8250, 'AUDUSD=X': 0.7850,
-                # Crypto (Projected 2026)
-                'BTC-USD': 125000.00, 'ETH-USD': 8500.00,
-                # Morocco (Projected 2026)
-                'IAM.CS': 155.50, 'ATW.CS': 645.80, 'BCP.CS': 415.00,
-                'CIH.CS': 455.00, 'LHM.CS': 2820.00
-            }
-            current_base = base_prices.get(symbol, 100.0)
-        
-        # Jitter configuration
-        jitter_range = 0.0005 if '-USD' in symbol else 0.0002
+            current_base = instrument.reference_price
         
-        # Determine if we should move
-        # We ALWAYS move now to create a live experience
         is_open, _ = cls.is_market_open(symbol)
-        price = current_base * (1 + random.uniform(-jitter_range, jitter_range))
-        
-        # Simulated change jitter
-        change_jitter = random.uniform(-0.02, 0.02)
-        new_change = last_change + change_jitter
 
         return {
             'symbol': symbol,
-            'price': round(price, 2),
+            'price': instrument.round_price(float(current_base)),
             'timestamp': datetime.utcnow().isoformat(),
-            'change_percent': round(new_change, 2),
+            'change_percent': round(last_change, 2),
             'market': 'Live/Simulated' if not is_open else 'Live/Market',
             'source': 'synced-tick-sim'
         }
-
     
     @classmethod
     def _fetch_morocco_price(cls, symbol):
         """
-        Fetch Morocco stock prices via web scraping
-        Note: This is a mock implementation. In production, you would scrape from
-        a real source like casablanca-bourse.com or use a paid API
+        Anchor quote for a Casablanca Stock Exchange symbol.
+        The BVC ingester keeps the price cache filled from the quote board; this
+        is only reached on a miss (ingester disabled or symbol not on the board).
         """
         try:
-            # MOCK DATA for demonstration
-            # In production, scrape from: https://www.casablanca-bourse.com/
-            
-            mock_prices = {
-                'IAM.CS': 102.50,  # Maroc Telecom
-                'ATW.CS': 445.80,  # Attijariwafa Bank
-                'BCP.CS': 285.00,  # BCP
-                'CIH.CS': 310.00,  # CIH
-                'LHM.CS': 1820.00  # LafargeHolcim
-            }
-            
-            # Allow fallback if .CS is missing in the request but present in mock
-            lookup_symbol = symbol if symbol in mock_prices else f"{symbol}.CS"
-            
-            if lookup_symbol in mock_prices:
-                base_price = mock_prices[lookup_symbol]
+            lookup_symbol = symbol if symbol.endswith('.CS') else f"{symbol}.CS"
+
+            board_quote = BVCIngester.quote(lookup_symbol)
+            if board_quote:
+                return dict(board_quote, symbol=symbol, timestamp=datetime.utcnow().isoformat(), market='Morocco BVC')
+
+            # MOCK DATA when the board is not configured
+            if lookup_symbol in cls.MOROCCO_SYMBOLS:
+                base_price = InstrumentRegistry.reference_price(lookup_symbol)
                 
-                # Use cache to walk the price
+                # Anchor on the last known price, the tick producer walks it
                 last_price = base_price
                 last_change = 0
-                if symbol in cls._price_cache:
-                    cached_data, _ = cls._price_cache[symbol]
+                cached_data = cls._price_cache.peek(symbol)
+                if cached_data:
                     last_price = cached_data.get('price', base_price)
                     last_change = cached_data.get('change_percent', 0)
-
-                # Simulation loop
-                import random
-                jitter = 0.0002
-                price = last_price * (1 + random.uniform(-jitter, jitter))
-                change_percent = last_change + random.uniform(-0.01, 0.01)
                 
                 return {
                     'symbol': symbol,
                     'name': cls.MOROCCO_SYMBOLS.get(lookup_symbol, symbol),
-                    'price': round(price, 2),
+                    'price': round(last_price, 2),
                     'timestamp': datetime.utcnow().isoformat(),
-                    'change_percent': round(change_percent, 2),
+                    'change_percent': round(last_change, 2),
                     'market': 'Morocco BVC (Sim)'
                 }
             
-            # Real scraping implementation (commented out)
-            """
-            url = f"https://www.casablanca-bourse.com/bourseweb/Negociation-Historique.aspx?symbol={symbol}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            soup = BeautifulSoup(response.content, 'lxml')
-            
-            # Extract price from HTML (adjust selectors based on actual site structure)
-            price_element = soup.find('span', {'class': 'cours'})
-            if price_element:
-                price = float(price_element.text.replace(',', '.').strip())
-                return {
-                    'symbol': symbol,
-                    'name': cls.MOROCCO_SYMBOLS.get(symbol, symbol),
-                    'price': round(price, 2),
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'change_percent': 0,
-                    'market': 'Morocco BVC'
-                }
-            """
-            
             return {
                 'symbol': symbol,
                 'price': 0,
@@ -285,279 +215,244 @@ class MarketDataService:
     
     @classmethod
     def get_historical_data(cls, symbol, period='1mo', interval='1d'):
-        """Get historical data for charting with caching"""
-        cache_key = f"{symbol}_{period}_{interval}"
+        """Get historical data for charting from the columnar bar store"""
         now = datetime.utcnow()
         
-        # Check cache
-        if cache_key in cls._historical_cache:
-            data, timestamp = cls._historical_cache[cache_key]
-            if (now - timestamp).total_seconds() < cls._historical_duration:
-                return data
+        if cls.get_asset_class(symbol) == 'morocco':
+            # For Morocco stocks, return mock data
+            return cls._get_cached_mock_history(symbol, period, interval, now)
 
         try:
-            if symbol in cls.MOROCCO_SYMBOLS:
-                # For Morocco stocks, return mock data
-                data = cls._get_mock_historical_data(symbol, period, interval)
-                cls._historical_cache[cache_key] = (data, now)
-                return data
-            
-            ticker = yf.Ticker(symbol)
-            # yfinance supports intervals: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
-            hist = ticker.history(period=period, interval=interval)
-            
-            if hist.empty:
+            columns = cls._get_bar_columns(symbol, period, interval)
+            if not len(columns['time']):
                 print(f"Warning: No historical data for {symbol}, using mock fallback.")
-                data = cls._get_mock_historical_data(symbol, period, interval)
-                cls._historical_cache[cache_key] = (data, now)
-                return data
-
-            data = []
-            for index, row in hist.iterrows():
-                try:
-                    data.append({
-                        'time': int(index.timestamp()),
-                        'open': round(float(row['Open']), 2),
-                        'high': round(float(row['High']), 2),
-                        'low': round(float(row['Low']), 2),
-                        'close': round(float(row['Close']), 2),
-                        'volume': int(row['Volume']) if 'Volume' in row else 0
-                    })
-                except Exception as row_err:
-                     continue
-            
-            if not data:
-                 data = cls._get_mock_historical_data(symbol, period, interval)
-            
-            # Cache results
-            cls._historical_cache[cache_key] = (data, now)
-            return data
+                return cls._get_cached_mock_history(symbol, period, interval, now)
+            return BarStore.to_records(columns)
         
         except Exception as e:
             print(f"Error fetching historical data for {symbol}: {str(e)}")
             # Fallback to mock data on ANY error
-            data = cls._get_mock_historical_data(symbol, period, interval)
-            cls._historical_cache[cache_key] = (data, now)
-            return data
-    
+            return cls._get_cached_mock_history(symbol, period, interval, now)
+
+    @classmethod
+    def _get_bar_columns(cls, symbol, period, interval):
+        """
+        Zero-copy column views of the stored series for a period.
+        Coarser intervals are resampled from the finest base series that covers
+        the period, so switching timeframes does not go upstream again.
+        """
+        WarmStart.ensure_restored()
+        now_ts = time.time()
+        start = cls._period_start(period, now_ts)
+        base = cls._base_interval(interval, start, now_ts)
+        series = cls._get_series(symbol, period, base, start, now_ts)
+        if base == interval:
+            return series.view(start=start)
+        return Resampler.get(symbol, interval, cls.INTERVAL_SECONDS.get(interval, 86400), series, start)
+
+    @classmethod
+    def _base_interval(cls, interval, start, now_ts):
+        """Finest stored interval that divides `interval` and reaches back to `start`"""
+        if interval in cls.DAILY_INTERVALS:
+            return '1d'
+        seconds = cls.INTERVAL_SECONDS.get(interval)
+        if seconds is None:
+            return interval
+        for base, lookback in cls.BASE_INTERVALS:
+            base_seconds = cls.INTERVAL_SECONDS[base]
+            if base_seconds > seconds:
+                break
+            if seconds % base_seconds == 0 and start is not None and now_ts - start <= lookback:
+                return base
+        return interval
+
+    @classmethod
+    def _get_series(cls, symbol, period, interval, start, now_ts):
+        """
+        Stored series covering `start`, refreshed single-flight per (symbol, interval):
+        concurrent requests wait for the running download and reuse its result,
+        unless they need a longer period than it fetched
+        """
+        key = (symbol, interval)
+        wanted = start if start is not None else 0
+        while True:
+            with cls._series_lock:
+                flight = cls._series_inflight.get(key)
+                if flight is None:
+                    flight = cls._series_inflight[key] = _Flight()
+                    flight.value = wanted
+                    break
+            flight.event.wait()
+            if flight.value <= wanted:
+                return BarStore.get(symbol, interval)
+        try:
+            return cls._refresh_series(symbol, period, interval, start, now_ts)
+        finally:
+            with cls._series_lock:
+                cls._series_inflight.pop(key, None)
+            flight.event.set()
+
+    @classmethod
+    def _refresh_series(cls, symbol, period, interval, start, now_ts):
+        """
+        Stored series covering `start`.
+        Only bars newer than the last stored one are fetched upstream.
+        """
+        series = BarStore.get(symbol, interval)
+        wanted = start if start is not None else 0  # 'max' covers everything
+
+        if not series.length or series.coverage_start is None or wanted < series.coverage_start:
+            # Empty or narrower than requested: (re)load the whole period
+            # yfinance supports intervals: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
+            hist = UpstreamFetcher.call('yahoo', cls._download_history, symbol, period=period, interval=interval)
+            if hist is not None and not hist.empty:
+                series.replace(BarStore.from_frame(hist), coverage_start=wanted)
+        elif now_ts - series.fetched_at >= cls._historical_duration:
+            # Incremental refresh from the last stored bar onwards
+            # (on failure the stored bars are served as they are)
+            hist = UpstreamFetcher.call('yahoo', cls._download_history, symbol, start=series.last_time, interval=interval)
+            if hist is not None:
+                series.append(BarStore.from_frame(hist) if not hist.empty else cls._EMPTY_BARS)
+
+        return series
+
+    @staticmethod
+    def _download_history(symbol, **kwargs):
+        """yfinance history call, run on the upstream pool"""
+        return yf.Ticker(symbol).history(**kwargs)
+
+    @classmethod
+    def _period_start(cls, period, now_ts):
+        """Epoch seconds where a yfinance period begins (None for 'max')"""
+        if period == 'ytd':
+            return int(datetime(datetime.utcnow().year, 1, 1, tzinfo=timezone.utc).timestamp())
+        seconds = cls.PERIOD_SECONDS.get(period)
+        return int(now_ts - seconds) if seconds else None
+
+    @classmethod
+    def _get_cached_mock_history(cls, symbol, period, interval, now):
+        columns, _ = cls._get_cached_mock_columns(symbol, period, interval, now)
+        return BarStore.to_records(columns)
+
+    @classmethod
+    def _get_cached_mock_columns(cls, symbol, period, interval, now):
+        """Mock columns and their generation time, regenerated every few minutes"""
+        cache_key = f"{symbol}_{period}_{interval}"
+        if cache_key in cls._historical_cache:
+            columns, timestamp = cls._historical_cache[cache_key]
+            if (now - timestamp).total_seconds() < cls._historical_duration:
+                return columns, timestamp
+        columns = cls._get_mock_bar_columns(symbol, period, interval)
+        cls._historical_cache[cache_key] = (columns, now)
+        return columns, now
+
     @classmethod
     def _get_mock_historical_data(cls, symbol, period='1mo', interval='1d'):
         """Generate mock historical data for any symbol supporting intervals"""
-        import random
-        from datetime import datetime, timedelta
-        
-        # ... (rest of the code needs to use interval to determine delta)
-        # Mapping interval to timedelta
-        delta_map = {
-            '1m': timedelta(minutes=1),
-            '2m': timedelta(minutes=2),
-            '5m': timedelta(minutes=5),
-            '15m': timedelta(minutes=15),
-            '30m': timedelta(minutes=30),
-            '60m': timedelta(hours=1),
-            '90m': timedelta(minutes=90),
-            '1h': timedelta(hours=1),
-            '1d': timedelta(days=1),
-            '5d': timedelta(days=5),
-            '1wk': timedelta(weeks=1),
-            '1mo': timedelta(days=30)
-        }
-        td = delta_map.get(interval, timedelta(days=1))
-        
-        # Determine number of points based on period (approximate)
-        points = 100 # default
-        if interval == '1m': points = 60 # 1 hour of data
-        elif interval == '5m': points = 100 # ~8 hours
-        elif interval == '1h': points = 72 # 3 days
-        elif interval == '1d': points = 30 # 1 month
-        
+        return BarStore.to_records(cls._get_mock_bar_columns(symbol, period, interval))
+
+    @classmethod
+    def _get_mock_bar_columns(cls, symbol, period='1mo', interval='1d'):
+        """
+        Mock OHLCV columns covering the requested period, built in one NumPy pass.
+
+        The path shape comes from a generator seeded by (symbol, interval), so
+        repeated calls draw the same chart, and it is scaled so the last close
+        matches the live price.
+        """
+        step = cls.INTERVAL_SECONDS.get(interval, 86400)
+        now_ts = time.time()
+        start = cls._period_start(period, now_ts)
+        span = now_ts - start if start is not None else cls.PERIOD_SECONDS['10y']
+        points = int(min(max(span // step, 1), cls.MAX_MOCK_BARS))
+
+        # Anchor on the live price (fallback table if unavailable)
         try:
-            # approximate base prices (fallback) - Projected 2026 values
-            base_map = {
-                # US Stocks
-                'AAPL': 350.00, 'TSLA': 510.00, 'GOOGL': 285.00, 'MSFT': 600.00,
-                # Commodities
-                'GC=F': 4618.88, 'SI=F': 85.40, 'XAUUSD=X': 4618.88,
-                # Forex
-                'EURUSD=X': 1.2250, 'GBPUSD=X': 1.5250, 'USDJPY=X': 120.50,
-                'USDCHF=X': 0.8250, 'AUDUSD=X': 0.7850,
-                # Crypto
-                'BTC-USD': 125000.00, 'ETH-USD': 8500.00,
-                # Morocco
-                'IAM.CS': 155.50, 'ATW.CS': 645.80, 'BCP.CS': 415.00,
-                'CIH.CS': 455.00, 'LHM.CS': 2820.00
-            }
-            
-            # Try to get real price first to anchor the mock data
-            try:
-                current_real_price = cls.get_realtime_price(symbol)
-                if current_real_price and 'price' in current_real_price and current_real_price['price'] > 0:
-                    base_price = current_real_price['price']
-                else:
-                    base_price = base_map.get(symbol, 100.00)
-            except Exception:
-                base_price = base_map.get(symbol, 100.00)
-        
+            quote = cls.get_realtime_price(symbol)
+            base_price = quote['price'] if quote and quote.get('price', 0) > 0 else InstrumentRegistry.reference_price(symbol)
         except Exception:
-             return []
-            
-        # Generate data BACKWARDS from current price
-        data = []
-        current_time = datetime.utcnow()
-        current_sim_price = base_price
-        
-        for i in range(points):
-            # going backwards in time
-            date = current_time - (td * i)
-            
-            # For yesterday, price was X. Today price is current_sim_price.
-            # So yesterday = current / change.
-            # But let's simplify: 
-            # We want the LAST data point (today) to be close to base_price.
-            # So we generate prices backwards.
-            
-            # Volatility
-            change_percent = random.uniform(-0.02, 0.02)
-            prev_close = current_sim_price / (1 + change_percent)
-            
-            # OHL for the day (date)
-            # If we are walking backwards, 'current_sim_price' is the CLOSE of 'date'
-            close_price = current_sim_price
-            open_price = prev_close # Simplified
-            
-            high_price = max(open_price, close_price) * (1 + random.uniform(0, 0.01))
-            low_price = min(open_price, close_price) * (1 - random.uniform(0, 0.01))
-            
-            data.append({
-                'time': int(date.timestamp()),
-                'open': round(open_price, 2),
-                'high': round(high_price, 2),
-                'low': round(low_price, 2),
-                'close': round(close_price, 2),
-                'volume': random.randint(10000, 100000)
-            })
-            
-            current_sim_price = prev_close
+            base_price = InstrumentRegistry.reference_price(symbol)
 
-        # Reverse to get chronological order
-        return data[::-1]
-        
+        rng = np.random.default_rng(zlib.crc32(f"{symbol}|{interval}".encode()))
+        volatility = PriceSimulator.volatility_for(MarketCalendar.exchange_of(symbol))
+        bar_sigma = volatility * np.sqrt(step / SECONDS_PER_YEAR)
+
+        # Log-returns of each bar; closes are rebuilt backwards from the anchor
+        returns = rng.normal(0.0, bar_sigma, points)
+        tail = np.concatenate([np.cumsum(returns[::-1])[::-1][1:], [0.0]])
+        closes = base_price * np.exp(-tail)
+        opens = closes * np.exp(-returns)
+        wicks = rng.uniform(0.0, bar_sigma, (2, points))
 
+        end = int(now_ts // step) * step
+        return {
+            'time': end - step * np.arange(points - 1, -1, -1, dtype=np.int64),
+            'open': opens,
+            'high': np.maximum(opens, closes) * (1 + wicks[0]),
+            'low': np.minimum(opens, closes) * (1 - wicks[1]),
+            'close': closes,
+            'volume': rng.integers(10000, 100000, points)
+        }
+        
 
-    # Cache for technical analysis
-    _tech_cache = {}
-    _TECH_CACHE_TTL = 300 # 5 minutes
+    TECHNICALS_PERIOD = '3mo'   # enough daily bars for SMA 50
+    TECHNICALS_INTERVAL = '1d'
 
     @classmethod
     def get_technical_analysis(cls, symbol):
         """
-        Calculate technical indicators (SMA, RSI, MACD) for AI context
+        Technical indicators (SMA, EMA, RSI, MACD, Bollinger, ATR) for AI context
         Returns: dict with indicators or None if data unavailable
         """
-        # Check cache
-        now = datetime.utcnow().timestamp()
-        if symbol in cls._tech_cache:
-            data, expiry = cls._tech_cache[symbol]
-            if now < expiry:
-                return data
-
         try:
-            # Use yfinance for calculation
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="2mo") # Need enough data for 50 SMA
-            
-            if hist.empty or len(hist) < 50:
-                 # Check if it's a mock symbol
-                if symbol in cls.MOROCCO_SYMBOLS:
-                    # Return mock technicals which are consistent
-                     res = {
-                        'current_price': 102.50 if symbol == 'IAM' else 445.80,
-                        'sma_20': 101.20 if symbol == 'IAM' else 440.00,
-                        'sma_50': 99.50 if symbol == 'IAM' else 435.00,
-                        'rsi_14': 55.4,
-                        'trend': 'Bullish'
-                    }
-                     cls._tech_cache[symbol] = (res, now + cls._TECH_CACHE_TTL)
-                     return res
-                return None
-            
-            # Close prices
-            close = hist['Close']
-            
-            # Simple Moving Averages
-            sma_20 = close.rolling(window=20).mean().iloc[-1]
-            sma_50 = close.rolling(window=50).mean().iloc[-1]
-            
-            # RSI Calculation
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            
-            rs = gain / loss
-            rsi_14 = 100 - (100 / (1 + rs)).iloc[-1]
-            
-            res = {
-                'current_price': round(close.iloc[-1], 2),
-                'sma_20': round(sma_20, 2),
-                'sma_50': round(sma_50, 2),
-                'rsi_14': round(rsi_14, 2),
-                'trend': 'Bullish' if sma_20 > sma_50 else 'Bearish'
-            }
-            
-            # Save to cache
-            cls._tech_cache[symbol] = (res, now + cls._TECH_CACHE_TTL)
-            return res
-            
+            return cls._refresh_indicators(symbol)
         except Exception as e:
             print(f"Error calculating technicals for {symbol}: {str(e)}")
-            return None
-        
+            # Last computed values are still better than nothing
+            return IndicatorEngine.get(symbol, cls.TECHNICALS_INTERVAL)
+
     @classmethod
-    def get_market_news(cls):
+    def get_batch_technicals(cls, symbols):
+        """Technical indicators for a whole watchlist"""
+        # Refresh every symbol in parallel; late ones keep their last values
+        UpstreamFetcher.gather(cls._refresh_indicators, list(dict.fromkeys(symbols)))
+        return IndicatorEngine.evaluate(symbols, cls.TECHNICALS_INTERVAL)
+
+    @classmethod
+    def _refresh_indicators(cls, symbol):
         """
-        Get latest market news (Mock implementation)
-        Returns: list of news items
+        Feed the indicator state from the bar store. Bars are only pushed when
+        the stored series was refreshed, so repeated calls cost a dict lookup.
         """
-        # ... (rest of method remains same)
-        import random
-        
-        current_time = datetime.utcnow()
-        
-        headlines = [
-            ("Bitcoin franchit un nouveau seuil de résistance", "Crypto", "positive"),
-            ("Le Nasdaq en hausse grâce aux résultats de la tech", "Stocks", "positive"),
-            ("La FED annonce une pause dans la hausse des taux", "Economy", "neutral"),
-            ("Maroc Telecom : Résultats trimestriels encourageants", "BVC", "positive"),
-            ("Tesla : Nouvelles livraisons record en Chine", "Stocks", "positive"),
-            ("Inflation : Les chiffres sont meilleurs que prévu", "Economy", "positive"),
-            ("Le pétrole chute suite aux tensions géopolitiques", "Commodities", "negative"),
-            ("Attijariwafa Bank lance un nouveau service digital", "BVC", "positive"),
-            ("Apple prépare le lancement de son nouveau casque VR", "Stocks", "neutral"),
-            ("L'Ethereum complète sa mise à jour technique", "Crypto", "positive")
-        ]
-        
-        news = []
-        # Randomly select 5-7 news items
-        selected_news = random.sample(headlines, k=random.randint(5, 7))
-        
-        for i, (title, category, sentiment) in enumerate(selected_news):
-            # Generate realistic timestamp (within last 24h)
-            time_offset = random.randint(5, 1440)
-            news_time = current_time - timedelta(minutes=time_offset)
-            
-            news.append({
-                'id': i + 1,
-                'title': title,
-                'category': category,
-                'sentiment': sentiment,
-                'timestamp': news_time.isoformat(),
-                'source': 'TradeSense News'
-            })
-            
-        # Sort by timestamp (newest first)
-        news.sort(key=lambda x: x['timestamp'], reverse=True)
+        interval = cls.TECHNICALS_INTERVAL
+        if cls.get_asset_class(symbol) == 'morocco':
+            # Mock series are regenerated around the live price: rebuild the state
+            columns, generated_at = cls._get_cached_mock_columns(symbol, cls.TECHNICALS_PERIOD, interval, datetime.utcnow())
+            return IndicatorEngine.ingest(symbol, interval, columns, version=generated_at, reset=True)
+
+        columns = cls._get_bar_columns(symbol, cls.TECHNICALS_PERIOD, interval)
+        series = BarStore.get(symbol, interval)
+        return IndicatorEngine.ingest(symbol, interval, columns, version=series.fetched_at)
         
-        return news
+    @classmethod
+    def get_market_news(cls, limit=20):
+        """
+        Get latest market news from the news store
+        Returns: list of news items (newest first)
+        """
+        items, _ = NewsStore.query(limit=limit)
+        return items
+
+    @classmethod
+    def get_news_page(cls, symbol=None, category=None, sentiment=None, limit=20, cursor=None):
+        """Filtered page of news; returns (items, next_cursor)"""
+        return NewsStore.query(symbol=symbol, category=category, sentiment=sentiment, limit=limit, cursor=cursor)
+
+    @classmethod
+    def get_relevant_news(cls, symbol, limit=3):
+        """News about a symbol, completed with its market category and the economy"""
+        categories = [CATEGORY_BY_ASSET_CLASS.get(cls.get_asset_class(symbol), 'Stocks'), 'Economy']
+        return NewsStore.relevant(symbol, categories, limit)
 
 
 # Convenience function for direct import
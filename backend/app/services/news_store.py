@@ -0,0 +1,393 @@
+"""
+TradeSense AI - News Store
+Deduplicated market news with symbol/category/sentiment indexes
+"""
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from heapq import merge
+from lxml import etree
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+
+# Headlines used when no external source is configured
+DEFAULT_HEADLINES = [
+    ("Bitcoin franchit un nouveau seuil de résistance", "Crypto", "positive"),
+    ("Le Nasdaq en hausse grâce aux résultats de la tech", "Stocks", "positive"),
+    ("La FED annonce une pause dans la hausse des taux", "Economy", "neutral"),
+    ("Maroc Telecom : Résultats trimestriels encourageants", "BVC", "positive"),
+    ("Tesla : Nouvelles livraisons record en Chine", "Stocks", "positive"),
+    ("Inflation : Les chiffres sont meilleurs que prévu", "Economy", "positive"),
+    ("Le pétrole chute suite aux tensions géopolitiques", "Commodities", "negative"),
+    ("Attijariwafa Bank lance un nouveau service digital", "BVC", "positive"),
+    ("Apple prépare le lancement de son nouveau casque VR", "Stocks", "neutral"),
+    ("L'Ethereum complète sa mise à jour technique", "Crypto", "positive")
+]
+
+# Company / asset names that identify a symbol in a headline
+SYMBOL_ALIASES = {
+    'bitcoin': 'BTC-USD', 'btc': 'BTC-USD',
+    'ethereum': 'ETH-USD', 'eth': 'ETH-USD',
+    'apple': 'AAPL', 'tesla': 'TSLA', 'google': 'GOOGL', 'alphabet': 'GOOGL', 'microsoft': 'MSFT',
+    'gold': 'GC=F', 'silver': 'SI=F', 'eur/usd': 'EURUSD=X'
+}
+
+CATEGORY_BY_ASSET_CLASS = {'crypto': 'Crypto', 'us': 'Stocks', 'morocco': 'BVC', 'fx': 'Commodities'}
+
+
+class StaticHeadlineSource:
+    """Built-in headlines with stable timestamps (first seen minus a fixed offset)"""
+
+    name = 'TradeSense News'
+
+    def fetch(self):
+        now = datetime.now(timezone.utc)
+        for title, category, sentiment in DEFAULT_HEADLINES:
+            offset = 5 + zlib.crc32(title.encode()) % 1435  # minutes, within the last 24h
+            yield {
+                'title': title,
+                'category': category,
+                'sentiment': sentiment,
+                'timestamp': now - timedelta(minutes=offset),
+                'source': self.name
+            }
+
+
+class JSONFileSource:
+    """JSON file holding a list of {title, category?, sentiment?, timestamp?, symbols?, url?}"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+
+    def fetch(self):
+        with open(self.path, encoding='utf-8') as f:
+            items = json.load(f)
+        for item in items:
+            yield dict(item, source=item.get('source', self.name))
+
+
+class RSSSource:
+    """RSS 2.0 feed from a local file or an http(s) URL (fetched through the upstream layer)"""
+
+    def __init__(self, location, timeout=5):
+        self.location = location
+        self.name = location
+        self.timeout = timeout
+
+    def fetch(self):
+        if self.location.startswith(('http://', 'https://')):
+            import requests
+            from app.services.upstream import UpstreamFetcher
+            response = UpstreamFetcher.call('news', requests.get, self.location, timeout=self.timeout)
+            if response is None or not response.ok:
+                return
+            root = etree.fromstring(response.content)
+        else:
+            root = etree.parse(self.location).getroot()
+
+        channel = root.findtext('channel/title') or self.name
+        for node in root.iter('item'):
+            published = node.findtext('pubDate')
+            yield {
+                'title': (node.findtext('title') or '').strip(),
+                'category': node.findtext('category'),
+                'timestamp': published,
+                'url': node.findtext('link'),
+                'source': channel
+            }
+
+
+def _contains(keys, key):
+    """Membership in a sorted list"""
+    position = bisect_left(keys, key)
+    return position < len(keys) and keys[position] == key
+
+
+def source_from_location(location):
+    """Pick a source implementation from a configured path or URL"""
+    return JSONFileSource(location) if location.lower().endswith('.json') else RSSSource(location)
+
+
+class NewsStore:
+    """
+    News items deduplicated by normalized title (or URL) and indexed by
+    symbol, category and sentiment.
+
+    Every index entry is a posting list of (-epoch, id) keys kept in time
+    order, so a filtered page is a bisect to the cursor plus a walk of the
+    shortest list, never a sort. Items live for `ttl` seconds. Pages are
+    ordered newest first and addressed with an opaque cursor, so clients page
+    through a stable list even while new items arrive. Sources are polled at
+    most every `refresh_interval`, outside the lock readers take.
+    """
+
+    _sources = [StaticHeadlineSource()]
+    _ttl = 48 * 3600
+    _refresh_interval = 300
+    _last_refresh = 0.0
+    _lock = threading.RLock()
+    _refresh_lock = threading.Lock()    # one poller at a time, readers never wait on it
+
+    _items = {}                         # id -> item
+    _epochs = {}                        # id -> published (epoch seconds)
+    _order = []                         # sorted (-epoch, id), newest first
+    _by_symbol = defaultdict(list)      # symbol -> sorted (-epoch, id)
+    _by_category = defaultdict(list)
+    _by_sentiment = defaultdict(list)
+    _version = 0
+
+    @classmethod
+    def configure(cls, sources=None, ttl=48 * 3600, refresh_interval=300):
+        """sources: list of source objects or paths/URLs (empty = built-in headlines)"""
+        with cls._lock:
+            sources = [source_from_location(s) if isinstance(s, str) else s for s in (sources or [])]
+            cls._sources = sources or [StaticHeadlineSource()]
+            cls._ttl = ttl
+            cls._refresh_interval = refresh_interval
+            cls._last_refresh = 0.0
+            cls._clear()
+
+    @classmethod
+    def refresh(cls, force=False):
+        """Poll every source and index new items; returns the number added"""
+        now = time.time()
+        if not force and now - cls._last_refresh < cls._refresh_interval:
+            return 0
+        if not cls._refresh_lock.acquire(blocking=False):
+            return 0  # another thread is polling; serve the current items
+        try:
+            if not force and now - cls._last_refresh < cls._refresh_interval:
+                return 0
+            cls._last_refresh = now
+            # Network reads happen here, without the readers' lock
+            fetched = []
+            for source in cls._sources:
+                try:
+                    fetched.extend(source.fetch())
+                except Exception as e:
+                    print(f"Error reading news source {getattr(source, 'name', source)}: {str(e)}")
+
+            with cls._lock:
+                added = sum(cls._add(raw, now) for raw in fetched)
+                cls._expire(now)
+                if added:
+                    cls._version += 1
+                return added
+        finally:
+            cls._refresh_lock.release()
+
+    @classmethod
+    def query(cls, symbol=None, category=None, sentiment=None, limit=20, cursor=None):
+        """
+        Newest-first page of items matching every given filter
+        Returns: (items, next_cursor or None)
+        """
+        cls.refresh()
+        with cls._lock:
+            postings = cls._postings(symbol, category, sentiment)
+            after = cls._decode_cursor(cursor) if cursor else None
+            keys = cls._page(postings, after, limit + 1)
+            page = keys[:limit]
+            next_cursor = cls._encode_cursor(page[-1]) if len(keys) > limit else None
+            return [dict(cls._items[item_id]) for _, item_id in page], next_cursor
+
+    @classmethod
+    def relevant(cls, symbol, categories=(), limit=3):
+        """Newest items about a symbol first, then from its categories (for AI prompts)"""
+        cls.refresh()
+        with cls._lock:
+            direct = cls._by_symbol.get(symbol, [])[:max(limit, 0)]
+            keys = list(direct)
+            seen = {item_id for _, item_id in direct}
+            related = merge(*(cls._by_category.get(category, []) for category in set(categories)))
+            for key in related:
+                if len(keys) >= limit:
+                    break
+                if key[1] not in seen:
+                    seen.add(key[1])
+                    keys.append(key)
+            return [dict(cls._items[item_id]) for _, item_id in keys]
+
+    @classmethod
+    def version(cls):
+        """Changes whenever items are added or expire (used for ETags)"""
+        cls.refresh()
+        return cls._version
+
+    @classmethod
+    def stats(cls):
+        return {
+            'items': len(cls._items),
+            'symbols': len(cls._by_symbol),
+            'sources': len(cls._sources),
+            'version': cls._version,
+            'last_refresh': cls._last_refresh
+        }
+
+    @classmethod
+    def _add(cls, raw, now):
+        title = (raw.get('title') or '').strip()
+        if not title:
+            return 0
+        item_id = cls._item_id(raw.get('url') or title)
+        if item_id in cls._items:
+            return 0
+
+        published = cls._parse_time(raw.get('timestamp')) or now
+        if now - published > cls._ttl:
+            return 0
+        symbols = set(raw.get('symbols') or []) | cls._tag_symbols(title)
+        category = raw.get('category') or cls._infer_category(symbols)
+        sentiment = raw.get('sentiment') if raw.get('sentiment') in SENTIMENTS else 'neutral'
+
+        item = {
+            'id': item_id,
+            'title': title,
+            'category': category,
+            'sentiment': sentiment,
+            'symbols': sorted(symbols),
+            'timestamp': datetime.utcfromtimestamp(published).isoformat(),
+            'source': raw.get('source', 'TradeSense News')
+        }
+        if raw.get('url'):
+            item['url'] = raw['url']
+
+        key = (-published, item_id)
+        cls._items[item_id] = item
+        cls._epochs[item_id] = published
+        insort(cls._order, key)
+        for symbol in symbols:
+            insort(cls._by_symbol[symbol], key)
+        insort(cls._by_category[category], key)
+        insort(cls._by_sentiment[sentiment], key)
+        return 1
+
+    @classmethod
+    def _expire(cls, now):
+        """Drop items older than the TTL from the tail of the time order"""
+        expired = 0
+        while cls._order and now + cls._order[-1][0] > cls._ttl:
+            key = cls._order.pop()
+            item = cls._items.pop(key[1])
+            del cls._epochs[key[1]]
+            for symbol in item['symbols']:
+                cls._discard(cls._by_symbol, symbol, key)
+            cls._discard(cls._by_category, item['category'], key)
+            cls._discard(cls._by_sentiment, item['sentiment'], key)
+            expired += 1
+        if expired:
+            cls._version += 1
+
+    @classmethod
+    def _postings(cls, symbol, category, sentiment):
+        """Posting lists of the given filters, shortest first (all items when unfiltered)"""
+        lists = []
+        if symbol:
+            lists.append(cls._by_symbol.get(symbol, []))
+        if category:
+            lists.append(cls._by_category.get(category, []))
+        if sentiment:
+            lists.append(cls._by_sentiment.get(sentiment, []))
+        return sorted(lists, key=len) if lists else [cls._order]
+
+    @staticmethod
+    def _page(postings, after, count):
+        """
+        First `count` keys after the cursor present in every posting list:
+        walk the shortest list from the cursor, bisect the others
+        """
+        shortest, others = postings[0], postings[1:]
+        start = bisect_right(shortest, after) if after is not None else 0
+        if not others:
+            return shortest[start:start + count]
+        keys = []
+        for key in shortest[start:]:
+            if all(_contains(other, key) for other in others):
+                keys.append(key)
+                if len(keys) == count:
+                    break
+        return keys
+
+    @classmethod
+    def _tag_symbols(cls, title):
+        """Symbols mentioned in a headline (tickers, company and asset names)"""
+        from app.services.market_data import MarketDataService
+
+        text = title.lower()
+        words = set(re.findall(r"[\w/.=-]+", text))
+        symbols = {symbol for alias, symbol in SYMBOL_ALIASES.items() if alias in words}
+        for symbol in MarketDataService.US_CRYPTO_SYMBOLS + MarketDataService.FOREX + MarketDataService.COMMODITIES:
+            if symbol.lower() in words or symbol.split('-')[0].lower() in words:
+                symbols.add(symbol)
+        for symbol, name in MarketDataService.MOROCCO_SYMBOLS.items():
+            if name.lower() in text:
+                symbols.add(symbol)
+        return symbols
+
+    @classmethod
+    def _infer_category(cls, symbols):
+        from app.services.market_data import MarketDataService
+        for symbol in sorted(symbols):
+            return CATEGORY_BY_ASSET_CLASS.get(MarketDataService.get_asset_class(symbol), 'Economy')
+        return 'Economy'
+
+    @staticmethod
+    def _item_id(key):
+        normalized = re.sub(r'\W+', ' ', key.lower()).strip()
+        return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def _parse_time(value):
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, datetime):
+            return value.timestamp() if value.tzinfo else value.replace(tzinfo=timezone.utc).timestamp()
+        try:
+            from dateutil import parser
+            parsed = parser.parse(value)
+        except (ValueError, OverflowError, TypeError):
+            return None
+        return parsed.timestamp() if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc).timestamp()
+
+    @staticmethod
+    def _encode_cursor(key):
+        return base64.urlsafe_b64encode(f"{key[0]!r}|{key[1]}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            epoch, item_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+            return (float(epoch), item_id)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def _discard(index, name, key):
+        keys = index.get(name)
+        if keys is not None:
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+            if not keys:
+                del index[name]
+
+    @classmethod
+    def _clear(cls):
+        cls._items = {}
+        cls._epochs = {}
+        cls._order = []
+        cls._by_symbol = defaultdict(list)
+        cls._by_category = defaultdict(list)
+        cls._by_sentiment = defaultdict(list)
+        cls._version += 1
@@ -0,0 +1,138 @@
+"""
+TradeSense AI - Live Price Cache
+Thread-safe LRU/TTL cache with single-flight upstream fetches
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class _Flight:
+    """An upstream fetch in progress that other callers can wait on"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PriceCache:
+    """
+    Bounded price cache shared by request threads and background workers.
+
+    Entries are fresh for `ttl` seconds; stale entries stay readable through
+    peek() (the simulation walks from the last known price) until they are
+    older than `stale_ttl` or pushed out by LRU eviction.
+    """
+
+    def __init__(self, ttl, max_entries=2048, stale_ttl=3600):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stampedes': 0, 'fetches': 0, 'evictions': 0}
+
+    def get(self, key, now=None):
+        """Return the fresh value for key or None"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+            return None
+
+    def peek(self, key, now=None):
+        """Return the last known value for key, fresh or stale, without counting"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.stale_ttl:
+                return entry[0]
+            return None
+
+    def set(self, key, value, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._store(key, value, now)
+
+    def set_many(self, values, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for key, value in values.items():
+                self._store(key, value, now)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the fresh value for key, calling fetch() on a miss.
+        Concurrent misses on the same key share a single fetch.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+
+            self._stats['misses'] += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats['fetches'] += 1
+            else:
+                self._stats['stampedes'] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+            if flight.value:
+                self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def items(self):
+        """Snapshot of (key, value, stored_at) for every entry"""
+        with self._lock:
+            return [(key, value, stored_at) for key, (value, stored_at) in self._entries.items()]
+
+    def stats(self):
+        with self._lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                inflight=len(self._inflight),
+                hit_rate=round(self._stats['hits'] / total * 100, 2) if total else 0
+            )
+
+    def _store(self, key, value, now):
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+
+        # Drop expired entries from the cold end, then enforce the size bound
+        while self._entries:
+            oldest_key, (_, stored_at) = next(iter(self._entries.items()))
+            if now - stored_at < self.stale_ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[oldest_key]
+            self._stats['evictions'] += 1
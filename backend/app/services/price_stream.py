@@ -0,0 +1,102 @@
+"""
+TradeSense AI - Price Streaming
+Server-sent events fan-out of the shared tick tape
+"""
+import json
+import threading
+import time
+
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+from app.services.tick_producer import TickProducer
+
+
+class PriceStream:
+    """
+    Per-client SSE generators reading from the single tick producer.
+
+    EventSource cannot send headers, so a stream is opened with a short-lived
+    stream token in the query string instead of the access token: it is
+    signed for this purpose only and is useless against the other routes.
+    """
+
+    TOKEN_SALT = 'price-stream'
+
+    _lock = threading.Lock()
+    _clients = 0
+    _events_sent = 0
+
+    @classmethod
+    def events(cls, symbols, max_rate=4.0, heartbeat=15, max_duration=300):
+        """
+        Yield SSE frames for a subscription.
+
+        The first frame is a full snapshot (with market status); afterwards
+        only symbols whose quote changed are sent, at most `max_rate` frames
+        per second. Ticks arriving in between are coalesced into the next
+        frame. The stream ends after `max_duration` seconds and the browser's
+        EventSource reconnects on its own.
+        """
+        from app.services.quote_engine import BatchQuoteEngine
+
+        min_interval = 1.0 / max_rate
+        started = time.monotonic()
+        with cls._lock:
+            cls._clients += 1
+
+        try:
+            snapshot = BatchQuoteEngine.resolve(symbols)
+            last_sent = {symbol: (quote['price'], quote['change_percent']) for symbol, quote in snapshot.items()}
+            yield "retry: 3000\n"
+            yield cls._frame('snapshot', snapshot)
+
+            tick = TickProducer.wait_for_tick(-1, 0)
+            last_frame = time.monotonic()
+            while time.monotonic() - started < max_duration:
+                tick = TickProducer.wait_for_tick(tick, heartbeat)
+
+                # Rate limit: coalesce every tick received until the next slot
+                wait = min_interval - (time.monotonic() - last_frame)
+                if wait > 0:
+                    time.sleep(wait)
+                    tick = TickProducer.wait_for_tick(tick, 0)
+
+                changed = {}
+                for symbol, quote in TickProducer.latest_many(symbols).items():
+                    state = (quote['price'], quote['change_percent'])
+                    if last_sent.get(symbol) != state:
+                        last_sent[symbol] = state
+                        changed[symbol] = quote
+
+                if changed:
+                    yield cls._frame('prices', changed)
+                    last_frame = time.monotonic()
+                elif time.monotonic() - last_frame >= heartbeat:
+                    yield ": keep-alive\n\n"
+                    last_frame = time.monotonic()
+        finally:
+            with cls._lock:
+                cls._clients -= 1
+
+    @classmethod
+    def issue_token(cls, secret, user_id):
+        """Signed token allowing `user_id` to open a stream"""
+        return URLSafeTimedSerializer(secret, salt=cls.TOKEN_SALT).dumps(str(user_id))
+
+    @classmethod
+    def verify_token(cls, secret, token, max_age):
+        """User id of a stream token younger than `max_age` seconds, or None"""
+        try:
+            return URLSafeTimedSerializer(secret, salt=cls.TOKEN_SALT).loads(token, max_age=max_age)
+        except BadSignature:
+            return None
+
+    @classmethod
+    def stats(cls):
+        return {'clients': cls._clients, 'events_sent': cls._events_sent}
+
+    @classmethod
+    def _frame(cls, event, payload):
+        with cls._lock:
+            cls._events_sent += 1
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
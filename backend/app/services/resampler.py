@@ -0,0 +1,92 @@
+"""
+TradeSense AI - Bar Resampling
+Coarser OHLCV candles derived from one stored base series
+"""
+import numpy as np
+import threading
+
+from app.services.bar_store import FIELDS
+from app.services.market_calendar import MarketCalendar
+
+
+DAY = 86400
+# 1970-01-01 was a Thursday; weekly candles start on Monday
+WEEK_OFFSET = 3 * DAY
+
+
+def bucket_keys(times, interval, seconds, exchange=None):
+    """
+    Start time of the candle each bar falls into
+    Intraday candles of session exchanges (NYSE, BVC) are counted from the
+    session open (9:30 ET, not :00 UTC), other markets from the epoch.
+    """
+    if interval == '1wk':
+        return (times + WEEK_OFFSET) // (7 * DAY) * (7 * DAY) - WEEK_OFFSET
+    if interval in ('1mo', '3mo'):
+        months = times.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        if interval == '3mo':
+            months = months // 3 * 3
+        return months.astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+    if seconds < DAY and exchange is not None:
+        opens = MarketCalendar.session_opens(exchange, times)
+        if opens is not None:
+            return opens + (times - opens) // seconds * seconds
+    return times // seconds * seconds
+
+
+def resample(columns, interval, seconds, exchange=None):
+    """
+    Aggregate sorted bars into candles in one vectorized pass
+    (first open, max high, min low, last close, summed volume per bucket).
+    """
+    times = np.asarray(columns['time'])
+    if not len(times):
+        return {field: np.empty(0, dtype=dtype) for field, dtype in FIELDS.items()}
+
+    keys = bucket_keys(times, interval, seconds, exchange)
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+    return {
+        'time': keys[starts],
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': np.asarray(columns['close'])[ends],
+        'volume': np.add.reduceat(columns['volume'], starts)
+    }
+
+
+class Resampler:
+    """Memoized candles per (symbol, interval), recomputed only when the base series changes"""
+
+    _memo = {}
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def get(cls, symbol, interval, seconds, series, start=None):
+        """Candles of `series` at `interval`, sliced from `start` (views into the memo)"""
+        key = (symbol, interval, series.path)
+        exchange = MarketCalendar.exchange_of(symbol)
+        version = (series.generation, series.length, series.fetched_at)
+        entry = cls._memo.get(key)
+        if entry is not None and entry[0] == version:
+            cls._hits += 1
+            columns = entry[1]
+        else:
+            cls._misses += 1
+            columns = resample(series.view(), interval, seconds, exchange)
+            with cls._lock:
+                cls._memo[key] = (version, columns)
+
+        if start is None:
+            return columns
+        # Keep the candle that contains `start`
+        first = bucket_keys(np.array([start], dtype=np.int64), interval, seconds, exchange)[0]
+        lo = int(np.searchsorted(columns['time'], first, side='left'))
+        return {field: values[lo:] for field, values in columns.items()}
+
+    @classmethod
+    def stats(cls):
+        return {'entries': len(cls._memo), 'hits': cls._hits, 'misses': cls._misses}
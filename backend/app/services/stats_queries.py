@@ -0,0 +1,135 @@
+"""
+TradeSense AI - Stats Queries
+Aggregation pipelines that return only the aggregates, never the documents
+"""
+from app.extensions import mongo
+
+# Realized P/L of a trade (missing on old documents)
+PROFIT_LOSS = {'$ifNull': ['$profit_loss', 0]}
+# When a trade's P/L was realized (orders closed before closed_at existed fall back to their open time)
+CLOSED_AT = {'$ifNull': ['$closed_at', '$timestamp']}
+
+
+class StatsQueries:
+    """
+    Counting and summing pushed down to MongoDB: each method is one
+    aggregation round trip returning a handful of numbers, whatever the
+    number of trades or challenges behind them.
+    """
+
+    @staticmethod
+    def _by_key(rows):
+        return {row['_id']: row['count'] for row in rows if row['_id'] is not None}
+
+    @classmethod
+    def challenge_counts(cls, user_id=None):
+        """
+        Challenges by status and by plan in one $facet (all users when user_id is None)
+        Returns: dict with total, status {status: n} and plans {plan_type: n}
+        """
+        pipeline = [{'$match': {'user_id': user_id}}] if user_id is not None else []
+        pipeline.append({'$facet': {
+            'status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}],
+            'plans': [{'$group': {'_id': '$plan_type', 'count': {'$sum': 1}}}]
+        }})
+        result = next(iter(mongo.db.challenges.aggregate(pipeline)), {'status': [], 'plans': []})
+        return {
+            'total': sum(row['count'] for row in result['status']),
+            'status': cls._by_key(result['status']),
+            'plans': cls._by_key(result['plans'])
+        }
+
+    @classmethod
+    def trade_summary(cls, challenge_id, untracked_only=False):
+        """
+        Closed-trade aggregates of a challenge, its P/L per close day (UTC, keyed with
+        $dateToString so it runs on servers older than MongoDB 5.0) and per liquidation
+        untracked_only: only trades closed before closes were counted into challenge_stats
+        Returns: dict with trade_count, wins, losses, gross_profit, gross_loss,
+        daily [('YYYY-MM-DD', pl), ...] in day order and
+        closes [(closed_at, pl), ...] (one per close batch) in time order
+        """
+        is_win = {'$gt': [PROFIT_LOSS, 0]}
+        criteria = {'challenge_id': challenge_id, 'is_open': False}
+        if untracked_only:
+            criteria['stats_tracked'] = {'$ne': True}
+        pipeline = [
+            {'$match': criteria},
+            {'$facet': {
+                'totals': [{'$group': {
+                    '_id': None,
+                    'trade_count': {'$sum': 1},
+                    'wins': {'$sum': {'$cond': [is_win, 1, 0]}},
+                    'gross_profit': {'$sum': {'$cond': [is_win, PROFIT_LOSS, 0]}},
+                    'gross_loss': {'$sum': {'$cond': [is_win, 0, {'$multiply': [PROFIT_LOSS, -1]}]}}
+                }}],
+                'daily': [
+                    {'$group': {
+                        '_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': CLOSED_AT}},
+                        'pl': {'$sum': PROFIT_LOSS}
+                    }},
+                    {'$sort': {'_id': 1}}
+                ],
+                'closes': [
+                    {'$group': {
+                        '_id': {'$ifNull': ['$close_batch', '$_id']},
+                        'closed_at': {'$max': CLOSED_AT},
+                        'pl': {'$sum': PROFIT_LOSS}
+                    }},
+                    {'$sort': {'closed_at': 1, '_id': 1}}
+                ]
+            }}
+        ]
+        result = next(iter(mongo.db.trades.aggregate(pipeline)), {'totals': [], 'daily': [], 'closes': []})
+        totals = result['totals'][0] if result['totals'] else {
+            'trade_count': 0, 'wins': 0, 'gross_profit': 0.0, 'gross_loss': 0.0
+        }
+        return {
+            'trade_count': totals['trade_count'],
+            'wins': totals['wins'],
+            'losses': totals['trade_count'] - totals['wins'],
+            'gross_profit': float(totals['gross_profit']),
+            'gross_loss': float(totals['gross_loss']),
+            'daily': [(row['_id'], float(row['pl'])) for row in result['daily']],
+            'closes': [(row['closed_at'], float(row['pl'])) for row in result['closes']]
+        }
+
+    @staticmethod
+    def closed_until(until):
+        """
+        Filter of trades closed at or before `until`, dated like CLOSED_AT
+        (indexable: closed_timeline, or challenge_timeline for older orders)
+        """
+        return {'is_open': False, '$or': [
+            {'closed_at': {'$lte': until}},
+            {'closed_at': None, 'timestamp': {'$lte': until}}
+        ]}
+
+    @classmethod
+    def realized_pl(cls, challenge_id, until=None):
+        """Sum of realized P/L of a challenge's trades (closed at or before `until` when given)"""
+        criteria = {'challenge_id': challenge_id}
+        if until is not None:
+            criteria.update(cls.closed_until(until))
+        rows = list(mongo.db.trades.aggregate([
+            {'$match': criteria},
+            {'$group': {'_id': None, 'pl': {'$sum': PROFIT_LOSS}}}
+        ]))
+        return float(rows[0]['pl']) if rows else 0.0
+
+    @classmethod
+    def realized_pl_by_challenge(cls, challenge_ids, until=None):
+        """
+        Realized P/L of many challenges in one $group (closed at or before `until` when given)
+        Returns: dict challenge_id -> pl (challenges without trades are absent)
+        """
+        if not challenge_ids:
+            return {}
+        criteria = {'challenge_id': {'$in': list(challenge_ids)}}
+        if until is not None:
+            criteria.update(cls.closed_until(until))
+        rows = mongo.db.trades.aggregate([
+            {'$match': criteria},
+            {'$group': {'_id': '$challenge_id', 'pl': {'$sum': PROFIT_LOSS}}}
+        ])
+        return {row['_id']: float(row['pl']) for row in rows}
@@ -0,0 +1,273 @@
+"""
+TradeSense AI - Tick Producer
+Single background clock that advances every active simulated price
+"""
+import numpy as np
+from datetime import datetime
+import threading
+import time
+
+from app.services.instruments import InstrumentRegistry
+from app.services.market_calendar import MarketCalendar
+from app.services.price_simulator import PriceSimulator
+
+
+class TickProducer:
+    """
+    Advances all active symbols on a fixed cadence into shared ring buffers.
+
+    Every symbol owns one row of the preallocated price/change matrices and all
+    rows share the same clock, so reading the latest quote is a single slot
+    lookup and every client sees the same tape.
+    """
+
+    CADENCE = 0.25          # seconds between ticks
+    RING_SIZE = 1024        # ticks kept per symbol (~4 minutes at 250ms)
+    MAX_SYMBOLS = 4096
+    IDLE_TIMEOUT = 300      # stop advancing symbols nobody read for 5 minutes
+    INITIAL_CAPACITY = 64
+
+    EXCHANGES = ['NYSE', 'BVC', 'FX', 'CRYPTO']
+
+    _lock = threading.Lock()
+    _tick_cond = threading.Condition()
+    _thread = None
+    _simulator = None
+
+    _rows = {}          # symbol -> row
+    _symbols = []       # row -> symbol
+    _meta = []          # row -> static quote fields
+    _prices = np.zeros((INITIAL_CAPACITY, RING_SIZE))
+    _changes = np.zeros((INITIAL_CAPACITY, RING_SIZE))
+    _sigma = np.zeros(INITIAL_CAPACITY)          # annualized volatility
+    _exchange = np.zeros(INITIAL_CAPACITY)       # index into EXCHANGES
+    _anchor = np.zeros(INITIAL_CAPACITY)         # price the change is measured from
+    _base_change = np.zeros(INITIAL_CAPACITY)    # change_percent of the anchor quote
+    _last_read = np.zeros(INITIAL_CAPACITY)
+    _times = np.zeros(RING_SIZE)
+    _head = 0
+    _ticks = 0
+
+    @classmethod
+    def configure(cls, seed=None, model='gbm'):
+        """Install a seeded simulation engine (call before the first tick)"""
+        with cls._lock:
+            cls._simulator = PriceSimulator(seed=seed, model=model, tick_seconds=cls.CADENCE)
+
+    @classmethod
+    def latest(cls, symbol):
+        """O(1) read of the latest tick for an active symbol, or None"""
+        row = cls._rows.get(symbol)
+        if row is None:
+            return None
+        cls._last_read[row] = time.time()
+        return cls._quote(row, cls._head)
+
+    @classmethod
+    def latest_many(cls, symbols, touch=True):
+        """
+        Latest ticks for every already registered symbol of the list
+        touch=False reads without keeping the symbols active (snapshots, metrics)
+        """
+        head = cls._head
+        now = time.time()
+        quotes = {}
+        for symbol in symbols:
+            row = cls._rows.get(symbol)
+            if row is not None:
+                if touch:
+                    cls._last_read[row] = now
+                quotes[symbol] = cls._quote(row, head)
+        return quotes
+
+    @classmethod
+    def last_prices(cls, symbols, touch=False):
+        """
+        Raw latest price per registered symbol, without building quotes
+        touch=True keeps the symbols advancing like a client read
+        """
+        head = cls._head
+        rows = cls._rows
+        prices = {}
+        now = time.time()
+        for symbol in symbols:
+            row = rows.get(symbol)
+            if row is not None:
+                if touch:
+                    cls._last_read[row] = now
+                prices[symbol] = float(cls._prices[row, head])
+        return prices
+
+    @classmethod
+    def wait_for_tick(cls, after, timeout=None):
+        """Block until the tick counter moves past `after`; returns the current counter"""
+        with cls._tick_cond:
+            cls._tick_cond.wait_for(lambda: cls._ticks > after, timeout)
+            return cls._ticks
+
+    @classmethod
+    def recent(cls, symbol, count=60):
+        """Last `count` ticks of a symbol as (time, price) pairs, oldest first"""
+        row = cls._rows.get(symbol)
+        if row is None:
+            return []
+        head = cls._head
+        count = min(count, cls.RING_SIZE, cls._ticks + 1)
+        slots = (np.arange(head - count + 1, head + 1)) % cls.RING_SIZE
+        return list(zip(cls._times[slots].tolist(), cls._prices[row, slots].tolist()))
+
+    @classmethod
+    def activate(cls, seeds, touch=True):
+        """
+        Register symbols with their anchor quote and start the clock
+        seeds: dict symbol -> quote dict (price, change_percent, ...)
+        touch=False re-anchors existing symbols without keeping them active
+        """
+        now = time.time()
+        with cls._lock:
+            for symbol, seed in seeds.items():
+                if not seed or not seed.get('price'):
+                    continue
+                row = cls._rows.get(symbol)
+                is_new = row is None
+                if is_new:
+                    row = cls._allocate_row(symbol)
+                exchange = MarketCalendar.exchange_of(symbol)
+                cls._prices[row, :] = seed['price']
+                cls._changes[row, :] = seed.get('change_percent', 0)
+                cls._anchor[row] = seed['price']
+                cls._base_change[row] = seed.get('change_percent', 0)
+                cls._sigma[row] = PriceSimulator.volatility_for(exchange)
+                cls._exchange[row] = cls.EXCHANGES.index(exchange)
+                is_morocco = seed.get('market', '').startswith('Morocco')
+                cls._meta[row] = {'name': seed['name']} if 'name' in seed else {}
+                cls._meta[row]['morocco'] = is_morocco
+                cls._meta[row]['decimals'] = InstrumentRegistry.get(symbol).decimals
+                if touch or is_new:
+                    cls._last_read[row] = now
+                if is_new:
+                    # Published only once populated: readers never see an empty row
+                    cls._rows[symbol] = row
+            if cls._ticks == 0:
+                cls._times[:] = now
+        cls._ensure_running()
+
+    @classmethod
+    def stats(cls):
+        active = int(np.count_nonzero(time.time() - cls._last_read[:len(cls._symbols)] < cls.IDLE_TIMEOUT))
+        return {
+            'symbols': len(cls._symbols),
+            'active_symbols': active,
+            'ticks': cls._ticks,
+            'cadence': cls.CADENCE,
+            'running': bool(cls._thread and cls._thread.is_alive())
+        }
+
+    @classmethod
+    def _quote(cls, row, head):
+        symbol = cls._symbols[row]
+        meta = cls._meta[row]
+        quote = {
+            'symbol': symbol,
+            'price': round(float(cls._prices[row, head]), meta.get('decimals', 2)),
+            'timestamp': datetime.utcfromtimestamp(cls._times[head]).isoformat(),
+            'change_percent': round(float(cls._changes[row, head]), 2)
+        }
+        if meta.get('morocco'):
+            quote['name'] = meta.get('name', symbol)
+            quote['market'] = 'Morocco BVC (Sim)'
+        else:
+            is_open, _ = MarketCalendar.is_open(symbol)
+            quote['market'] = 'Live/Market' if is_open else 'Live/Simulated'
+            quote['source'] = 'synced-tick-sim'
+        return quote
+
+    @classmethod
+    def _allocate_row(cls, symbol):
+        """
+        Assign a row to a new symbol, growing or recycling storage (lock held)
+        The caller registers the row in _rows once its columns are written
+        """
+        if len(cls._symbols) >= cls.MAX_SYMBOLS:
+            # Recycle the row of the least recently read symbol
+            row = int(np.argmin(cls._last_read[:len(cls._symbols)]))
+            del cls._rows[cls._symbols[row]]
+            cls._symbols[row] = symbol
+            return row
+
+        row = len(cls._symbols)
+        if row >= cls._prices.shape[0]:
+            capacity = min(cls._prices.shape[0] * 2, cls.MAX_SYMBOLS)
+            cls._prices = cls._grow(cls._prices, capacity)
+            cls._changes = cls._grow(cls._changes, capacity)
+            cls._sigma = cls._grow(cls._sigma, capacity)
+            cls._exchange = cls._grow(cls._exchange, capacity)
+            cls._anchor = cls._grow(cls._anchor, capacity)
+            cls._base_change = cls._grow(cls._base_change, capacity)
+            cls._last_read = cls._grow(cls._last_read, capacity)
+        cls._symbols.append(symbol)
+        cls._meta.append({})
+        return row
+
+    @staticmethod
+    def _grow(array, capacity):
+        grown = np.zeros((capacity,) + array.shape[1:])
+        grown[:array.shape[0]] = array
+        return grown
+
+    @classmethod
+    def _ensure_running(cls):
+        if cls._thread and cls._thread.is_alive():
+            return
+        with cls._lock:
+            if cls._thread and cls._thread.is_alive():
+                return
+            if cls._simulator is None:
+                cls._simulator = PriceSimulator(tick_seconds=cls.CADENCE)
+            cls._thread = threading.Thread(target=cls._run, name='tick-producer', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        next_tick = time.monotonic()
+        while True:
+            next_tick += cls.CADENCE
+            try:
+                cls._advance(time.time())
+            except Exception as e:
+                print(f"Tick producer error: {str(e)}")
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (e.g. frozen serverless instance): resync the clock
+                next_tick = time.monotonic()
+
+    @classmethod
+    def _advance(cls, now):
+        """Advance every active row by one tick in a single vectorized step"""
+        with cls._lock:
+            count = len(cls._symbols)
+            if count == 0:
+                return
+            head = cls._head
+            nxt = (head + 1) % cls.RING_SIZE
+            active = (now - cls._last_read[:count]) < cls.IDLE_TIMEOUT
+
+            # Session state once per exchange, then broadcast to rows
+            exchange_open = np.array([MarketCalendar.is_exchange_open(code, now) for code in cls.EXCHANGES])
+            open_mask = exchange_open[cls._exchange[:count].astype(int)]
+
+            returns = cls._simulator.step(cls._sigma[:count], open_mask)
+            last_prices = cls._prices[:count, head]
+            prices = np.where(active, last_prices * np.exp(returns), last_prices)
+            cls._prices[:count, nxt] = prices
+            cls._changes[:count, nxt] = cls._base_change[:count] + (prices / cls._anchor[:count] - 1) * 100
+            cls._times[nxt] = now
+
+            # Publish only once the slot is fully written
+            cls._head = nxt
+            cls._ticks += 1
+
+        with cls._tick_cond:
+            cls._tick_cond.notify_all()
@@ -0,0 +1,118 @@
+"""
+TradeSense AI - Trade History
+Keyset-paginated, projected trade history streamed as JSON
+"""
+import base64
+from datetime import datetime
+import json
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.extensions import mongo
+
+
+class TradeHistory:
+    """
+    Pages through a challenge's trades newest first on (timestamp, _id).
+
+    The cursor is the key of the last row sent, so every page is one indexed
+    range scan whatever its depth, and rows are serialized straight from the
+    projected documents as MongoDB yields them.
+    """
+
+    # Columns a client may ask for ('id' is always included)
+    FIELDS = (
+        'challenge_id', 'symbol', 'action', 'quantity', 'price', 'profit_loss',
+        'is_open', 'close_price', 'notes', 'tags', 'screenshot_url', 'timestamp'
+    )
+    SORT = [('timestamp', -1), ('_id', -1)]
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Requested columns from a comma-separated list (all when empty)"""
+        if not value:
+            return cls.FIELDS
+        fields = tuple(field for field in cls.FIELDS if field in {f.strip() for f in value.split(',')})
+        if not fields:
+            raise ValueError('No valid field requested')
+        return fields
+
+    @classmethod
+    def find(cls, challenge_id, fields=FIELDS, cursor=None, limit=None, tag=None):
+        """MongoDB cursor over one page (plus one row to detect the next page)"""
+        criteria = {'challenge_id': challenge_id}
+        if tag:
+            criteria['tags'] = tag
+        if cursor:
+            timestamp, oid = cls.decode_cursor(cursor)
+            criteria['$or'] = [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': oid}}
+            ]
+        projection = dict.fromkeys(set(fields) | {'timestamp'}, 1)
+        documents = mongo.db.trades.find(criteria, projection).sort(cls.SORT)
+        if limit:
+            documents = documents.limit(limit + 1)
+        return documents
+
+    @classmethod
+    def rows(cls, challenge_id, fields=FIELDS, **kwargs):
+        """Serialized rows of a page, as a list"""
+        return [cls.serialize(doc, fields) for doc in cls.find(challenge_id, fields, **kwargs)]
+
+    @classmethod
+    def stream(cls, challenge_id, fields=FIELDS, cursor=None, limit=DEFAULT_LIMIT, tag=None):
+        """
+        JSON document of one page, yielded row by row:
+        {"challenge_id", "trades": [...], "count", "next_cursor"}
+        (no total: counting would scan the whole history again)
+        """
+        head = {'challenge_id': challenge_id}
+        yield json.dumps(head)[:-1] + ', "trades": ['
+
+        count = 0
+        last = None
+        next_cursor = None
+        for doc in cls.find(challenge_id, fields, cursor, limit, tag):
+            if count == limit:
+                next_cursor = cls.encode_cursor(last)
+                break
+            yield (',' if count else '') + json.dumps(cls.serialize(doc, fields))
+            last = doc
+            count += 1
+
+        yield '], ' + json.dumps({'count': count, 'next_cursor': next_cursor})[1:]
+
+    @staticmethod
+    def serialize(doc, fields):
+        """Projected trade document to its API form (same values as Trade.to_dict)"""
+        row = {'id': str(doc['_id'])}
+        for field in fields:
+            value = doc.get(field)
+            if field == 'timestamp' and isinstance(value, datetime):
+                value = value.isoformat()
+            elif field == 'profit_loss':
+                value = round(value or 0.0, 2)
+            elif field == 'tags':
+                value = value if isinstance(value, list) else (value.split(',') if value else [])
+            elif field == 'is_open' and value is None:
+                value = True
+            row[field] = value
+        return row
+
+    @staticmethod
+    def encode_cursor(doc):
+        timestamp = doc['timestamp']
+        timestamp = timestamp.isoformat() if isinstance(timestamp, datetime) else str(timestamp)
+        return base64.urlsafe_b64encode(f"{timestamp}|{doc['_id']}".encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            timestamp, oid = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+            return datetime.fromisoformat(timestamp), ObjectId(oid)
+        except (ValueError, InvalidId, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
@@ -0,0 +1,254 @@
+"""
+TradeSense AI - Upstream Fetch Layer
+Bounded worker pool with deadlines, circuit breakers and latency metrics
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: opens after `failure_threshold` consecutive failures,
+    lets a single trial call through after `reset_timeout` seconds (half-open)
+    and closes again on the first success.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial = False
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial = False
+
+
+class _ProviderMetrics:
+    """Counters and a window of recent latencies for one provider"""
+
+    WINDOW = 256
+
+    def __init__(self):
+        self.counters = {'calls': 0, 'successes': 0, 'failures': 0, 'timeouts': 0, 'short_circuits': 0, 'rejected': 0}
+        self.latencies = deque(maxlen=self.WINDOW)
+        self.inflight = 0
+        self.last_error = None
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+        return dict(
+            self.counters,
+            inflight=self.inflight,
+            latency_p50_ms=percentile(0.5),
+            latency_p95_ms=percentile(0.95),
+            last_error=self.last_error
+        )
+
+
+class UpstreamFetcher:
+    """
+    Runs upstream calls (yfinance, BVC scraping) on a bounded pool.
+
+    Every call has a hard deadline and goes through the provider's circuit
+    breaker. Timeouts, errors, an open breaker or a provider already using its
+    share of the pool all return the caller's fallback (usually the last
+    known value), so a slow upstream costs latency, not request threads.
+    """
+
+    MAX_WORKERS = 8
+    MAX_INFLIGHT_PER_PROVIDER = 6
+    DEFAULT_TIMEOUT = 5.0
+
+    _executor = None
+    _fanout = None
+    _lock = threading.Lock()
+    _breakers = {}
+    _metrics = {}
+    _breaker_settings = {'failure_threshold': 5, 'reset_timeout': 30}
+
+    @classmethod
+    def configure(cls, max_workers=8, timeout=5.0, failure_threshold=5, reset_timeout=30):
+        with cls._lock:
+            cls.MAX_WORKERS = max_workers
+            cls.MAX_INFLIGHT_PER_PROVIDER = max(1, max_workers * 3 // 4)
+            cls.DEFAULT_TIMEOUT = timeout
+            cls._breaker_settings = {'failure_threshold': failure_threshold, 'reset_timeout': reset_timeout}
+            cls._breakers = {}
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+
+    @classmethod
+    def call(cls, provider, fn, *args, timeout=None, fallback=None, **kwargs):
+        """Run fn(*args, **kwargs) upstream; returns its result or `fallback`"""
+        future = cls._submit(provider, fn, args, kwargs)
+        if future is None:
+            return fallback
+        try:
+            return future.result(timeout=timeout or cls.DEFAULT_TIMEOUT)
+        except FutureTimeout:
+            cls._on_timeout(provider)
+            return fallback
+        except Exception:
+            # Already counted by the worker
+            return fallback
+
+    @classmethod
+    def map(cls, provider, fn, items, timeout=None, fallback=None):
+        """
+        fn(item) for every item in parallel under one shared deadline
+        Returns: dict item -> result (fallback for failed or late items)
+        """
+        futures = {}
+        results = {}
+        for item in items:
+            future = cls._submit(provider, fn, (item,), {})
+            if future is None:
+                results[item] = fallback
+            else:
+                futures[future] = item
+
+        done, late = wait(futures, timeout=timeout or cls.DEFAULT_TIMEOUT)
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception:
+                results[futures[future]] = fallback
+        for future in late:
+            cls._on_timeout(provider)
+            results[futures[future]] = fallback
+        return results
+
+    @classmethod
+    def gather(cls, fn, items, timeout=None):
+        """
+        Run local work that itself calls upstream (e.g. per-symbol refreshes)
+        in parallel on a separate pool, so it never waits on its own workers.
+        """
+        if cls._fanout is None:
+            with cls._lock:
+                if cls._fanout is None:
+                    cls._fanout = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix='upstream-fanout')
+        futures = {cls._fanout.submit(fn, item): item for item in items}
+        done, _ = wait(futures, timeout=timeout or cls.DEFAULT_TIMEOUT)
+        results = {}
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                print(f"Upstream fan-out error for {futures[future]}: {str(e)}")
+        return results
+
+    @classmethod
+    def is_available(cls, provider):
+        """False while the provider's breaker is open"""
+        return cls._breaker(provider).state != CircuitBreaker.OPEN
+
+    @classmethod
+    def stats(cls):
+        return {
+            provider: dict(metrics.snapshot(), breaker=cls._breaker(provider).state)
+            for provider, metrics in list(cls._metrics.items())
+        }
+
+    @classmethod
+    def _submit(cls, provider, fn, args, kwargs):
+        breaker = cls._breaker(provider)
+        metrics = cls._provider_metrics(provider)
+        with cls._lock:
+            metrics.counters['calls'] += 1
+            if metrics.inflight >= cls.MAX_INFLIGHT_PER_PROVIDER:
+                # Stuck calls already hold this provider's share of the pool
+                metrics.counters['rejected'] += 1
+                return None
+        if not breaker.allow():
+            with cls._lock:
+                metrics.counters['short_circuits'] += 1
+            return None
+        with cls._lock:
+            metrics.inflight += 1
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix='upstream')
+            executor = cls._executor
+        return executor.submit(cls._run, provider, fn, args, kwargs)
+
+    @classmethod
+    def _run(cls, provider, fn, args, kwargs):
+        metrics = cls._provider_metrics(provider)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            cls._breaker(provider).record_failure()
+            with cls._lock:
+                metrics.counters['failures'] += 1
+                metrics.last_error = str(e)[:200]
+            print(f"Upstream {provider} error: {str(e)}")
+            raise
+        else:
+            cls._breaker(provider).record_success()
+            with cls._lock:
+                metrics.counters['successes'] += 1
+            return result
+        finally:
+            with cls._lock:
+                metrics.inflight -= 1
+                metrics.latencies.append(time.monotonic() - started)
+
+    @classmethod
+    def _on_timeout(cls, provider):
+        cls._breaker(provider).record_failure()
+        metrics = cls._provider_metrics(provider)
+        with cls._lock:
+            metrics.counters['timeouts'] += 1
+            metrics.last_error = 'timeout'
+
+    @classmethod
+    def _breaker(cls, provider):
+        breaker = cls._breakers.get(provider)
+        if breaker is None:
+            with cls._lock:
+                breaker = cls._breakers.setdefault(provider, CircuitBreaker(**cls._breaker_settings))
+        return breaker
+
+    @classmethod
+    def _provider_metrics(cls, provider):
+        metrics = cls._metrics.get(provider)
+        if metrics is None:
+            with cls._lock:
+                metrics = cls._metrics.setdefault(provider, _ProviderMetrics())
+        return metrics
@@ -0,0 +1,244 @@
+"""
+TradeSense AI - Position Valuation
+Vectorized mark-to-market and liquidation of a challenge's open positions
+"""
+from datetime import datetime
+
+from bson import ObjectId
+import numpy as np
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+from app.extensions import mongo
+from app.services.challenge_stats import ChallengeStats
+from app.services.instruments import InstrumentRegistry
+
+
+class PositionBook:
+    """Open positions as parallel NumPy columns, symbols factorized once"""
+
+    __slots__ = ('ids', 'symbols', 'symbol_index', 'entry', 'quantity', 'direction', 'margin')
+
+    PROJECTION = {'symbol': 1, 'action': 1, 'quantity': 1, 'price': 1, 'margin': 1}
+
+    def __init__(self, docs):
+        docs = list(docs)
+        self.ids = [doc['_id'] for doc in docs]
+        symbols = np.array([doc['symbol'] for doc in docs], dtype=object)
+        self.entry = np.array([doc['price'] for doc in docs], dtype=np.float64)
+        self.quantity = np.array([doc['quantity'] for doc in docs], dtype=np.float64)
+        self.direction = np.array(
+            [1.0 if doc['action'].lower() == 'buy' else -1.0 for doc in docs], dtype=np.float64
+        )
+        # Margin reserved on the challenge when the order was opened (0 for older orders)
+        self.margin = np.array([doc.get('margin') or 0.0 for doc in docs], dtype=np.float64)
+        if docs:
+            self.symbols, self.symbol_index = np.unique(symbols.astype(str), return_inverse=True)
+        else:
+            self.symbols, self.symbol_index = np.empty(0, dtype=str), np.empty(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, challenge_id, query=None):
+        """Open positions of a challenge (one projected query)"""
+        criteria = {'challenge_id': challenge_id, 'is_open': True}
+        if query:
+            criteria.update(query)
+        return cls(mongo.db.trades.find(criteria, cls.PROJECTION))
+
+
+class ValuationEngine:
+    """
+    One quote per distinct symbol, then floating P/L, used margin and NLV for
+    every position in a single array expression. Shared by the trading
+    routes and the challenge engine.
+
+    Writes that must land together (an order and its margin reservation, the
+    closes of a liquidation and the equity they credit) run in one
+    transaction on a replica set. A standalone mongod has no transactions:
+    they then run in sequence and the challenge sweep reconciles
+    reserved_margin from the open orders.
+    """
+
+    # Transaction support of the deployment (None until the first attempt)
+    _transactions = None
+    ILLEGAL_OPERATION = 20  # transactions on a standalone server
+
+    @classmethod
+    def marks(cls, book, quotes=None):
+        """
+        Current price per position (entry price when no quote is available)
+        `quotes` lets a caller that already resolved the book's symbols reuse them
+        """
+        from app.services.market_data import MarketDataService
+
+        if not len(book):
+            return np.empty(0)
+        if quotes is None:
+            quotes = MarketDataService.get_batch_prices(book.symbols.tolist())
+        symbol_prices = np.array(
+            [(quotes.get(symbol) or {}).get('price') or np.nan for symbol in book.symbols], dtype=np.float64
+        )
+        marks = symbol_prices[book.symbol_index]
+        return np.where(np.isnan(marks), book.entry, marks)
+
+    @classmethod
+    def value(cls, book, cash, marks=None, quotes=None):
+        """
+        Mark the book to market
+        Returns: dict with cash, floating_pl, used_margin, nlv, plus per-position marks/pl arrays
+        """
+        if marks is None:
+            marks = cls.marks(book, quotes)
+        if not len(book):
+            return {'cash': cash, 'floating_pl': 0.0, 'used_margin': 0.0, 'nlv': cash,
+                    'marks': marks, 'pl': np.empty(0)}
+
+        leverage = np.array([InstrumentRegistry.get(str(symbol)).leverage for symbol in book.symbols])[book.symbol_index]
+        pl = (marks - book.entry) * book.quantity * book.direction
+        floating_pl = float(pl.sum())
+        return {
+            'cash': cash,
+            'floating_pl': floating_pl,
+            'used_margin': float((marks * book.quantity / leverage).sum()),
+            'nlv': cash + floating_pl,
+            'marks': marks,
+            'pl': pl
+        }
+
+    @classmethod
+    def reserve_margin(cls, challenge_id, margin, floating_pl, statuses=('active', 'passed'), session=None):
+        """
+        Atomically reserve `margin` on the challenge if the margin already
+        reserved plus this one stays within its equity (cash + `floating_pl`,
+        the open positions marked by the caller): the margin of all open
+        orders counts, so two concurrent orders cannot both take the last of
+        the buying power.
+        Returns: the updated challenge document, or None when refused
+        """
+        reserved = {'$ifNull': ['$reserved_margin', 0]}
+        return mongo.db.challenges.find_one_and_update(
+            {
+                '_id': ObjectId(challenge_id),
+                'status': {'$in': list(statuses)},
+                '$expr': {'$lte': [{'$add': [reserved, margin]}, {'$add': ['$current_equity', floating_pl]}]}
+            },
+            {'$inc': {'reserved_margin': margin}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+
+    @classmethod
+    def release_margin(cls, challenge_id, margin, session=None):
+        """Give back a reservation whose order was not placed"""
+        mongo.db.challenges.update_one(
+            {'_id': ObjectId(challenge_id)}, {'$inc': {'reserved_margin': -margin}}, session=session
+        )
+
+    @classmethod
+    def place_order(cls, challenge_id, order, floating_pl, statuses=('active', 'passed')):
+        """
+        Reserve order['margin'] and insert the order in one transaction
+        (sets order['_id'])
+        Returns: the challenge document after the reservation, or None when refused
+        """
+        def place(session):
+            challenge = cls.reserve_margin(challenge_id, order['margin'], floating_pl, statuses, session)
+            if challenge is None:
+                return None
+            try:
+                order['_id'] = mongo.db.trades.insert_one(order, session=session).inserted_id
+            except Exception:
+                if session is None:
+                    cls.release_margin(challenge_id, order['margin'])
+                raise
+            return challenge
+
+        return cls.atomically(place)
+
+    @classmethod
+    def atomically(cls, callback):
+        """
+        Run callback(session) in a transaction (retried on transient errors),
+        or callback(None) when the deployment does not support transactions
+        """
+        if cls._transactions is not False:
+            try:
+                with mongo.db.client.start_session() as session:
+                    result = session.with_transaction(callback)
+                cls._transactions = True
+                return result
+            except NotImplementedError:
+                pass  # mongomock
+            except OperationFailure as e:
+                if e.code != cls.ILLEGAL_OPERATION or cls._transactions:
+                    raise
+            cls._transactions = False
+            print("WARNING: MongoDB transactions not supported by this deployment, writing without them")
+        return callback(None)
+
+    @classmethod
+    def challenge_nlv(cls, challenge):
+        """Net liquidation value of a challenge (cash + floating P/L)"""
+        return cls.value(PositionBook.load(challenge.id), challenge.current_equity)['nlv']
+
+    @classmethod
+    def liquidate(cls, challenge_id, book, marks=None, closed_at=None):
+        """
+        Close every position of the book at its mark in constant round trips:
+        one unordered bulk_write for the trades, one atomic $inc of the equity
+        (releasing the margin the orders reserved), both in one transaction
+        when available, and one $inc/$push of the materialized challenge stats.
+
+        Orders closed concurrently by another request are skipped by the
+        is_open guard and their P/L is not credited twice. `closed_at` (now by
+        default) is stored on the orders and dates the P/L in the stats.
+        Returns: dict with closed ids, realized_pl, per-position marks/pl and
+        the updated challenge document (None when nothing was closed)
+        """
+        if marks is None:
+            marks = cls.marks(book)
+        result = {'closed': [], 'realized_pl': 0.0, 'marks': marks, 'pl': np.empty(0), 'challenge': None}
+        if not len(book):
+            return result
+
+        pl = cls.value(book, 0.0, marks)['pl']
+        batch = ObjectId()
+        closed_at = closed_at or datetime.utcnow()
+        writes = [
+            UpdateOne(
+                {'_id': oid, 'is_open': True},
+                {'$set': {'is_open': False, 'close_price': float(mark), 'profit_loss': float(profit),
+                          'close_batch': batch, 'closed_at': closed_at, 'stats_tracked': True}}
+            )
+            for oid, mark, profit in zip(book.ids, marks, pl)
+        ]
+
+        def close(session):
+            # Closes and the equity/margin they credit land together
+            closed = np.ones(len(book), dtype=bool)
+            if mongo.db.trades.bulk_write(writes, ordered=False, session=session).modified_count < len(book):
+                mine = {doc['_id'] for doc in mongo.db.trades.find({'close_batch': batch}, {'_id': 1}, session=session)}
+                closed = np.array([oid in mine for oid in book.ids], dtype=bool)
+            if not closed.any():
+                return closed, None
+            increments = {'current_equity': float(pl[closed].sum())}
+            released = float(book.margin[closed].sum())
+            if released:
+                increments['reserved_margin'] = -released
+            challenge = mongo.db.challenges.find_one_and_update(
+                {'_id': ObjectId(challenge_id)},
+                {'$inc': increments},
+                return_document=ReturnDocument.AFTER,
+                session=session
+            )
+            return closed, challenge
+
+        closed, result['challenge'] = cls.atomically(close)
+        realized_pl = float(pl[closed].sum())
+        result.update(closed=[oid for oid, done in zip(book.ids, closed) if done], realized_pl=realized_pl, pl=pl)
+        if result['challenge']:
+            ChallengeStats.record_closes(challenge_id, pl[closed], result['challenge']['current_equity'], closed_at)
+        return result
@@ -0,0 +1,140 @@
+"""
+TradeSense AI - Rule Verification Queue
+Bounded worker pool that coalesces challenge verifications
+"""
+from collections import deque
+import threading
+import time
+
+
+class VerificationQueue:
+    """
+    Runs ChallengeEngine.verify_challenge_rules off the request thread.
+
+    At most one job per challenge is pending: a burst of trades on the same
+    account collapses into a single verification, run `delay` seconds after
+    the first one was queued. A submit that arrives while the challenge is
+    being verified schedules exactly one re-run, so the last trade is always
+    checked. The queue is bounded; when it is full submits are rejected and
+    the periodic sweep picks those challenges up.
+    """
+
+    WINDOW = 512
+
+    _app = None
+    _workers = []
+    _max_pending = 1000
+    _delay = 0.5
+    _cond = threading.Condition()
+    _queue = deque()      # (challenge_id, ready_at), FIFO so ready_at is ordered
+    _pending = {}         # challenge_id -> enqueued_at
+    _running = set()
+    _rerun = set()
+    _waits = deque(maxlen=WINDOW)
+    _runs = deque(maxlen=WINDOW)
+    _stats = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'max_depth': 0}
+
+    @classmethod
+    def configure(cls, app, workers=2, max_pending=1000, delay=0.5):
+        with cls._cond:
+            cls._app = app
+            cls._max_pending = max_pending
+            cls._delay = delay
+            while len(cls._workers) < workers:
+                worker = threading.Thread(
+                    target=cls._run, name=f'verify-{len(cls._workers)}', daemon=True
+                )
+                cls._workers.append(worker)
+                worker.start()
+
+    @classmethod
+    def submit(cls, challenge_id):
+        """Queue a verification; returns False when rejected by backpressure"""
+        if cls._app is None:
+            # Not configured (scripts, shell): verify inline
+            from app.services.challenge_engine import ChallengeEngine
+            ChallengeEngine.verify_challenge_rules(challenge_id)
+            return True
+
+        with cls._cond:
+            cls._stats['submitted'] += 1
+            if challenge_id in cls._pending:
+                cls._stats['coalesced'] += 1
+                return True
+            if challenge_id in cls._running:
+                cls._stats['coalesced'] += 1
+                cls._rerun.add(challenge_id)
+                return True
+            if len(cls._pending) >= cls._max_pending:
+                cls._stats['rejected'] += 1
+                return False
+            cls._enqueue(challenge_id)
+            return True
+
+    @classmethod
+    def stats(cls):
+        with cls._cond:
+            return dict(
+                cls._stats,
+                depth=len(cls._pending),
+                running=len(cls._running),
+                workers=len(cls._workers),
+                wait_p50_ms=cls._percentile(cls._waits, 0.5),
+                wait_p95_ms=cls._percentile(cls._waits, 0.95),
+                run_p50_ms=cls._percentile(cls._runs, 0.5),
+                run_p95_ms=cls._percentile(cls._runs, 0.95)
+            )
+
+    @classmethod
+    def _enqueue(cls, challenge_id):
+        """Add a job (lock held)"""
+        now = time.monotonic()
+        cls._pending[challenge_id] = now
+        cls._queue.append((challenge_id, now + cls._delay))
+        cls._stats['max_depth'] = max(cls._stats['max_depth'], len(cls._pending))
+        cls._cond.notify()
+
+    @classmethod
+    def _next(cls):
+        """Block until the oldest job is due, then claim it"""
+        with cls._cond:
+            while True:
+                if not cls._queue:
+                    cls._cond.wait()
+                    continue
+                challenge_id, ready_at = cls._queue[0]
+                delay = ready_at - time.monotonic()
+                if delay > 0:
+                    cls._cond.wait(delay)
+                    continue
+                cls._queue.popleft()
+                cls._waits.append(time.monotonic() - cls._pending.pop(challenge_id))
+                cls._running.add(challenge_id)
+                return challenge_id
+
+    @classmethod
+    def _run(cls):
+        from app.services.challenge_engine import ChallengeEngine
+
+        while True:
+            challenge_id = cls._next()
+            started = time.monotonic()
+            try:
+                with cls._app.app_context():
+                    ChallengeEngine.verify_challenge_rules(challenge_id)
+                outcome = 'completed'
+            except Exception as e:
+                print(f"Verification error for {challenge_id}: {str(e)}")
+                outcome = 'failed'
+            with cls._cond:
+                cls._runs.append(time.monotonic() - started)
+                cls._stats[outcome] += 1
+                cls._running.discard(challenge_id)
+                if challenge_id in cls._rerun:
+                    cls._rerun.discard(challenge_id)
+                    cls._enqueue(challenge_id)
+
+    @staticmethod
+    def _percentile(window, p):
+        values = sorted(window)
+        return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 1) if values else None
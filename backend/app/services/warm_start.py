@@ -0,0 +1,202 @@
+"""
+TradeSense AI - Warm-Start Snapshot
+Persists quotes and recent bars so a cold process starts from warm data
+"""
+from bson.binary import Binary
+import atexit
+import io
+import json
+import numpy as np
+import os
+import tempfile
+import threading
+import time
+
+from app.services.bar_store import FIELDS, BarStore
+
+
+class WarmStart:
+    """
+    Periodic snapshot of the anchor cache, the latest ticks and recent bars.
+
+    The snapshot is one compressed .npz payload (bar columns plus a JSON
+    header) written to a local file or a MongoDB document. It is restored on
+    first use of the market data services, so boot stays fast and the first
+    quote/chart is served from the snapshot instead of waiting on yfinance.
+    Technical indicators are rebuilt locally from the restored daily bars.
+    """
+
+    MAX_BARS = 1500         # most recent bars kept per series
+    MAX_SERIES = 200
+    DOCUMENT_ID = 'market_data'
+
+    _target = 'off'         # 'file', 'mongo' or 'off'
+    _path = None
+    _interval = 60
+    _thread = None
+    _lock = threading.Lock()
+    _restored = False
+    _stats = {'saves': 0, 'restores': 0, 'errors': 0, 'last_saved_at': None, 'last_size': 0}
+
+    @classmethod
+    def configure(cls, target='file', path=None, interval=60):
+        """Select the snapshot target and start the periodic saver"""
+        cls._target = target
+        cls._path = path
+        cls._interval = interval
+        cls._restored = False
+        if target == 'off':
+            return
+        if cls._thread is None:
+            atexit.register(cls.save)
+            cls._thread = threading.Thread(target=cls._run, name='warm-start', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def ensure_restored(cls):
+        """Restore the snapshot once per process (cheap no-op afterwards)"""
+        if cls._restored:
+            return
+        with cls._lock:
+            if cls._restored:
+                return
+            cls._restored = True
+            if cls._target == 'off':
+                return
+            try:
+                payload = cls._read()
+                if payload:
+                    cls._restore(payload)
+                    cls._stats['restores'] += 1
+            except Exception as e:
+                cls._stats['errors'] += 1
+                print(f"Warm-start restore failed: {str(e)}")
+
+    @classmethod
+    def save(cls):
+        """Write the current snapshot; returns its size in bytes (0 if nothing to save)"""
+        if cls._target == 'off':
+            return 0
+        try:
+            payload = cls._build()
+            if not payload:
+                return 0
+            cls._write(payload)
+            cls._stats['saves'] += 1
+            cls._stats['last_saved_at'] = time.time()
+            cls._stats['last_size'] = len(payload)
+            return len(payload)
+        except Exception as e:
+            cls._stats['errors'] += 1
+            print(f"Warm-start save failed: {str(e)}")
+            return 0
+
+    @classmethod
+    def stats(cls):
+        return dict(cls._stats, target=cls._target, restored=cls._restored)
+
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(cls._interval)
+            # Never overwrite a snapshot we have not loaded yet with an emptier one
+            cls.ensure_restored()
+            cls.save()
+
+    @classmethod
+    def _build(cls):
+        from app.services.market_data import MarketDataService
+        from app.services.tick_producer import TickProducer
+
+        now = time.time()
+        quotes = {key: [value, stored_at] for key, value, stored_at in MarketDataService._price_cache.items()}
+        # The latest tick is fresher than the anchor it started from
+        for symbol, quote in TickProducer.latest_many(list(quotes), touch=False).items():
+            quotes[symbol] = [quote, now]
+
+        arrays = {}
+        series_meta = []
+        for (symbol, interval), series in BarStore.items()[-cls.MAX_SERIES:]:
+            if not series.length:
+                continue
+            columns = series.view(start=None)
+            first = max(0, series.length - cls.MAX_BARS)
+            index = len(series_meta)
+            for field in FIELDS:
+                arrays[f"{index}_{field}"] = np.asarray(columns[field][first:])
+            coverage_start = series.coverage_start
+            if first:
+                coverage_start = int(columns['time'][first])
+            series_meta.append({
+                'symbol': symbol,
+                'interval': interval,
+                'coverage_start': coverage_start,
+                'fetched_at': series.fetched_at
+            })
+
+        if not quotes and not series_meta:
+            return None
+
+        header = {'saved_at': now, 'quotes': quotes, 'series': series_meta}
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, header=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8), **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def _restore(cls, payload):
+        from app.services.market_data import MarketDataService
+
+        with np.load(io.BytesIO(payload)) as data:
+            header = json.loads(data['header'].tobytes().decode())
+
+            # Oldest first so LRU order matches the original cache
+            cache = MarketDataService._price_cache
+            for symbol, (quote, stored_at) in sorted(header['quotes'].items(), key=lambda item: item[1][1]):
+                if cache.peek(symbol) is None:
+                    cache.set(symbol, quote, now=stored_at)
+
+            for index, meta in enumerate(header['series']):
+                series = BarStore.get(meta['symbol'], meta['interval'])
+                if series.length:
+                    continue  # local bars survived the restart
+                bars = {field: data[f"{index}_{field}"] for field in FIELDS}
+                series.replace(bars, coverage_start=meta['coverage_start'], fetched_at=meta['fetched_at'])
+
+    @classmethod
+    def _read(cls):
+        if cls._target == 'mongo':
+            from app.extensions import mongo
+            doc = mongo.db.warm_snapshots.find_one({'_id': cls.DOCUMENT_ID})
+            return bytes(doc['data']) if doc else None
+        try:
+            with open(cls._path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    @classmethod
+    def _write(cls, payload):
+        if cls._target == 'mongo':
+            from app.extensions import mongo
+            mongo.db.warm_snapshots.replace_one(
+                {'_id': cls.DOCUMENT_ID},
+                {'_id': cls.DOCUMENT_ID, 'data': Binary(payload), 'saved_at': time.time()},
+                upsert=True
+            )
+            return
+        # Unique temp file per write: workers save concurrently (periodic thread and exit)
+        directory = os.path.dirname(cls._path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(cls._path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, cls._path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
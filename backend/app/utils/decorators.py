@@ -2,9 +2,11 @@
 TradeSense AI - Authentication Decorators
 """
 from functools import wraps
+from bson import ObjectId
+from bson.errors import InvalidId
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.models import User
+from app.extensions import mongo
 
 
 def admin_required(fn):
@@ -12,10 +14,12 @@ def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        try:
+            user = mongo.db.users.find_one({'_id': ObjectId(get_jwt_identity())}, {'role': 1})
+        except InvalidId:
+            user = None
         
-        if not user or user.role != 'admin':
+        if not user or user.get('role') != 'admin':
             return jsonify({'error': 'Admin access required'}), 403
         
         return fn(*args, **kwargs)
@@ -0,0 +1,12 @@
+"""
+TradeSense AI - Gunicorn Configuration
+Threaded workers: a price stream (SSE) holds one thread, not a whole worker
+"""
+import os
+
+wsgi_app = 'run:app'
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:' + os.getenv('PORT', '5000'))
+timeout = 120
@@ -0,0 +1,45 @@
+"""
+TradeSense AI - Index Management
+Apply the declared MongoDB indexes and check that hot queries use them
+
+Usage:
+    python manage_indexes.py apply    # create missing indexes (idempotent, safe at every deploy)
+    python manage_indexes.py check    # explain() every hot query, exit 1 on any COLLSCAN
+"""
+import sys
+
+from app import create_app
+from app.extensions import mongo
+from app.indexes import check_query_plans, ensure_indexes
+
+
+def apply():
+    report = ensure_indexes(mongo.db)
+    failed = False
+    for collection, result in report.items():
+        print(f"{collection}: created {result['created'] or '-'}, unchanged {result['unchanged'] or '-'}")
+        for name, error in result['failed'].items():
+            print(f"  FAILED {name}: {error}")
+            failed = True
+    return 1 if failed else 0
+
+
+def check():
+    ensure_indexes(mongo.db)
+    collscans = 0
+    for name, stages, ok in check_query_plans(mongo.db):
+        print(f"{'OK  ' if ok else 'FAIL'} {name}: {' <- '.join(stages)}")
+        collscans += not ok
+    if collscans:
+        print(f"{collscans} hot quer{'y' if collscans == 1 else 'ies'} fell back to COLLSCAN")
+    return 1 if collscans else 0
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    if command not in ('apply', 'check'):
+        print(__doc__)
+        sys.exit(2)
+    app = create_app()
+    with app.app_context():
+        sys.exit(apply() if command == 'apply' else check())
@@ -0,0 +1,15 @@
+"""
+TradeSense AI - Test fixtures
+"""
+import mongomock
+import pytest
+
+from app.extensions import mongo
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """In-memory MongoDB behind the app's `mongo.db`"""
+    database = mongomock.MongoClient().db
+    monkeypatch.setattr(type(mongo), 'db', property(lambda self: database), raising=False)
+    return database
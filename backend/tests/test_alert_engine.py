@@ -0,0 +1,54 @@
+"""
+TradeSense AI - Price alert engine: matching and reloads racing local changes
+"""
+from bson import ObjectId
+import pytest
+
+from app.services.alert_engine import AlertEngine
+
+
+@pytest.fixture(autouse=True)
+def engine(monkeypatch):
+    monkeypatch.setattr(AlertEngine, '_books', {})
+    monkeypatch.setattr(AlertEngine, '_alerts', {})
+    monkeypatch.setattr(AlertEngine, '_journal', None)
+    monkeypatch.setattr(AlertEngine, '_stats', dict(AlertEngine._stats))
+
+
+def _alert(condition, target, symbol='AAPL'):
+    return {'_id': ObjectId(), 'user_id': 'u1', 'symbol': symbol, 'condition': condition, 'target_price': target}
+
+
+def test_tick_fires_crossed_thresholds_once():
+    above, below = _alert('ABOVE', 110.0), _alert('BELOW', 90.0)
+    AlertEngine.load([above, below])
+
+    assert AlertEngine.match({'AAPL': 100.0}) == []
+    fired = AlertEngine.match({'AAPL': 111.0})
+    assert [alert[0] for alert in fired] == [above['_id']]
+    assert AlertEngine.match({'AAPL': 112.0}) == []
+    assert [alert[0] for alert in AlertEngine.match({'AAPL': 89.0})] == [below['_id']]
+
+
+def test_reload_keeps_changes_made_during_the_read(db, monkeypatch):
+    kept, deleted, fired = _alert('ABOVE', 110.0), _alert('ABOVE', 120.0), _alert('BELOW', 90.0)
+    db.price_alerts.insert_many([dict(doc, is_active=True) for doc in (kept, deleted, fired)])
+    AlertEngine.load(db.price_alerts.find())
+    created = _alert('BELOW', 80.0, symbol='MSFT')
+
+    find = db.price_alerts.find
+
+    def racing_find(*args, **kwargs):
+        documents = list(find(*args, **kwargs))
+        # Local changes between the read and the swap
+        AlertEngine.add(created)
+        AlertEngine.remove(deleted['_id'])
+        assert [alert[0] for alert in AlertEngine.match({'AAPL': 89.0})] == [fired['_id']]
+        return iter(documents)
+
+    monkeypatch.setattr(db.price_alerts, 'find', racing_find)
+    AlertEngine._reload()
+
+    assert set(AlertEngine._alerts) == {kept['_id'], created['_id']}
+    assert AlertEngine._journal is None
+    assert [alert[0] for alert in AlertEngine.match({'AAPL': 200.0, 'MSFT': 50.0})] == [kept['_id'], created['_id']]
@@ -0,0 +1,80 @@
+"""
+TradeSense AI - BVC quote board parsing against a saved board page
+"""
+import os
+
+import pytest
+
+from app.services.bvc_ingester import parse_number, parse_quote_board
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'bvc_board.html')
+
+
+@pytest.fixture
+def board():
+    with open(FIXTURE, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1 820,50', 1820.5),
+    ('1 820,50', 1820.5),
+    ('1 820,50', 1820.5),
+    ('+0,51 %', 0.51),
+    ('-1,59%', -1.59),
+    ('1.820,50', 1820.5),
+    ('98.5', 98.5),
+    ('1.820', 1820.0),
+    ('12.345.678', 12345678.0),
+    ('0.125', 0.125),
+    ('-', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_number_french_format(text, expected):
+    assert parse_number(text) == expected
+
+
+def test_ticker_column_is_code_not_isin(board):
+    quotes = parse_quote_board(board)
+
+    assert set(quotes) == {'IAM.CS', 'ATW.CS', 'LHM.CS'}
+    assert not any(symbol.startswith('MA0') for symbol in quotes)
+
+
+def test_price_and_change_columns(board):
+    quotes = parse_quote_board(board)
+
+    assert quotes['LHM.CS'] == {
+        'symbol': 'LHM.CS',
+        'name': 'LafargeHolcim Maroc',
+        'price': 1820.5,   # 'Dernier cours', not 'Cours de référence'
+        'change_percent': -1.59
+    }
+    assert quotes['ATW.CS']['price'] == 482.1
+    assert quotes['IAM.CS']['change_percent'] == 0.51
+
+
+def test_rows_without_price_are_skipped(board):
+    assert 'CIH.CS' not in parse_quote_board(board)
+
+
+def test_name_fallback_without_ticker_column(board):
+    quotes = parse_quote_board(board, names={'Maroc Telecom': 'MAROC.CS'})
+
+    assert quotes['MAROC.CS'] == {
+        'symbol': 'MAROC.CS', 'name': 'Maroc Telecom', 'price': 98.5, 'change_percent': 0.51
+    }
+    assert 'Valeur inconnue' not in {quote['name'] for quote in quotes.values()}
+
+
+def test_name_fallback_is_case_insensitive(board):
+    quotes = parse_quote_board(board, names={'MAROC TELECOM': 'MAROC.CS'})
+
+    assert 'MAROC.CS' in quotes
+
+
+def test_non_quote_tables_are_ignored():
+    content = b'<table><tr><th>Rubrique</th><th>Lien</th></tr><tr><td>Code</td><td>1,00</td></tr></table>'
+
+    assert parse_quote_board(content) == {}
@@ -0,0 +1,45 @@
+"""
+TradeSense AI - Per-challenge rule check: the failure is claimed before the stop-out
+"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.challenge_engine import ChallengeEngine
+from app.services.valuation import ValuationEngine
+
+
+@pytest.fixture
+def blown(db):
+    """Starter challenge whose open long loses 20% of the account at a mark of 0"""
+    challenge_id = str(db.challenges.insert_one({
+        'user_id': 'u1', 'plan_type': 'starter', 'status': 'active',
+        'initial_balance': 5000.0, 'current_equity': 5000.0
+    }).inserted_id)
+    db.trades.insert_one({
+        'challenge_id': challenge_id, 'symbol': 'AAPL', 'action': 'buy',
+        'quantity': 10, 'price': 100.0, 'is_open': True, 'timestamp': datetime(2026, 3, 2, 15, 0)
+    })
+    return challenge_id
+
+
+def test_claimed_failure_is_stopped_out(db, blown, monkeypatch):
+    monkeypatch.setattr(ValuationEngine, 'marks', classmethod(lambda cls, book, quotes=None: np.zeros(len(book))))
+
+    assert ChallengeEngine.verify_challenge_rules(blown)['status'] == 'failed'
+    assert db.challenges.find_one()['status'] == 'failed'
+    assert not db.trades.find_one()['is_open']
+
+
+def test_failure_claimed_elsewhere_is_not_liquidated_twice(db, blown, monkeypatch):
+    def marks(cls, book, quotes=None):
+        # The sweep fails the challenge between the read and the claim
+        db.challenges.update_one({}, {'$set': {'status': 'failed'}})
+        return np.zeros(len(book))
+
+    monkeypatch.setattr(ValuationEngine, 'marks', classmethod(marks))
+
+    assert ChallengeEngine.verify_challenge_rules(blown)['status'] == 'skipped'
+    assert db.trades.find_one()['is_open']
+    assert db.challenges.find_one()['current_equity'] == 5000.0
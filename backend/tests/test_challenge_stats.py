@@ -0,0 +1,107 @@
+"""
+TradeSense AI - Materialized challenge stats: incremental updates vs rebuild
+"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services.challenge_stats import ChallengeStats
+from app.services.stats_queries import StatsQueries
+from app.services.valuation import PositionBook, ValuationEngine
+
+MONDAY = datetime(2026, 3, 2, 9, 30)
+
+
+def _open(db, challenge_id, symbol, action, quantity, price, opened_at):
+    db.trades.insert_one({
+        'challenge_id': challenge_id, 'symbol': symbol, 'action': action,
+        'quantity': quantity, 'price': price, 'is_open': True, 'timestamp': opened_at
+    })
+
+
+def _close(challenge_id, symbol, mark, closed_at):
+    book = PositionBook.load(challenge_id, {'symbol': symbol})
+    return ValuationEngine.liquidate(challenge_id, book, np.full(len(book), mark), closed_at=closed_at)
+
+
+def _comparable(doc):
+    doc = {key: value for key, value in doc.items() if key not in ('_id', 'updated_at', 'version')}
+    doc['gross_profit'] = round(doc['gross_profit'], 6)
+    doc['gross_loss'] = round(doc['gross_loss'], 6)
+    doc['daily_pl'] = {day: round(pl, 6) for day, pl in doc['daily_pl'].items()}
+    doc['equity_curve'] = [list(point) for point in doc['equity_curve']]
+    return doc
+
+
+@pytest.fixture
+def challenge_id(db):
+    return str(db.challenges.insert_one({
+        'user_id': 'u1', 'initial_balance': 1000.0, 'current_equity': 1000.0,
+        'status': 'active', 'created_at': MONDAY
+    }).inserted_id)
+
+
+def test_rebuild_after_incremental_updates_gives_same_document(db, challenge_id):
+    # All opened on Monday, closed on Tuesday (two liquidations) and Wednesday
+    _open(db, challenge_id, 'AAPL', 'buy', 2, 100.0, MONDAY)
+    _open(db, challenge_id, 'AAPL', 'buy', 1, 110.0, MONDAY)
+    _open(db, challenge_id, 'TSLA', 'sell', 3, 200.0, MONDAY)
+    _open(db, challenge_id, 'MSFT', 'buy', 1, 300.0, MONDAY)
+
+    _close(challenge_id, 'AAPL', 105.0, datetime(2026, 3, 3, 10, 0))   # +10 and -5 together
+    _close(challenge_id, 'TSLA', 190.0, datetime(2026, 3, 3, 15, 0))   # +30
+    _close(challenge_id, 'MSFT', 280.0, datetime(2026, 3, 4, 11, 0))   # -20
+
+    incremental = _comparable(db.challenge_stats.find_one({'_id': db.challenges.find_one()['_id']}))
+    ChallengeStats.rebuild(challenge_id)
+    rebuilt = _comparable(db.challenge_stats.find_one({'_id': db.challenges.find_one()['_id']}))
+
+    assert rebuilt == incremental
+    # P/L is dated by close, never by the Monday opening
+    assert incremental['daily_pl'] == {'2026-03-03': 35.0, '2026-03-04': -20.0}
+    assert [value for _, value in incremental['equity_curve']] == [1005.0, 1035.0, 1015.0]
+
+
+def test_stats_payload_after_rebuild(db, challenge_id):
+    _open(db, challenge_id, 'AAPL', 'buy', 1, 100.0, MONDAY)
+    _close(challenge_id, 'AAPL', 90.0, datetime(2026, 3, 3, 10, 0))
+
+    challenge = db.challenges.find_one()
+    stats = ChallengeStats.get(dict(challenge, stats=ChallengeStats.rebuild(challenge_id)))
+
+    assert stats['total_trades'] == 1
+    assert stats['net_profit'] == -10.0
+    assert stats['daily_pl'] == [{'time': '2026-03-03', 'value': -10.0}]
+    assert [point['value'] for point in stats['equity_curve']] == [1000.0, 990.0]
+
+
+def test_closes_before_tracking_are_folded_in_once(db, challenge_id):
+    # A close from before stats existed: no stats_tracked, no stats document
+    db.trades.insert_one({
+        'challenge_id': challenge_id, 'symbol': 'AAPL', 'action': 'buy', 'quantity': 1,
+        'price': 100.0, 'exit_price': 120.0, 'profit_loss': 20.0, 'is_open': False,
+        'timestamp': MONDAY, 'closed_at': datetime(2026, 3, 2, 15, 0)
+    })
+    db.challenges.update_one({}, {'$set': {'current_equity': 1020.0}})
+    _open(db, challenge_id, 'TSLA', 'buy', 1, 200.0, MONDAY)
+    _open(db, challenge_id, 'MSFT', 'buy', 1, 300.0, MONDAY)
+    _close(challenge_id, 'TSLA', 190.0, datetime(2026, 3, 3, 10, 0))   # -10, triggers the backfill
+    _close(challenge_id, 'MSFT', 305.0, datetime(2026, 3, 3, 11, 0))   # +5
+
+    incremental = _comparable(db.challenge_stats.find_one())
+    ChallengeStats.rebuild(challenge_id)
+    rebuilt = _comparable(db.challenge_stats.find_one())
+
+    assert rebuilt == incremental
+    assert incremental['trade_count'] == 3
+    assert [value for _, value in incremental['equity_curve']] == [1020.0, 1010.0, 1015.0]
+
+
+def test_realized_pl_counts_trades_by_close_time(db, challenge_id):
+    _open(db, challenge_id, 'AAPL', 'buy', 1, 100.0, MONDAY)
+    _close(challenge_id, 'AAPL', 110.0, datetime(2026, 3, 3, 10, 0))
+
+    # Opened Monday, closed Tuesday: not part of Monday's realized P/L
+    assert StatsQueries.realized_pl(challenge_id, until=datetime(2026, 3, 2, 23, 59)) == 0.0
+    assert StatsQueries.realized_pl(challenge_id, until=datetime(2026, 3, 3, 23, 59)) == 10.0
@@ -0,0 +1,95 @@
+"""
+TradeSense AI - Challenge sweep: guarded transitions and the scheduling lease
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.challenge_sweep import ChallengeSweep
+from app.services.valuation import ValuationEngine
+
+NOW = datetime(2026, 3, 2, 15, 0)
+
+
+@pytest.fixture
+def blown(db):
+    """Starter challenge whose open long loses 20% of the account at a mark of 0"""
+    challenge_id = str(db.challenges.insert_one({
+        'user_id': 'u1', 'plan_type': 'starter', 'status': 'active',
+        'initial_balance': 5000.0, 'current_equity': 5000.0
+    }).inserted_id)
+    db.trades.insert_one({
+        'challenge_id': challenge_id, 'symbol': 'AAPL', 'action': 'buy',
+        'quantity': 10, 'price': 100.0, 'is_open': True, 'timestamp': NOW
+    })
+    return challenge_id
+
+
+def test_failed_challenge_is_claimed_then_stopped_out(db, blown, monkeypatch):
+    monkeypatch.setattr(ValuationEngine, 'marks', classmethod(lambda cls, book, quotes=None: np.zeros(len(book))))
+
+    report = ChallengeSweep.run(now=NOW)
+
+    assert report['failed'] == [blown]
+    assert db.challenges.find_one()['status'] == 'failed'
+    trade = db.trades.find_one()
+    assert not trade['is_open'] and trade['closed_at'] == NOW
+
+
+def test_challenge_changed_during_the_sweep_is_not_liquidated(db, blown, monkeypatch):
+    def marks(cls, book, quotes=None):
+        # Another instance fails the challenge between the read and the write
+        db.challenges.update_one({}, {'$set': {'status': 'failed'}})
+        return np.zeros(len(book))
+
+    monkeypatch.setattr(ValuationEngine, 'marks', classmethod(marks))
+
+    report = ChallengeSweep.run(now=NOW)
+
+    assert report['failed'] == []
+    assert db.trades.find_one()['is_open']
+    assert db.challenges.find_one()['current_equity'] == 5000.0
+
+
+def test_lease_has_one_holder_until_it_expires(db, monkeypatch):
+    monkeypatch.setattr(ChallengeSweep, 'INTERVAL', 60)
+    monkeypatch.setattr(ChallengeSweep, '_owner', 'a')
+    assert ChallengeSweep._acquire_lease(NOW)
+
+    monkeypatch.setattr(ChallengeSweep, '_owner', 'b')
+    assert not ChallengeSweep._acquire_lease(NOW + timedelta(seconds=60))
+    assert ChallengeSweep._acquire_lease(NOW + timedelta(seconds=120))
+    assert db.locks.find_one()['owner'] == 'b'
+
+
+def test_margin_drift_is_rebuilt_from_open_orders_once_confirmed(db, monkeypatch):
+    monkeypatch.setattr(ChallengeSweep, '_margin_drift', {})
+    monkeypatch.setattr(ValuationEngine, 'marks', classmethod(lambda cls, book, quotes=None: book.entry.copy()))
+    challenge_id = str(db.challenges.insert_one({
+        'user_id': 'u1', 'plan_type': 'starter', 'status': 'active', 'initial_balance': 5000.0,
+        'current_equity': 5000.0, 'reserved_margin': 500.0  # 300 leaked by an order never inserted
+    }).inserted_id)
+    db.trades.insert_one({
+        'challenge_id': challenge_id, 'symbol': 'AAPL', 'action': 'buy', 'quantity': 10,
+        'price': 100.0, 'margin': 200.0, 'is_open': True, 'timestamp': NOW
+    })
+
+    assert ChallengeSweep.run(now=NOW)['margin_reconciled'] == 0
+    assert ChallengeSweep.run(now=NOW)['margin_reconciled'] == 1
+    assert db.challenges.find_one()['reserved_margin'] == 200.0
+    assert ChallengeSweep.run(now=NOW)['margin_reconciled'] == 0
+
+
+def test_margin_drift_that_moves_is_left_alone(db, monkeypatch):
+    monkeypatch.setattr(ChallengeSweep, '_margin_drift', {})
+    db.challenges.insert_one({
+        'user_id': 'u1', 'plan_type': 'starter', 'status': 'active', 'initial_balance': 5000.0,
+        'current_equity': 5000.0, 'reserved_margin': 300.0
+    })
+
+    ChallengeSweep.run(now=NOW)
+    # An order is being placed: the reservation changed before its insert
+    db.challenges.update_one({}, {'$inc': {'reserved_margin': 100.0}})
+    assert ChallengeSweep.run(now=NOW)['margin_reconciled'] == 0
+    assert db.challenges.find_one()['reserved_margin'] == 400.0
@@ -0,0 +1,34 @@
+"""
+TradeSense AI - Candle resampling: session-aligned intraday buckets
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.services.resampler import resample
+
+
+def _session(open_utc, minutes=390, step=300):
+    start = int(open_utc.replace(tzinfo=timezone.utc).timestamp())
+    times = np.arange(start, start + minutes * 60, step)
+    ones = np.ones(len(times))
+    return {'time': times, 'open': ones, 'high': ones, 'low': ones, 'close': ones,
+            'volume': np.ones(len(times), dtype=np.int64)}
+
+
+def _hours(times):
+    return [datetime.fromtimestamp(int(t), timezone.utc).strftime('%H:%M') for t in times]
+
+
+def test_us_hourly_candles_start_at_the_open_across_dst():
+    winter = resample(_session(datetime(2026, 3, 2, 14, 30)), '1h', 3600, 'NYSE')
+    summer = resample(_session(datetime(2026, 6, 1, 13, 30)), '1h', 3600, 'NYSE')
+
+    assert _hours(winter['time']) == ['14:30', '15:30', '16:30', '17:30', '18:30', '19:30', '20:30']
+    assert _hours(summer['time'])[0] == '13:30'
+    assert winter['volume'][0] == 12  # a full first hour, not split at 15:00
+
+
+def test_continuous_markets_stay_epoch_aligned():
+    candles = resample(_session(datetime(2026, 3, 2, 14, 30)), '1h', 3600, 'CRYPTO')
+    assert _hours(candles['time'])[:2] == ['14:00', '15:00']
@@ -0,0 +1,44 @@
+"""
+TradeSense AI - Order placement: margin reservation and order written together
+"""
+import pytest
+
+from app.services.valuation import ValuationEngine
+
+
+@pytest.fixture
+def challenge_id(db):
+    return str(db.challenges.insert_one({
+        'status': 'active', 'initial_balance': 5000.0, 'current_equity': 5000.0, 'reserved_margin': 4000.0
+    }).inserted_id)
+
+
+def _order(challenge_id, margin):
+    return {'challenge_id': challenge_id, 'symbol': 'AAPL', 'action': 'buy', 'quantity': 10.0,
+            'price': 100.0, 'is_open': True, 'margin': margin}
+
+
+def test_order_is_placed_with_its_reservation(db, challenge_id):
+    order = _order(challenge_id, 1000.0)
+
+    challenge = ValuationEngine.place_order(challenge_id, order, floating_pl=0.0)
+
+    assert challenge['reserved_margin'] == 5000.0
+    assert db.trades.find_one({'_id': order['_id']})['margin'] == 1000.0
+
+
+def test_refused_order_writes_nothing(db, challenge_id):
+    # Reserved margin of the open orders counts: 4000 + 1500 > 5000 + 200
+    assert ValuationEngine.place_order(challenge_id, _order(challenge_id, 1500.0), floating_pl=200.0) is None
+    assert db.trades.count_documents({}) == 0
+    assert db.challenges.find_one()['reserved_margin'] == 4000.0
+
+
+def test_failed_insert_gives_the_reservation_back(db, challenge_id, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('insert failed')
+
+    monkeypatch.setattr(db.trades, 'insert_one', fail)
+    with pytest.raises(RuntimeError):
+        ValuationEngine.place_order(challenge_id, _order(challenge_id, 500.0), floating_pl=0.0)
+    assert db.challenges.find_one()['reserved_margin'] == 4000.0
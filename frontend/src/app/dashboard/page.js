@@ -204,15 +204,49 @@ export default function DashboardPage() {
   useEffect(() => {
     if (!user) return;
 
-    // Fast polling for ACTIVE symbol and POSITIONS (100ms) for ultra-live MT4 feel
-    const fastInterval = setInterval(() => {
-      const symbolsToUpdate = new Set([selectedSymbol]);
-      // Also update prices for symbols we have open positions in
-      positions.forEach(pos => symbolsToUpdate.add(pos.symbol));
-      
-      const list = Array.from(symbolsToUpdate).filter(Boolean);
-      if (list.length > 0) loadFastPrices(list);
-    }, 500);
+    // Live stream for ACTIVE symbol and POSITIONS for ultra-live MT4 feel
+    const symbolsToUpdate = new Set([selectedSymbol]);
+    // Also update prices for symbols we have open positions in
+    positions.forEach(pos => symbolsToUpdate.add(pos.symbol));
+    const list = Array.from(symbolsToUpdate).filter(Boolean);
+
+    let fastInterval = null;
+    const startPolling = () => {
+      if (fastInterval || list.length === 0) return;
+      fastInterval = setInterval(() => loadFastPrices(list), 500);
+    };
+
+    let stream = null;
+    let cancelled = false;
+    const openStream = () => {
+      let opened = false;
+      marketAPI.streamPrices(list)
+        .then((source) => {
+          if (cancelled) return source.close();
+          stream = source;
+          const onPrices = (event) => {
+            opened = true;
+            applyFastPrices(JSON.parse(event.data));
+          };
+          source.addEventListener('snapshot', onPrices);
+          source.addEventListener('prices', onPrices);
+          source.onerror = () => {
+            // EventSource retries by itself; once it gives up (e.g. the stream token
+            // expired at reconnect) open a new stream, or poll if it never worked
+            if (source.readyState !== EventSource.CLOSED || cancelled) return;
+            if (opened) openStream();
+            else startPolling();
+          };
+        })
+        .catch(() => {
+          if (!cancelled) startPolling();
+        });
+    };
+    if (list.length > 0 && typeof EventSource !== 'undefined') {
+      openStream();
+    } else {
+      startPolling();
+    }
 
     // Slow polling for background symbols (10s)
     const slowInterval = setInterval(() => {
@@ -220,7 +254,9 @@ export default function DashboardPage() {
     }, 10000);
     
     return () => {
-      clearInterval(fastInterval);
+      cancelled = true;
+      if (stream) stream.close();
+      if (fastInterval) clearInterval(fastInterval);
       clearInterval(slowInterval);
     };
   }, [user, selectedSymbol, positions]);
@@ -315,32 +351,42 @@ export default function DashboardPage() {
     }
   };
 
-  // Dedicated function for fast updates (100ms)
+  // Apply a batch of live quotes (stream frame or batch poll)
+  const applyFastPrices = (updates) => {
+    if (!updates) return;
+
+    // Update historical data for charts in real-time
+    if (updates[currentSymbolRef.current] && historicalData.length > 0) {
+      const newData = updates[currentSymbolRef.current];
+      setHistoricalData(prev => {
+        if (prev.length === 0) return prev;
+        const lastCandle = { ...prev[prev.length - 1] };
+        const currentPrice = newData.price;
+        
+        lastCandle.close = currentPrice;
+        if (currentPrice > lastCandle.high) lastCandle.high = currentPrice;
+        if (currentPrice < lastCandle.low) lastCandle.low = currentPrice;
+        
+        return [...prev.slice(0, -1), lastCandle];
+      });
+    }
+    
+    // Stream frames only carry changed fields: merge into the known quote
+    setPrices(prev => {
+      const next = { ...prev };
+      Object.entries(updates).forEach(([sym, quote]) => {
+        next[sym] = { ...prev[sym], ...quote };
+      });
+      return next;
+    });
+  };
+
+  // Polling fallback when the price stream is unavailable
   const loadFastPrices = async (symbols) => {
     try {
       // 🚀 MT4 Sync: Use batch API to get all prices in one round-trip
       const response = await marketAPI.getBatchPrices(symbols);
-      const updates = response.data;
-      
-      if (updates) {
-        // Update historical data for charts in real-time
-        if (updates[currentSymbolRef.current] && historicalData.length > 0) {
-          const newData = updates[currentSymbolRef.current];
-          setHistoricalData(prev => {
-            if (prev.length === 0) return prev;
-            const lastCandle = { ...prev[prev.length - 1] };
-            const currentPrice = newData.price;
-            
-            lastCandle.close = currentPrice;
-            if (currentPrice > lastCandle.high) lastCandle.high = currentPrice;
-            if (currentPrice < lastCandle.low) lastCandle.low = currentPrice;
-            
-            return [...prev.slice(0, -1), lastCandle];
-          });
-        }
-        
-        setPrices(prev => ({ ...prev, ...updates }));
-      }
+      applyFastPrices(response.data);
     } catch (err) {
       // Silently fail
     }
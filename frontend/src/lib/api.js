@@ -55,6 +55,8 @@ export const alertsAPI = {
   getAlerts: () => api.get('/alerts'),
   createAlert: (data) => api.post('/alerts', data),
   deleteAlert: (id) => api.delete(`/alerts/${id}`),
+  getNotifications: (unread = false) => api.get('/alerts/notifications', { params: unread ? { unread: 1 } : {} }),
+  markNotificationsRead: () => api.post('/alerts/notifications/read'),
 };
 
 export default api;
@@ -75,6 +77,18 @@ export const marketAPI = {
   getSymbols: () => api.get('/market/symbols'),
   getPrice: (symbol) => api.get(`/market/price/${symbol}`),
   getBatchPrices: (symbols) => api.post('/market/prices/batch', { symbols }),
+  // Server-Sent Events: one long-lived connection instead of polling.
+  // Opened with a short-lived stream token so the access token never lands in a URL;
+  // rejects when streaming is disabled (serverless), the caller then polls.
+  streamPrices: async (symbols, maxRate = 4) => {
+    const { data } = await api.post('/market/stream-token');
+    const params = new URLSearchParams({
+      symbols: symbols.join(','),
+      max_rate: maxRate,
+      token: data.token,
+    });
+    return new EventSource(`${API_URL}/market/stream?${params.toString()}`);
+  },
   getHistorical: (symbol, period = '1mo', interval = '1d') => api.get(`/market/historical/${symbol}?period=${period}&interval=${interval}`),
   getAISignal: (symbol) => api.get(`/market/ai-signal/${symbol}`),
   getMarketSummary: () => api.get('/market/market-summary'),
@@ -86,7 +100,8 @@ export const tradingAPI = {
   executeTrade: (data) => api.post('/trading/execute', data),
   closePosition: (tradeId, price = null) => api.post('/trading/close', { trade_id: tradeId, price: price }),
   closeAllPositions: () => api.post('/trading/close-all'),
-  getHistory: () => api.get('/trading/history'),
+  closeSymbolPositions: (symbol, side = null) => api.post('/trading/close-symbol', { symbol, side }),
+  getHistory: (params = {}) => api.get('/trading/history', { params }),
   getPerformanceAnalysis: (config = {}) => api.post('/trading/performance-analysis', {}, config),
   getStats: () => api.get('/trading/stats'),
   updateJournal: (tradeId, data) => api.put(`/trading/trades/${tradeId}/journal`, data),